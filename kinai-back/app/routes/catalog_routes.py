@@ -0,0 +1,85 @@
+"""
+Catalog prediction routes for KINAI Exoplanets API
+"""
+
+import numpy as np
+from flask import Blueprint, current_app, jsonify, request
+from app.routes.prediction_routes import FAST_FIELDS, fill_candidate_buffer
+from app.services.catalog_service import lookup_prediction
+
+catalog_blueprint = Blueprint("catalog", __name__, url_prefix="/catalog")
+
+
+def get_catalog_index():
+    """
+    Return the application's catalog index (created by main.create_app)
+    """
+    return current_app.extensions["catalog_index"]
+
+
+def read_catalog_key(values):
+    """
+    Returns:
+        tuple: (search_id, num_planet, error_response)
+    """
+    search_id = values.get("search_id")
+    if not search_id:
+        return None, None, (jsonify({"error": "Missing field: search_id"}), 400)
+    try:
+        num_planet = int(values.get("num_planet", 1))
+    except (TypeError, ValueError):
+        return None, None, (jsonify({"error": "num_planet must be an integer"}), 400)
+    return str(search_id), num_planet, None
+
+
+@catalog_blueprint.route("/predictions", methods=["GET"])
+def get_catalog_prediction():
+    """
+    Stored scores of a catalog object: ?search_id=KIC%2010797460&num_planet=1
+    """
+    try:
+        search_id, num_planet, error_response = read_catalog_key(request.args)
+        if error_response:
+            return error_response
+
+        result, status_code = lookup_prediction(get_catalog_index(), search_id, num_planet)
+        return jsonify(result), status_code
+
+    except Exception as e:
+        return jsonify({"error": f"Internal server error: {str(e)}"}), 500
+
+
+@catalog_blueprint.route("/predictions", methods=["POST"])
+def lookup_catalog_prediction():
+    """
+    Stored scores of a catalog object, with live inference on a miss
+
+    The body is one JSON object with search_id and num_planet. It may also
+    carry the fast model features (as in /fast-predict/candidate) and
+    global_view / local_view, used when the object is not in the index.
+    """
+    try:
+        candidate = request.get_json(silent=True)
+        if not isinstance(candidate, dict):
+            return jsonify({"error": "Body must be a JSON object with search_id and num_planet"}), 400
+
+        search_id, num_planet, error_response = read_catalog_key(candidate)
+        if error_response:
+            return error_response
+
+        fast_features = None
+        if any(field["id"] in candidate for field in FAST_FIELDS):
+            fast_features = np.empty((1, len(FAST_FIELDS)), dtype=float)
+            error = fill_candidate_buffer(candidate, fast_features)
+            if error:
+                return jsonify({"error": error}), 400
+
+        deep_features = candidate if "global_view" in candidate or "local_view" in candidate else None
+
+        result, status_code = lookup_prediction(
+            get_catalog_index(), search_id, num_planet, fast_features, deep_features
+        )
+        return jsonify(result), status_code
+
+    except Exception as e:
+        return jsonify({"error": f"Internal server error: {str(e)}"}), 500
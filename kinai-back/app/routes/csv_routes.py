@@ -0,0 +1,83 @@
+"""
+CSV prediction routes for KINAI Exoplanets API
+"""
+
+import json
+from flask import Blueprint, Response, current_app, request, jsonify
+from app.routes.prediction_routes import read_positive_int
+from app.services.unified_csv_service import (
+    DEFAULT_CHUNK_SIZE,
+    MAX_CHUNK_SIZE,
+    stream_csv_with_predictions,
+    summarize_csv_stream,
+)
+
+csv_blueprint = Blueprint("csv", __name__, url_prefix="/csv")
+
+
+def parse_csv_request():
+    """
+    Read the scoring options of a CSV request
+
+    The CSV is sent as the raw request body (Content-Type: text/csv) so it
+    can be read straight from the request stream. Options go in the query
+    string: columnMapping (JSON), schema (JSON, optional), modelType
+    ('fast' or 'deep', optional) and chunkSize (optional, 1 to
+    CSV_MAX_CHUNK_SIZE rows).
+
+    Returns:
+        tuple: (options_dict, error_response) where error_response is None
+        when the request is valid
+    """
+    try:
+        column_mapping = json.loads(request.args.get("columnMapping", "{}"))
+        schema = json.loads(request.args["schema"]) if request.args.get("schema") else None
+    except ValueError as e:
+        return None, (jsonify({"error": f"Invalid query parameter: {str(e)}"}), 400)
+
+    chunk_size, error_response = read_positive_int(
+        request.args, "chunkSize",
+        current_app.config.get("CSV_CHUNK_SIZE", DEFAULT_CHUNK_SIZE),
+        current_app.config.get("CSV_MAX_CHUNK_SIZE", MAX_CHUNK_SIZE),
+    )
+    if error_response:
+        return None, error_response
+
+    model_type = request.args.get("modelType", "fast")
+    if model_type not in ("fast", "deep"):
+        return None, (jsonify({"error": "modelType must be 'fast' or 'deep'"}), 400)
+
+    return {
+        "csv_stream": request.stream,
+        "column_mapping": column_mapping,
+        "schema": schema,
+        "model_type": model_type,
+        "chunk_size": chunk_size,
+    }, None
+
+
+@csv_blueprint.route("/predict", methods=["POST"])
+def csv_predict():
+    options, error_response = parse_csv_request()
+    if error_response:
+        return error_response
+
+    result, status_code = stream_csv_with_predictions(**options)
+    if status_code != 200:
+        return jsonify(result), status_code
+
+    return Response(
+        result,
+        mimetype="text/csv",
+        headers={"Content-Disposition": "attachment; filename=predictions.csv"},
+    )
+
+
+@csv_blueprint.route("/summary", methods=["POST"])
+def csv_summary():
+    options, error_response = parse_csv_request()
+    if error_response:
+        return error_response
+
+    summary, status_code = summarize_csv_stream(**options)
+    return jsonify(summary), status_code
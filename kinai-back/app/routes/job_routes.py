@@ -0,0 +1,64 @@
+"""
+Asynchronous prediction job routes for KINAI Exoplanets API
+"""
+
+from flask import Blueprint, current_app, jsonify, send_file, url_for
+from app.routes.csv_routes import parse_csv_request
+
+job_blueprint = Blueprint("jobs", __name__, url_prefix="/jobs")
+
+
+def get_job_manager():
+    """
+    Return the application's job manager (created by main.create_app)
+    """
+    return current_app.extensions["job_manager"]
+
+
+@job_blueprint.route("", methods=["POST"])
+def submit_job():
+    options, error_response = parse_csv_request()
+    if error_response:
+        return error_response
+
+    result, status_code = get_job_manager().submit(**options)
+    if status_code != 202:
+        return jsonify(result), status_code
+
+    result["status_url"] = url_for("jobs.job_status", job_id=result["job_id"])
+    return jsonify(result), 202
+
+
+@job_blueprint.route("/<job_id>", methods=["GET"])
+def job_status(job_id):
+    job = get_job_manager().get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job)
+
+
+@job_blueprint.route("/<job_id>/result", methods=["GET"])
+def job_result(job_id):
+    manager = get_job_manager()
+    job = manager.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    if job["status"] != "done":
+        return jsonify({"error": f"Job is {job['status']}", "status": job["status"]}), 409
+
+    return send_file(
+        manager.result_path(job_id),
+        mimetype="text/csv",
+        as_attachment=True,
+        download_name=f"predictions_{job_id}.csv",
+    )
+
+
+@job_blueprint.route("/<job_id>/summary", methods=["GET"])
+def job_summary(job_id):
+    job = get_job_manager().get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    if job["status"] != "done":
+        return jsonify({"error": f"Job is {job['status']}", "status": job["status"]}), 409
+    return jsonify(job["summary"])
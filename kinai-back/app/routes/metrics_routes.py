@@ -0,0 +1,90 @@
+"""
+Metrics routes for KINAI Exoplanets API
+
+Registering this blueprint times every request of the application and
+exposes the metrics of classes.metrics in the Prometheus text format. With
+METRICS_DIR set, /metrics reports the sum over all worker processes.
+"""
+
+import time
+from flask import Blueprint, Response, g, request
+from classes.metrics import REQUEST_SECONDS, REQUESTS, current_endpoint, family, registry
+from classes.prediction import predictor
+
+metrics_blueprint = Blueprint("metrics", __name__)
+
+PROMETHEUS_MEDIA_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@metrics_blueprint.before_app_request
+def start_request_timer():
+    # The route pattern (e.g. /jobs/<job_id>) keeps the label set bounded
+    endpoint = request.url_rule.rule if request.url_rule else "unmatched"
+    g.metrics_endpoint = endpoint
+    g.metrics_token = current_endpoint.set(endpoint)
+    g.metrics_start = time.perf_counter()
+    # Each worker writes its metrics for /metrics to aggregate (no-op without METRICS_DIR)
+    registry.start_flusher()
+
+
+@metrics_blueprint.after_app_request
+def record_request(response):
+    """
+    Count the request and observe its duration
+
+    For streamed responses the duration covers building the response,
+    not sending the body.
+    """
+    if "metrics_start" in g:
+        REQUEST_SECONDS.observe(time.perf_counter() - g.metrics_start, g.metrics_endpoint, request.method)
+        REQUESTS.inc(1, g.metrics_endpoint, request.method, str(response.status_code))
+    return response
+
+
+@metrics_blueprint.teardown_app_request
+def reset_endpoint(exc):
+    if "metrics_token" in g:
+        current_endpoint.reset(g.pop("metrics_token"))
+
+
+def prediction_cache_metrics():
+    """
+    Prediction cache counters, see classes.prediction.PredictionCache
+    """
+    if predictor.cache is None:
+        return []
+    stats = predictor.cache.stats()
+    return [
+        family("kinai_prediction_cache_hits_total", "counter",
+               "Rows answered from the prediction cache", [[[], stats["hits"]]]),
+        family("kinai_prediction_cache_misses_total", "counter",
+               "Rows not found in the prediction cache", [[[], stats["misses"]]]),
+        family("kinai_prediction_cache_entries", "gauge",
+               "Predictions held in the cache", [[[], stats["size"]]]),
+    ]
+
+
+def micro_batcher_metrics():
+    """
+    Deep model micro-batching histograms, see classes.micro_batcher
+    """
+    if predictor.micro_batcher is None:
+        return []
+    stats = predictor.micro_batcher.stats()
+    return [
+        family("kinai_micro_batch_queue_length", "gauge",
+               "Requests waiting for the deep model", [[[], stats["queue_length"]]]),
+        family("kinai_micro_batch_rows", "histogram",
+               "Rows per deep model call", [[[], stats["batch_size"]]]),
+        family("kinai_micro_batch_wait_ms", "histogram",
+               "Time a request waited for its batch, in milliseconds", [[[], stats["wait_ms"]]]),
+    ]
+
+
+registry.add_collector(prediction_cache_metrics)
+registry.add_collector(micro_batcher_metrics)
+
+
+@metrics_blueprint.route("/metrics", methods=["GET"])
+def metrics():
+    return Response(registry.render(), content_type=PROMETHEUS_MEDIA_TYPE)
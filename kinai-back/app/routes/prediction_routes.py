@@ -2,110 +2,336 @@
 Prediction routes for KINAI Exoplanets API - Simplified Version with Pandas
 """
 
+import logging
+import math
+import threading
 import pandas as pd
 import numpy as np
-from flask import Blueprint, request, jsonify
-from classes.prediction import predictor
+from flask import Blueprint, Response, current_app, request, jsonify
+from app.services.columnar_service import (
+    JSON_FORMAT,
+    media_type,
+    read_table,
+    request_format,
+    response_format,
+    write_table,
+)
+from app.schemas import DEFAULT_SCHEMA
+from classes.features import FAST_COLUMNS, SCALAR_COLUMNS, build_deep_inputs
+from classes.metrics import count_rows, sample_debug, stage
+from classes.prediction import DEFAULT_BATCH_SIZE, predictor
+from classes.views import DEFAULT_MAX_POINTS, build_views_frame, count_points
 
 prediction_blueprint = Blueprint("prediction", __name__, url_prefix="/")
 
+logger = logging.getLogger(__name__)
 
-@prediction_blueprint.route("/deep-predict", methods=["POST"])
-def deep_predict():
-    try:
+# Campos del esquema por defecto que usa el modelo rápido, en el orden del modelo
+FAST_FIELDS = [
+    next(column for column in DEFAULT_SCHEMA if column["id"] == feature)
+    for feature in FAST_COLUMNS
+]
+
+# Un vector de entrada (1, 6) reutilizado por hilo para /fast-predict/candidate
+_candidate_buffers = threading.local()
+
+
+def read_prediction_request():
+    """
+    Read the rows of a prediction request into a DataFrame
+
+    JSON bodies carry {"csvData": {"headers": [...], "rows": [[...]]}} and
+    optional settings such as batchSize. Arrow IPC and Parquet bodies
+    (selected by Content-Type) carry the table itself, and settings go in
+    the query string.
+
+    Returns:
+        tuple: (df, settings, body_format, error_response) where
+        error_response is None when the request is valid
+    """
+    body_format = request_format(request.mimetype)
+    if body_format != JSON_FORMAT:
+        try:
+            with stage("decode"):
+                df = read_table(request.get_data(), body_format)
+        except ImportError:
+            return None, None, body_format, (jsonify({"error": "Arrow and Parquet formats require pyarrow"}), 415)
+        except ValueError as e:
+            return None, None, body_format, (jsonify({"error": str(e)}), 400)
+        return df, request.args, body_format, None
+
+    with stage("decode"):
         data = request.get_json()
-        print(f"Deep predict - Received data: {data}")
-        if not data:
-            return jsonify({"error": "No data received"}), 400
+    if not data:
+        return None, None, body_format, (jsonify({"error": "No data received"}), 400)
 
-        if "csvData" not in data:
-            return jsonify({"error": "Missing 'csvData' field"}), 400
+    if "csvData" not in data:
+        return None, None, body_format, (jsonify({"error": "Missing 'csvData' field"}), 400)
 
-        csv_data = data["csvData"]
-        if "rows" not in csv_data or "headers" not in csv_data:
-            return jsonify({"error": "Missing 'rows' or 'headers' in csvData"}), 400
+    csv_data = data["csvData"]
+    if "rows" not in csv_data or "headers" not in csv_data:
+        return None, None, body_format, (jsonify({"error": "Missing 'rows' or 'headers' in csvData"}), 400)
 
+    with stage("dataframe"):
         df = pd.DataFrame(csv_data["rows"], columns=csv_data["headers"])
+    return df, data, body_format, None
+
+
+def read_positive_int(settings, name, default, maximum=None):
+    """
+    Read an integer setting that must be positive (and at most maximum)
+
+    Query string values arrive as text, so integer strings are accepted too.
+
+    Returns:
+        tuple: (value, error_response) where error_response is None when
+        the setting is valid
+    """
+    value = settings.get(name, default)
+    number = None
+    if isinstance(value, int) and not isinstance(value, bool):
+        number = value
+    elif isinstance(value, str):
+        try:
+            number = int(value)
+        except ValueError:
+            pass
+
+    if number is None or number < 1:
+        return None, (jsonify({"error": f"{name} must be a positive integer, got {value!r}"}), 400)
+    if maximum is not None and number > maximum:
+        return None, (jsonify({"error": f"{name} must be at most {maximum}, got {number}"}), 400)
+    return number, None
+
+
+def read_batch_size(settings):
+    """
+    Read the batchSize setting, which must be a positive integer
+
+    Returns:
+        tuple: (batch_size, error_response) where error_response is None
+        when the setting is valid
+    """
+    default = current_app.config.get("DEEP_BATCH_SIZE", DEFAULT_BATCH_SIZE)
+    return read_positive_int(settings, "batchSize", default)
 
-        numeric_columns = []
-        for col in df.columns:
-            if col != "":  # Ignorar columnas vacías
-                try:
-                    df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0.0)
-                    numeric_columns.append(col)
-                except:
-                    # Si no se puede convertir a numérico, usar 0
-                    df[col] = 0.0
-                    numeric_columns.append(col)
-
-        if not numeric_columns:
-            return jsonify({"error": "No numeric columns found for prediction"}), 400
-
-        features_df = df[numeric_columns]
-
-        predictions = []
-        errors = []
-        for index, row in features_df.iterrows():
-            try:
-                features = row.values.tolist()
-                print(f"Deep predict - Row {index}: features = {features}")
-                prediction = predictor.deep_predict(features)
-                print(f"Deep predict - Row {index}: prediction = {prediction}")
-                predictions.append(prediction[0])  # Tomar el primer elemento del array
-            except Exception as e:
-                error_msg = f"Row {index}: {str(e)}"
-                print(f"Deep predict error - {error_msg}")
-                errors.append(error_msg)
-                predictions.append(None)  # Marcar como error
+
+def table_response(df, data_format):
+    """
+    Columnar response with the table serialized in data_format
+    """
+    try:
+        with stage("serialize"):
+            return Response(write_table(df, data_format), mimetype=media_type(data_format))
+    except ImportError:
+        return jsonify({"error": "Arrow and Parquet formats require pyarrow"}), 415
+
+
+def deep_predict_frame(df, settings, body_format, view_errors=None):
+    """
+    Score a DataFrame with the deep model and build the response
+
+    Args:
+        df: Rows with global_view, local_view and SCALAR_COLUMNS
+        settings: Request settings (batchSize)
+        body_format: Format of the request body, see request_format
+        view_errors: Optional {row index: message} for rows whose views
+            could not be generated; replaces the generic view error
+
+    Returns:
+        Flask response
+    """
+    batch_size, error_response = read_batch_size(settings)
+    if error_response:
+        return error_response
+
+    # Validar todas las filas antes de la inferencia
+    try:
+        with stage("coerce", "deep"):
+            inputs, valid_mask, errors = build_deep_inputs(df)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    if view_errors:
+        invalid_rows = df.index[~valid_mask]
+        errors = [view_errors.get(index, error) for index, error in zip(invalid_rows, errors)]
+
+    with stage("inference", "deep"):
+        scores = predictor.deep_predict_batch(inputs, batch_size=batch_size)
+    n_valid = int(valid_mask.sum())
+    count_rows("deep", n_valid, len(df) - n_valid)
+    if sample_debug(logger):
+        logger.debug("%s: %d rows, %d valid, format %s, batch size %d",
+                     request.path, len(df), n_valid, body_format, batch_size)
+
+    output_format = response_format(request.accept_mimetypes, body_format)
+    if output_format != JSON_FORMAT:
+        # Una fila por candidato; cada fila inválida tiene un solo mensaje de error
+        result_df = df[["search_id"]].copy() if "search_id" in df.columns else pd.DataFrame(index=df.index)
+        result_df["prediction"] = pd.Series(np.nan, index=df.index, dtype="float32")
+        result_df.loc[valid_mask, "prediction"] = scores
+        result_df["error"] = pd.Series(None, index=df.index, dtype="object")
+        result_df.loc[~valid_mask, "error"] = errors
+        return table_response(result_df, output_format)
+
+    with stage("serialize"):
+        # Filas inválidas quedan como None en su posición original
+        predictions = [None] * len(df)
+        for position, score in zip(np.flatnonzero(valid_mask), scores.tolist()):
+            predictions[position] = score
 
         return jsonify(
             {
                 "predictions": predictions,
                 "total_predictions": len(predictions),
-                "successful_predictions": len(
-                    [p for p in predictions if p is not None]
-                ),
+                "successful_predictions": n_valid,
                 "errors": errors,
                 "dataframe_info": {
                     "total_rows": len(df),
-                    "numeric_columns": numeric_columns,
-                    "column_count": len(numeric_columns),
+                    "numeric_columns": SCALAR_COLUMNS,
+                    "column_count": len(SCALAR_COLUMNS),
                 },
             }
         )
 
+
+@prediction_blueprint.route("/deep-predict", methods=["POST"])
+def deep_predict():
+    try:
+        df, settings, body_format, error_response = read_prediction_request()
+        if error_response:
+            return error_response
+
+        return deep_predict_frame(df, settings, body_format)
+
     except Exception as e:
         return jsonify({"error": f"Error interno del servidor: {str(e)}"}), 500
 
 
-@prediction_blueprint.route("/fast-predict", methods=["POST"])
-def fast_predict():
+@prediction_blueprint.route("/deep-predict/light-curves", methods=["POST"])
+def deep_predict_light_curves():
+    """
+    Deep model prediction from raw light curves
+
+    Same body formats as /deep-predict, but instead of global_view and
+    local_view each row carries time and flux arrays plus period, duration
+    and transit_epoch; the views are generated here (classes.views).
+
+    The generated views are not verified to match the training views, so
+    the route answers 404 unless LIGHT_CURVE_VIEWS_ENABLED is set.
+    """
+    if not current_app.config.get("LIGHT_CURVE_VIEWS_ENABLED", False):
+        return jsonify({
+            "error": "Light-curve predictions are disabled (LIGHT_CURVE_VIEWS_ENABLED)"
+        }), 404
+
     try:
-        print("=== DEBUG: /fast-predict endpoint called ===")
-        data = request.get_json()
-        print(f"Data received: {type(data)}")
-        if data:
-            print(f"Keys in data: {list(data.keys())}")
-        if not data:
-            return jsonify({"error": "No data received"}), 400
+        df, settings, body_format, error_response = read_prediction_request()
+        if error_response:
+            return error_response
 
-        if "csvData" not in data:
-            return jsonify({"error": "Missing 'csvData' field"}), 400
+        max_points = current_app.config.get("LIGHT_CURVE_MAX_POINTS", DEFAULT_MAX_POINTS)
+        n_points = count_points(df)
+        if n_points > max_points:
+            return jsonify({
+                "error": f"Too many light-curve points ({n_points}); the limit is {max_points} per request"
+            }), 400
 
-        csv_data = data["csvData"]
-        if "rows" not in csv_data or "headers" not in csv_data:
-            return jsonify({"error": "Missing 'rows' or 'headers' in csvData"}), 400
+        try:
+            with stage("views", "deep"):
+                df, view_errors = build_views_frame(df)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
 
-        df = pd.DataFrame(csv_data["rows"], columns=csv_data["headers"])
+        return deep_predict_frame(df, settings, body_format, view_errors)
+
+    except Exception as e:
+        return jsonify({"error": f"Error interno del servidor: {str(e)}"}), 500
+
+
+@prediction_blueprint.route("/fast-predict", methods=["POST"])
+def fast_predict():
+    try:
+        df, _, body_format, error_response = read_prediction_request()
+        if error_response:
+            return error_response
+        if sample_debug(logger):
+            logger.debug("/fast-predict: %d rows, format %s, columns %s", len(df), body_format, list(df.columns))
 
-        xs = df.loc[:, "ror":"transit_epoch"].to_numpy()
-        preds = predictor.fast_predict(xs)
+        with stage("coerce", "fast"):
+            xs = df.loc[:, "ror":"transit_epoch"].to_numpy()
+        with stage("inference", "fast"):
+            preds = predictor.fast_predict(xs)
+        count_rows("fast", len(preds))
 
         df["prediction"] = preds
         result_df = df[["search_id", "prediction"]]
-        result_json = result_df.to_dict(orient="records")
 
-        return jsonify({"results": result_json})
+        output_format = response_format(request.accept_mimetypes, body_format)
+        if output_format != JSON_FORMAT:
+            return table_response(result_df, output_format)
+
+        with stage("serialize"):
+            result_json = result_df.to_dict(orient="records")
+            return jsonify({"results": result_json})
+
+    except Exception as e:
+        return jsonify({"error": f"Internal server error: {str(e)}"}), 500
+
+
+def candidate_buffer():
+    buffer = getattr(_candidate_buffers, "buffer", None)
+    if buffer is None:
+        buffer = _candidate_buffers.buffer = np.empty((1, len(FAST_FIELDS)), dtype=float)
+    return buffer
+
+
+def fill_candidate_buffer(candidate, buffer):
+    """
+    Copy the FAST_FIELDS of a candidate object into a (1, 6) buffer
+
+    Returns:
+        str: Error message, or None when every field is valid
+    """
+    for position, field in enumerate(FAST_FIELDS):
+        value = candidate.get(field["id"])
+        if value is None:
+            return f"Missing field: {field['id']} ({field['label']})"
+        try:
+            if isinstance(value, bool):
+                raise ValueError
+            value = float(value)
+        except (TypeError, ValueError):
+            return f"Field {field['id']} must be a {field['dataType']}"
+        if not math.isfinite(value):
+            return f"Field {field['id']} must be finite"
+        buffer[0, position] = value
+    return None
+
+
+@prediction_blueprint.route("/fast-predict/candidate", methods=["POST"])
+def fast_predict_candidate():
+    """
+    Fast model prediction for a single candidate, without pandas
+
+    The body is one JSON object with the candidate's named features, e.g.
+    {"search_id": "KIC 10797460", "ror": 0.022, "stellar_mass": 0.919, ...}.
+    """
+    try:
+        with stage("decode"):
+            candidate = request.get_json(silent=True)
+        if not isinstance(candidate, dict):
+            return jsonify({"error": "Body must be a JSON object with the candidate's features"}), 400
+
+        buffer = candidate_buffer()
+        error = fill_candidate_buffer(candidate, buffer)
+        if error:
+            return jsonify({"error": error}), 400
+
+        with stage("inference", "fast"):
+            prediction = predictor.fast_predict(buffer)[0]
+        count_rows("fast", 1)
+        return jsonify({"search_id": candidate.get("search_id"), "prediction": prediction})
 
     except Exception as e:
         return jsonify({"error": f"Internal server error: {str(e)}"}), 500
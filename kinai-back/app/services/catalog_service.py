@@ -0,0 +1,77 @@
+"""
+Catalog prediction lookups for KINAI Exoplanets API
+Answers known catalog objects from the precomputed index, with live inference on a miss
+"""
+import numpy as np
+
+from classes.features import FAST_COLUMNS, GLOBAL_VIEW_SIZE, LOCAL_VIEW_SIZE, SCALAR_COLUMNS, parse_view
+from classes.metrics import count_rows, stage
+from classes.prediction import predictor
+
+
+def lookup_prediction(index, search_id, num_planet, fast_features=None, deep_features=None):
+    """
+    Fast and deep scores of a catalog object
+
+    Stored scores are returned when the index has the object and was built
+    with the loaded models. Otherwise each score is computed live: the fast
+    one from fast_features or the features stored in the index, the deep
+    one from deep_features.
+
+    Args:
+        index: classes.catalog_index.CatalogIndex (its file may not exist yet)
+        search_id: Catalog identifier, e.g. "KIC 10797460"
+        num_planet: Planet number within search_id
+        fast_features: Optional (1, 6) array with FAST_COLUMNS
+        deep_features: Optional dict with global_view, local_view and SCALAR_COLUMNS
+
+    Returns:
+        tuple: (result_dict, status_code)
+    """
+    entry = None
+    if index.exists():
+        with stage("index"):
+            entry = index.lookup(search_id, num_planet, predictor.fast_model_path, predictor.deep_model_path)
+
+    result = {
+        "search_id": search_id,
+        "num_planet": num_planet,
+        "fast_prediction": None,
+        "deep_prediction": None,
+        "source": {"fast": None, "deep": None},
+    }
+
+    if entry is not None and entry["fast"] is not None:
+        result["fast_prediction"] = entry["fast"]
+        result["source"]["fast"] = "index"
+    else:
+        if fast_features is None and entry is not None and None not in (entry[column] for column in FAST_COLUMNS):
+            fast_features = np.array([[entry[column] for column in FAST_COLUMNS]], dtype=float)
+        if fast_features is not None:
+            with stage("inference", "fast"):
+                result["fast_prediction"] = predictor.fast_predict(fast_features)[0]
+            count_rows("fast", 1)
+            result["source"]["fast"] = "live"
+
+    if entry is not None and entry["deep"] is not None:
+        result["deep_prediction"] = entry["deep"]
+        result["source"]["deep"] = "index"
+    elif deep_features is not None:
+        try:
+            with stage("coerce", "deep"):
+                views = [
+                    parse_view(deep_features.get("global_view"), GLOBAL_VIEW_SIZE),
+                    parse_view(deep_features.get("local_view"), LOCAL_VIEW_SIZE),
+                    np.array([float(deep_features[column]) for column in SCALAR_COLUMNS]),
+                ]
+        except (KeyError, TypeError, ValueError) as e:
+            return {"error": f"Invalid deep model features: {str(e)}"}, 400
+        with stage("inference", "deep"):
+            result["deep_prediction"] = float(predictor.deep_predict(views)[0])
+        count_rows("deep", 1)
+        result["source"]["deep"] = "live"
+
+    if entry is None and result["source"] == {"fast": None, "deep": None}:
+        return {"error": f"{search_id} planet {num_planet} is not in the catalog index"}, 404
+
+    return result, 200
@@ -0,0 +1,121 @@
+"""
+Columnar request and response formats for KINAI Exoplanets API
+Reads and writes prediction tables as Apache Arrow IPC or Parquet
+"""
+import io
+
+JSON_FORMAT = 'json'
+ARROW_FORMAT = 'arrow'
+PARQUET_FORMAT = 'parquet'
+
+# Media types accepted for each columnar format; the first one is used in responses
+FORMAT_MEDIA_TYPES = {
+    ARROW_FORMAT: ('application/vnd.apache.arrow.stream', 'application/vnd.apache.arrow.file'),
+    PARQUET_FORMAT: ('application/vnd.apache.parquet', 'application/x-parquet', 'application/parquet'),
+}
+
+MEDIA_TYPE_FORMATS = {
+    media_type: data_format
+    for data_format, media_types in FORMAT_MEDIA_TYPES.items()
+    for media_type in media_types
+}
+
+
+def request_format(mimetype):
+    """
+    Format of a request body from its Content-Type
+
+    Args:
+        mimetype: Content-Type without parameters (request.mimetype)
+
+    Returns:
+        str: 'arrow', 'parquet' or 'json' for anything else
+    """
+    return MEDIA_TYPE_FORMATS.get(mimetype, JSON_FORMAT)
+
+
+def response_format(accept_mimetypes, body_format):
+    """
+    Format of the response: the first format named explicitly in the Accept
+    header (highest quality first), else the format of the request body
+
+    Args:
+        accept_mimetypes: Parsed Accept header (request.accept_mimetypes)
+        body_format: Format of the request body, see request_format
+
+    Returns:
+        str: 'arrow', 'parquet' or 'json'
+    """
+    for mimetype, quality in accept_mimetypes:
+        if quality <= 0:
+            continue
+        if mimetype in MEDIA_TYPE_FORMATS:
+            return MEDIA_TYPE_FORMATS[mimetype]
+        if mimetype == 'application/json':
+            return JSON_FORMAT
+    return body_format
+
+
+def media_type(data_format):
+    return FORMAT_MEDIA_TYPES[data_format][0]
+
+
+def read_table(body, data_format):
+    """
+    Read an Arrow IPC (stream or file) or Parquet body into a DataFrame
+
+    List columns such as global_view and local_view come back as one NumPy
+    array per cell, which classes.features.parse_view accepts directly.
+
+    Args:
+        body: Raw request bytes
+        data_format: 'arrow' or 'parquet'
+
+    Returns:
+        pd.DataFrame: The table
+
+    Raises:
+        ValueError: If the body is not a valid table of that format
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    try:
+        if data_format == PARQUET_FORMAT:
+            table = pq.read_table(pa.BufferReader(body))
+        else:
+            table = pa.ipc.open_stream(body).read_all()
+    except pa.ArrowInvalid:
+        if data_format == PARQUET_FORMAT:
+            raise ValueError("Request body is not a valid Parquet file")
+        try:
+            table = pa.ipc.open_file(pa.BufferReader(body)).read_all()
+        except pa.ArrowInvalid:
+            raise ValueError("Request body is not a valid Arrow IPC stream or file")
+    return table.to_pandas()
+
+
+def write_table(df, data_format):
+    """
+    Serialize a DataFrame as an Arrow IPC stream or a Parquet file
+
+    Args:
+        df: DataFrame to write
+        data_format: 'arrow' or 'parquet'
+
+    Returns:
+        bytes: Serialized table
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    if data_format == PARQUET_FORMAT:
+        buffer = io.BytesIO()
+        pq.write_table(table, buffer)
+        return buffer.getvalue()
+
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
@@ -0,0 +1,207 @@
+"""
+Incremental CSV re-scoring for KINAI Exoplanets API
+Scores only the rows whose model features changed since the previous run
+
+A manifest (.npz) maps a hash of each row's model features to its
+prediction. On the next run rows with a known hash reuse the stored
+prediction and only new or changed rows go through the model. The manifest
+records the model's content hash (classes.prediction.model_digest), so a
+retrained model invalidates it automatically.
+
+Usage:
+    python -m app.services.incremental_service koi_table.csv scored.csv scores_manifest.npz --model fast
+"""
+import argparse
+import hashlib
+import io
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from app.schemas import DEFAULT_SCHEMA
+from app.services.unified_csv_service import get_column_plan, score_features
+from classes.features import FAST_COLUMNS, SCALAR_COLUMNS
+from classes.prediction import model_digest, predictor
+
+# Bump when feature_keys changes so older manifests are discarded
+MANIFEST_VERSION = 1
+
+# Schema with only the fast model columns, for tables without light-curve views
+FAST_SCHEMA = [column for column in DEFAULT_SCHEMA if column["id"] in ['search_id'] + FAST_COLUMNS]
+
+
+def feature_keys(features_df, model_type='fast'):
+    """
+    16-byte hash of each row's model features
+
+    Fast model rows hash their numeric features after coercion, so
+    formatting changes (0.10 vs 0.1) do not count as changes. Deep model rows
+    hash the raw view cells plus the numeric scalars, so unchanged rows never
+    need their views parsed.
+
+    Returns:
+        np.ndarray: Array of dtype S16, one key per row
+    """
+    if model_type == 'deep':
+        scalars = features_df[SCALAR_COLUMNS].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)
+        keys = []
+        for global_cell, local_cell, row in zip(features_df['global_view'], features_df['local_view'], scalars):
+            digest = hashlib.blake2b(digest_size=16)
+            digest.update(str(global_cell).encode('utf-8'))
+            digest.update(b'\0')
+            digest.update(str(local_cell).encode('utf-8'))
+            digest.update(row.tobytes())
+            keys.append(digest.digest())
+        return np.array(keys, dtype='S16')
+
+    matrix = features_df[FAST_COLUMNS].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)
+    # -0.0 and 0.0 are the same feature value
+    matrix = np.ascontiguousarray(matrix + 0.0)
+    return np.array([hashlib.blake2b(row.tobytes(), digest_size=16).digest() for row in matrix], dtype='S16')
+
+
+def current_model(model_type):
+    path = predictor.deep_model_path if model_type == 'deep' else predictor.fast_model_path
+    return f"{model_type}:{model_digest(path)}"
+
+
+def load_manifest(manifest_path, model):
+    """
+    Stored (keys, predictions), sorted by key; empty if the manifest is
+    missing or was written by another model or manifest version
+    """
+    empty = np.empty(0, dtype='S16'), np.empty(0, dtype=float)
+    if not manifest_path or not os.path.exists(manifest_path):
+        return empty
+    with np.load(manifest_path) as manifest:
+        if int(manifest['version']) != MANIFEST_VERSION or str(manifest['model']) != model:
+            return empty
+        return manifest['keys'], manifest['predictions']
+
+
+def save_manifest(manifest_path, model, keys, predictions):
+    """
+    Write the manifest atomically, keeping only the rows of this run
+    """
+    keys, first = np.unique(keys, return_index=True)
+    tmp_path = manifest_path + '.tmp.npz'
+    np.savez(
+        tmp_path, version=np.array(MANIFEST_VERSION), model=np.array(model),
+        keys=keys, predictions=predictions[first],
+    )
+    os.replace(tmp_path, manifest_path)
+
+
+def score_incremental(features_df, manifest_path, model_type='fast'):
+    """
+    Predictions for every row, reusing the manifest for unchanged rows
+
+    Args:
+        features_df: DataFrame with the model columns (see prepare_features)
+        manifest_path: Manifest file; created or replaced with this run's rows
+        model_type: 'fast' or 'deep'
+
+    Returns:
+        tuple: (predictions, stats) where predictions is a float array (NaN
+        for rows that could not be scored) and stats counts reused, scored
+        and failed rows
+    """
+    model = current_model(model_type)
+    keys = feature_keys(features_df, model_type)
+    stored_keys, stored_predictions = load_manifest(manifest_path, model)
+
+    predictions = np.full(len(keys), np.nan)
+    found = np.zeros(len(keys), dtype=bool)
+    if len(stored_keys):
+        positions = np.minimum(np.searchsorted(stored_keys, keys), len(stored_keys) - 1)
+        found = stored_keys[positions] == keys
+        predictions[found] = stored_predictions[positions[found]]
+
+    if not found.all():
+        predictions[~found] = score_features(features_df[~found], model_type)
+
+    scored = np.isfinite(predictions)
+    save_manifest(manifest_path, model, keys[scored], predictions[scored])
+
+    stats = {
+        "rows": len(keys),
+        "reused": int(found.sum()),
+        "scored": int((scored & ~found).sum()),
+        "failed": int((~scored).sum()),
+    }
+    return predictions, stats
+
+
+def process_csv_incremental(csv_content, column_mapping, manifest_path, schema=None, model_type='fast'):
+    """
+    Incremental version of process_csv_with_predictions
+
+    Args:
+        csv_content: CSV file content as bytes
+        column_mapping: Dictionary mapping CSV columns to expected model features
+        manifest_path: Manifest from the previous run (created if missing)
+        schema: Optional schema definition for flexible column handling
+        model_type: 'fast' or 'deep' - which model to use for predictions
+
+    Returns:
+        tuple: ({"csv": processed_csv_bytes, "stats": stats}, status_code)
+    """
+    try:
+        plan, error = get_column_plan(column_mapping, schema, model_type)
+        if error:
+            return error
+
+        df = pd.read_csv(io.StringIO(csv_content.decode('utf-8')), **plan.read_options())
+        features_df, error = plan.select(df)
+        if error:
+            return error
+
+        predictions, stats = score_incremental(features_df, manifest_path, model_type)
+        prediction_column = 'ai_deep_prediction' if model_type == 'deep' else 'ai_prediction'
+        df[prediction_column] = predictions
+
+        result_csv_buffer = io.StringIO()
+        df.to_csv(result_csv_buffer, index=False)
+        return {"csv": result_csv_buffer.getvalue().encode('utf-8'), "stats": stats}, 200
+
+    except Exception as e:
+        return {
+            "error": f"Error processing CSV: {str(e)}"
+        }, 500
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Re-score a CSV, running the model only on new or changed rows')
+    parser.add_argument('csv_path')
+    parser.add_argument('output_path')
+    parser.add_argument('manifest_path', help='Manifest from the previous run (.npz, created if missing)')
+    parser.add_argument('--model', choices=['fast', 'deep'], default='fast')
+    parser.add_argument('--mapping', help='JSON file mapping model columns to CSV columns (default: same names)')
+    parser.add_argument('--schema', help='JSON schema file (default: the fast model columns, or the full '
+                                         'default schema with --model deep)')
+    args = parser.parse_args()
+
+    if args.schema:
+        with open(args.schema) as schema_file:
+            schema = json.load(schema_file)
+    else:
+        schema = DEFAULT_SCHEMA if args.model == 'deep' else FAST_SCHEMA
+    if args.mapping:
+        with open(args.mapping) as mapping_file:
+            mapping = json.load(mapping_file)
+    else:
+        mapping = {column["id"]: column["id"] for column in schema}
+
+    with open(args.csv_path, 'rb') as csv_file:
+        result, status_code = process_csv_incremental(
+            csv_file.read(), mapping, args.manifest_path, schema, args.model
+        )
+    if status_code != 200:
+        raise SystemExit(result["error"])
+
+    with open(args.output_path, 'wb') as output:
+        output.write(result["csv"])
+    stats = result["stats"]
+    print(f"{stats['rows']} rows: {stats['reused']} reused, {stats['scored']} scored, {stats['failed']} failed")
@@ -0,0 +1,243 @@
+"""
+Asynchronous CSV prediction jobs for KINAI Exoplanets API
+Runs large uploads on a bounded local worker pool and tracks their progress
+"""
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from classes.metrics import pid_alive
+from app.services.unified_csv_service import (
+    DEFAULT_CHUNK_SIZE,
+    iter_scored_chunks,
+    prepare_features,
+    summarize_predictions,
+)
+
+DEFAULT_JOBS_DIR = os.path.join(tempfile.gettempdir(), 'kinai_jobs')
+JOB_ID_PATTERN = re.compile(r'[0-9a-f]{32}')
+
+INPUT_FILE = 'input.csv'
+RESULT_FILE = 'result.csv'
+STATUS_FILE = 'job.json'
+
+
+class JobManager:
+    """
+    Local job store and worker pool
+
+    Each job lives in its own directory under jobs_dir (uploaded CSV, result
+    CSV and a job.json status file), so any process on the host can poll it.
+    At most max_workers jobs run at once and at most max_queued more wait;
+    further submissions are rejected until a slot frees up.
+
+    Every job records the pid of the process running it. A job left queued
+    or running by a process that no longer exists (a restarted worker or
+    server) can never finish, so it is marked failed when a manager starts.
+    """
+
+    def __init__(self, jobs_dir=DEFAULT_JOBS_DIR, max_workers=2, max_queued=8, retention=86400):
+        self.jobs_dir = jobs_dir
+        self.retention = retention
+        os.makedirs(jobs_dir, exist_ok=True)
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='kinai-job')
+        self._slots = threading.BoundedSemaphore(max_workers + max_queued)
+        self._status_lock = threading.Lock()
+        self.fail_interrupted()
+
+    def job_dir(self, job_id):
+        return os.path.join(self.jobs_dir, job_id)
+
+    def submit(self, csv_stream, column_mapping, schema=None, model_type='fast', chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        Save an uploaded CSV and queue it for scoring
+
+        Args:
+            csv_stream: Binary file-like object with the CSV content
+            column_mapping: Dictionary mapping CSV columns to expected model features
+            schema: Optional schema definition for flexible column handling
+            model_type: 'fast' or 'deep' - which model to use for predictions
+            chunk_size: Number of rows scored per chunk
+
+        Returns:
+            tuple: (job_dict, status_code) or (error_dict, status_code)
+        """
+        if not self._slots.acquire(blocking=False):
+            return {"error": "Job queue is full, retry later"}, 429
+
+        job_id = uuid.uuid4().hex
+        job_dir = self.job_dir(job_id)
+        try:
+            self.purge_expired()
+            os.makedirs(job_dir)
+            input_path = os.path.join(job_dir, INPUT_FILE)
+            total_bytes = save_stream(csv_stream, input_path)
+
+            # Reject bad mappings now instead of failing once the job runs
+            try:
+                header_df = pd.read_csv(input_path, nrows=0)
+            except pd.errors.EmptyDataError:
+                header_df = None
+            error = ({"error": "CSV file is empty"}, 400) if header_df is None else \
+                prepare_features(header_df, column_mapping, schema, model_type)[1]
+            if error:
+                shutil.rmtree(job_dir, ignore_errors=True)
+                self._slots.release()
+                return error
+
+            job = {
+                "job_id": job_id,
+                "status": "queued",
+                "model_type": model_type,
+                "rows_done": 0,
+                "total_rows": None,
+                "bytes_done": 0,
+                "total_bytes": total_bytes,
+                "pid": os.getpid(),
+                "created_at": time.time(),
+                "started_at": None,
+                "finished_at": None,
+                "error": None,
+                "summary": None,
+            }
+            self._write_status(job)
+            options = {
+                "column_mapping": column_mapping,
+                "schema": schema,
+                "model_type": model_type,
+                "chunk_size": chunk_size,
+            }
+            self._executor.submit(self._run, job, options)
+            return dict(job), 202
+
+        except Exception:
+            shutil.rmtree(job_dir, ignore_errors=True)
+            self._slots.release()
+            raise
+
+    def get(self, job_id):
+        """
+        Read the status of a job
+
+        Returns:
+            dict: Job status, or None if the job does not exist
+        """
+        if not JOB_ID_PATTERN.fullmatch(job_id):
+            return None
+        try:
+            with open(os.path.join(self.job_dir(job_id), STATUS_FILE)) as status_file:
+                return json.load(status_file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def result_path(self, job_id):
+        return os.path.join(self.job_dir(job_id), RESULT_FILE)
+
+    def fail_interrupted(self):
+        """
+        Mark failed the queued or running jobs whose process is gone
+        """
+        for job_id in os.listdir(self.jobs_dir):
+            job = self.get(job_id)
+            if not job or job["status"] not in ("queued", "running"):
+                continue
+            if job.get("pid") and pid_alive(job["pid"]):
+                continue
+            job.update(status="failed", error="Job was interrupted by a server restart", finished_at=time.time())
+            self._write_status(job)
+            input_path = os.path.join(self.job_dir(job_id), INPUT_FILE)
+            if os.path.exists(input_path):
+                os.remove(input_path)
+
+    def purge_expired(self):
+        """
+        Delete finished jobs older than the retention period
+        """
+        now = time.time()
+        for job_id in os.listdir(self.jobs_dir):
+            job = self.get(job_id)
+            if job and job["finished_at"] and now - job["finished_at"] > self.retention:
+                shutil.rmtree(self.job_dir(job_id), ignore_errors=True)
+
+    def _run(self, job, options):
+        job_dir = self.job_dir(job["job_id"])
+        input_path = os.path.join(job_dir, INPUT_FILE)
+        result_path = os.path.join(job_dir, RESULT_FILE)
+        prediction_column = 'ai_deep_prediction' if options["model_type"] == 'deep' else 'ai_prediction'
+
+        try:
+            job.update(status="running", started_at=time.time())
+            self._write_status(job)
+
+            predictions = []
+            with open(input_path, 'rb') as csv_stream, open(result_path + '.part', 'wb') as result_file:
+                chunks, status_code = iter_scored_chunks(
+                    csv_stream, options["column_mapping"], options["schema"],
+                    options["model_type"], options["chunk_size"]
+                )
+                if status_code != 200:
+                    raise ValueError(chunks["error"])
+
+                for chunk, chunk_predictions in chunks:
+                    chunk[prediction_column] = chunk_predictions
+                    result_file.write(chunk.to_csv(index=False, header=not predictions).encode('utf-8'))
+                    predictions.append(chunk_predictions)
+                    job["rows_done"] += len(chunk)
+                    job["bytes_done"] = csv_stream.tell()
+                    self._write_status(job)
+
+            os.replace(result_path + '.part', result_path)
+            job["summary"] = summarize_predictions(
+                np.concatenate(predictions), options["schema"], options["model_type"]
+            )
+            # Rows actually parsed: quoted cells may span several lines
+            job["total_rows"] = job["rows_done"]
+            job["bytes_done"] = job["total_bytes"]
+            job["status"] = "done"
+
+        except Exception as e:
+            job["status"] = "failed"
+            job["error"] = f"Error processing CSV: {str(e)}"
+
+        finally:
+            job["finished_at"] = time.time()
+            self._write_status(job)
+            if os.path.exists(input_path):
+                os.remove(input_path)
+            self._slots.release()
+
+    def _write_status(self, job):
+        # Write to a temporary file and rename so readers never see a partial file
+        status_path = os.path.join(self.job_dir(job["job_id"]), STATUS_FILE)
+        with self._status_lock:
+            with open(status_path + '.tmp', 'w') as status_file:
+                json.dump(job, status_file)
+            os.replace(status_path + '.tmp', status_path)
+
+
+def save_stream(csv_stream, path, block_size=1 << 20):
+    """
+    Copy a binary stream to disk in blocks
+
+    Returns:
+        int: Number of bytes written
+    """
+    total_bytes = 0
+    with open(path, 'wb') as output:
+        while True:
+            block = csv_stream.read(block_size)
+            if not block:
+                break
+            output.write(block)
+            total_bytes += len(block)
+    return total_bytes
@@ -0,0 +1,184 @@
+"""
+Parallel scoring service for KINAI Exoplanets API
+Splits large feature matrices into row shards and scores them on a process pool
+"""
+import multiprocessing
+import os
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+# SCORING_WORKERS=0 or 1 keeps scoring in the request process
+SCORING_WORKERS = int(os.environ.get('SCORING_WORKERS', 0))
+SCORING_SHARD_SIZE = int(os.environ.get('SCORING_SHARD_SIZE', 2000))
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def web_workers():
+    """
+    Number of web worker processes sharing the machine (WEB_CONCURRENCY,
+    which gunicorn.conf.py exports; 1 when serving from a single process)
+    """
+    return max(1, int(os.environ.get('WEB_CONCURRENCY', 1)))
+
+
+def threads_per_worker(workers):
+    """
+    Native threads each pool process may use
+
+    Every web worker creates its own pool, so the cores are split across
+    WEB_CONCURRENCY × workers processes.
+    """
+    return max(1, (os.cpu_count() or 1) // (web_workers() * workers))
+
+
+def threads_per_web_worker():
+    """
+    Native threads each web worker may use for in-process scoring
+    """
+    return max(1, (os.cpu_count() or 1) // web_workers())
+
+
+def limit_threads(threads, override=True):
+    """
+    Limit this process's BLAS/OpenMP, TensorFlow and forest joblib threads
+
+    The environment variables apply to models loaded afterwards; a fast
+    model that is already loaded (preloaded in the gunicorn master) gets its
+    n_jobs updated. With override=False, thread settings already present in
+    the environment are kept.
+
+    Args:
+        threads: Thread budget for this process
+        override: Replace FAST_MODEL_N_JOBS / TF_NUM_*_THREADS if already set
+    """
+    settings = {
+        'FAST_MODEL_N_JOBS': str(threads),
+        'TF_NUM_INTRAOP_THREADS': str(threads),
+        'TF_NUM_INTEROP_THREADS': '1',
+    }
+    for name, value in settings.items():
+        if override or not os.environ.get(name):
+            os.environ[name] = value
+
+    from threadpoolctl import threadpool_limits
+    threadpool_limits(int(os.environ['FAST_MODEL_N_JOBS']))
+
+    # Only touch the predictor if this process already imported it
+    prediction = sys.modules.get('classes.prediction')
+    if prediction is not None:
+        prediction.predictor.set_fast_n_jobs(int(os.environ['FAST_MODEL_N_JOBS']))
+
+
+def _init_worker(threads):
+    # Runs in each pool process before it scores anything: limit native
+    # threads to this process's share of cores
+    os.environ['PREDICTION_CACHE_SIZE'] = '0'
+    limit_threads(threads)
+
+
+def get_executor():
+    """
+    Return the process pool, creating it on first use
+
+    The pool uses the 'spawn' start method: TensorFlow is not fork-safe, and
+    spawned processes do not inherit the parent's model copies.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=SCORING_WORKERS,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker,
+                initargs=(threads_per_worker(SCORING_WORKERS),),
+            )
+    return _executor
+
+
+def score_shard(model_type, inputs):
+    """
+    Score one block of rows with the process's own predictor
+
+    Args:
+        model_type: 'fast' or 'deep'
+        inputs: List of arrays with the same number of rows ([matrix] for
+            the fast model, the three view tensors for the deep model)
+
+    Returns:
+        np.ndarray: Float predictions, one per row
+    """
+    from classes.prediction import predictor
+
+    if model_type == 'deep':
+        return predictor.deep_predict_batch(inputs)
+    return np.asarray(predictor.fast_predict(inputs[0]), dtype=float)
+
+
+def pool_enabled():
+    """
+    True when scoring goes to the process pool (SCORING_WORKERS > 1)
+    """
+    return SCORING_WORKERS > 1
+
+
+def max_in_flight():
+    """
+    Blocks submitted to the pool and not yet collected, per stream
+
+    Twice the pool size, so every process has its next block queued while
+    the caller reads and parses the following ones.
+    """
+    return 2 * SCORING_WORKERS
+
+
+def submit_rows(inputs, model_type='fast', shard_size=None):
+    """
+    Start scoring rows on the pool without waiting for the result
+
+    Args:
+        inputs: List of arrays with the same number of rows
+        model_type: 'fast' or 'deep'
+        shard_size: Rows per block, defaults to SCORING_SHARD_SIZE
+
+    Returns:
+        list: Futures, one per block of shard_size rows, in row order
+    """
+    shard_size = SCORING_SHARD_SIZE if shard_size is None else shard_size
+    executor = get_executor()
+    return [
+        executor.submit(score_shard, model_type, [x[start:start + shard_size] for x in inputs])
+        for start in range(0, len(inputs[0]), shard_size)
+    ]
+
+
+def gather(futures):
+    """
+    Join the predictions of submit_rows, waiting for every block
+    """
+    return np.concatenate([future.result() for future in futures])
+
+
+def predict_rows(inputs, model_type='fast', shard_size=None):
+    """
+    Score rows, in parallel across processes when the input is large enough
+
+    Rows are split into blocks of shard_size, scored on the pool and joined
+    back in their original order.
+
+    Args:
+        inputs: List of arrays with the same number of rows
+        model_type: 'fast' or 'deep'
+        shard_size: Rows per block, defaults to SCORING_SHARD_SIZE
+
+    Returns:
+        np.ndarray: Float predictions, one per row
+    """
+    shard_size = SCORING_SHARD_SIZE if shard_size is None else shard_size
+    if not pool_enabled() or len(inputs[0]) <= shard_size:
+        return score_shard(model_type, inputs)
+    return gather(submit_rows(inputs, model_type, shard_size))
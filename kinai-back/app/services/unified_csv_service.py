@@ -5,14 +5,23 @@ Handles both fast and deep learning predictions
 import pandas as pd
 import numpy as np
 import io
+import itertools
+import json
+import logging
 import sys
 import os
-import json
+from collections import deque
+from functools import lru_cache
 
 # Add the root directory to the Python path to import classes
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 
-from classes.prediction import predictor
+from classes.features import FAST_COLUMNS, SCALAR_COLUMNS, build_deep_inputs
+from classes.metrics import count_rows, current_endpoint, stage
+from app.schemas import DEFAULT_SCHEMA
+from app.services.parallel_scoring import gather, max_in_flight, pool_enabled, predict_rows, submit_rows
+
+logger = logging.getLogger(__name__)
 
 
 def validate_schema(schema):
@@ -76,6 +85,222 @@ def extract_column_info(schema):
     return column_info
 
 
+# Rows read, scored and written per chunk when streaming a CSV, and the
+# largest chunk a request may ask for (memory grows with the chunk)
+DEFAULT_CHUNK_SIZE = 1000
+MAX_CHUNK_SIZE = 100000
+
+# Default column layout used when no schema is supplied (backward compatibility)
+DEFAULT_REQUIRED_COLUMNS = [
+    'search_id', 'num_planet', 'disposition', 'ror', 'stellar_mass',
+    'ss_gravity', 'period', 'duration', 'transit_epoch', 'global_view', 'local_view'
+]
+
+
+# Columns each model reads; a schema must define all of them
+MODEL_COLUMNS = {
+    'fast': FAST_COLUMNS,
+    'deep': SCALAR_COLUMNS + ['global_view', 'local_view'],
+}
+
+# Distinct schema + mapping pairs whose column plan is kept in memory
+COLUMN_PLAN_CACHE_SIZE = 128
+
+# First characters of the last line of a streamed CSV that failed midway
+STREAM_ERROR_MARKER = '#KINAI_STREAM_ERROR '
+
+
+class ColumnPlan:
+    """
+    Compiled reading plan for one schema and column mapping
+
+    Holds the CSV column that feeds each required model column and the dtype
+    to parse it with, so pd.read_csv can skip unmapped columns (usecols) and
+    type inference on text columns (dtype). Numeric columns keep pandas'
+    inference so invalid values still become NaN per row instead of failing
+    the whole upload.
+    """
+
+    def __init__(self, required_columns, csv_columns, dtypes):
+        self.required_columns = required_columns
+        self.csv_columns = csv_columns
+        self.dtypes = dtypes
+        self.usecols = frozenset(csv_columns)
+
+    def read_options(self, all_columns=True):
+        """
+        Keyword arguments for pd.read_csv
+
+        Args:
+            all_columns: Parse every column of the CSV (needed when the rows
+                are written back); otherwise only the mapped ones
+
+        Returns:
+            dict: read_csv keyword arguments
+        """
+        options = {"dtype": self.dtypes}
+        if not all_columns:
+            options["usecols"] = self.usecols.__contains__
+        return options
+
+    def select(self, df):
+        """
+        Select the mapped columns of a dataframe under their model names
+
+        Returns:
+            tuple: (features_df, error) where error is a (dict, status_code)
+            tuple or None
+        """
+        missing_csv_columns = self.usecols - set(df.columns)
+        if missing_csv_columns:
+            return None, ({
+                "error": f"The following columns do not exist in CSV: {', '.join(missing_csv_columns)}"
+            }, 400)
+
+        features_df = df[self.csv_columns]
+        features_df.columns = self.required_columns
+        return features_df, None
+
+
+def get_column_plan(column_mapping, schema=None, model_type='fast'):
+    """
+    Return the column plan for a schema and column mapping
+
+    Plans are compiled once per distinct (column_mapping, schema, model_type)
+    and cached under its canonical JSON form.
+
+    Args:
+        column_mapping: Dictionary mapping CSV columns to expected model features
+        schema: Optional schema definition for flexible column handling
+        model_type: 'fast' or 'deep' - the schema must define that model's columns
+
+    Returns:
+        tuple: (plan, error) where error is a (dict, status_code) tuple or
+        None when the mapping is valid
+    """
+    try:
+        key = json.dumps([column_mapping, schema, model_type], sort_keys=True)
+    except (TypeError, ValueError) as e:
+        return None, ({"error": f"Invalid schema: {str(e)}"}, 400)
+
+    plan, error = _compile_column_plan(key)
+    return plan, (dict(error[0]), error[1]) if error else None
+
+
+@lru_cache(maxsize=COLUMN_PLAN_CACHE_SIZE)
+def _compile_column_plan(key):
+    column_mapping, schema, model_type = json.loads(key)
+
+    if schema:
+        is_valid, error_msg = validate_schema(schema)
+        if not is_valid:
+            return None, ({"error": f"Invalid schema: {error_msg}"}, 400)
+        column_info = extract_column_info(schema)
+        required_columns = column_info['required_columns']
+        data_types = column_info['data_types']
+        missing_model_columns = [column for column in MODEL_COLUMNS[model_type] if column not in required_columns]
+        if missing_model_columns:
+            return None, ({
+                "error": f"Invalid schema: the {model_type} model needs the columns "
+                         f"{', '.join(missing_model_columns)}"
+            }, 400)
+    else:
+        required_columns = DEFAULT_REQUIRED_COLUMNS
+        data_types = extract_column_info(DEFAULT_SCHEMA)['data_types']
+
+    # Check if all required columns are mapped
+    if not isinstance(column_mapping, dict):
+        return None, ({"error": "Column mapping must be a dictionary"}, 400)
+    missing_columns = set(required_columns) - set(column_mapping.keys())
+    if missing_columns:
+        return None, ({
+            "error": f"Missing the following columns in mapping: {', '.join(missing_columns)}"
+        }, 400)
+
+    csv_columns = [column_mapping[column] for column in required_columns]
+
+    # Text and JSON columns are read as strings; numeric ones are inferred
+    dtypes = {}
+    for column, csv_column in zip(required_columns, csv_columns):
+        if data_types[column] not in ('number', 'integer', 'float'):
+            dtypes[csv_column] = str
+
+    return ColumnPlan(required_columns, csv_columns, dtypes), None
+
+
+def prepare_features(df, column_mapping, schema=None, model_type='fast'):
+    """
+    Validate the column mapping and select the model columns from a dataframe
+
+    Args:
+        df: DataFrame read from the uploaded CSV
+        column_mapping: Dictionary mapping CSV columns to expected model features
+        schema: Optional schema definition for flexible column handling
+        model_type: 'fast' or 'deep' - which model the columns are for
+
+    Returns:
+        tuple: (features_df, error) where error is a (dict, status_code) tuple
+        or None when the mapping is valid
+    """
+    plan, error = get_column_plan(column_mapping, schema, model_type)
+    if error:
+        return None, error
+    return plan.select(df)
+
+
+def coerce_features(features_df, model_type='fast', endpoint=None):
+    """
+    Convert a features dataframe to model inputs
+
+    Returns:
+        tuple: (inputs, valid_mask) where inputs holds only the valid rows
+    """
+    with stage('coerce', model_type, endpoint):
+        if model_type == 'deep':
+            inputs, valid_mask, _ = build_deep_inputs(features_df)
+        else:
+            matrix = features_df[FAST_COLUMNS].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)
+            valid_mask = np.isfinite(matrix).all(axis=1)
+            inputs = [matrix[valid_mask]]
+    return inputs, valid_mask
+
+
+def fill_predictions(valid_mask, scores, model_type='fast', endpoint=None):
+    """
+    Place the scores of the valid rows in a per-row array and count the rows
+
+    Returns:
+        np.ndarray: Float array with one prediction per row, NaN where the
+        row could not be scored
+    """
+    predictions = np.full(len(valid_mask), np.nan)
+    predictions[valid_mask] = scores
+    n_valid = int(valid_mask.sum())
+    count_rows(model_type, n_valid, len(valid_mask) - n_valid, endpoint)
+    return predictions
+
+
+def score_features(features_df, model_type='fast', endpoint=None):
+    """
+    Score every row of a features dataframe with a single batched model call
+
+    Args:
+        features_df: DataFrame with the model columns (see prepare_features)
+        model_type: 'fast' or 'deep' - which model to use for predictions
+        endpoint: Metrics label, defaults to the current request's endpoint
+
+    Returns:
+        np.ndarray: Float array with one prediction per row, NaN where the
+        row could not be scored
+    """
+    inputs, valid_mask = coerce_features(features_df, model_type, endpoint)
+    scores = []
+    if valid_mask.any():
+        with stage('inference', model_type, endpoint):
+            scores = predict_rows(inputs, model_type)
+    return fill_predictions(valid_mask, scores, model_type, endpoint)
+
+
 def process_csv_with_predictions(csv_content, column_mapping, schema=None, model_type='fast'):
     """
     Process CSV file with column mapping and return predictions
@@ -90,111 +315,28 @@ def process_csv_with_predictions(csv_content, column_mapping, schema=None, model
         tuple: (processed_csv_bytes, status_code)
     """
     try:
+        plan, error = get_column_plan(column_mapping, schema, model_type)
+        if error:
+            return error
+
         # Read CSV from bytes
-        csv_buffer = io.StringIO(csv_content.decode('utf-8'))
-        df = pd.read_csv(csv_buffer)
-        
-        # Determine required columns based on schema or use default
-        if schema:
-            # Validate schema
-            is_valid, error_msg = validate_schema(schema)
-            if not is_valid:
-                return {"error": f"Invalid schema: {error_msg}"}, 400
-            
-            # Extract column information from schema
-            column_info = extract_column_info(schema)
-            required_columns = column_info['required_columns']
-            numeric_columns = column_info['numeric_columns']
-            categorical_columns = column_info['categorical_columns']
-            json_columns = column_info['json_columns']
-        else:
-            # Use default schema for backward compatibility
-            required_columns = [
-                'search_id', 'num_planet', 'disposition', 'ror', 'stellar_mass',
-                'ss_gravity', 'period', 'duration', 'transit_epoch', 'global_view', 'local_view'
-            ]
-            numeric_columns = ['search_id', 'num_planet', 'ror', 'stellar_mass', 'ss_gravity', 
-                              'period', 'duration', 'transit_epoch', 'global_view', 'local_view']
-            categorical_columns = ['disposition']
-            json_columns = []
-        
-        # Check if all required columns are mapped
-        mapped_columns = set(column_mapping.keys())
-        missing_columns = set(required_columns) - mapped_columns
-        
-        if missing_columns:
-            return {
-                "error": f"Missing the following columns in mapping: {', '.join(missing_columns)}"
-            }, 400
-        
-        # Check if mapped CSV columns exist in the dataframe
-        csv_columns = set(df.columns)
-        mapped_csv_columns = set(column_mapping.values())
-        missing_csv_columns = mapped_csv_columns - csv_columns
-        
-        if missing_csv_columns:
-            return {
-                "error": f"The following columns do not exist in CSV: {', '.join(missing_csv_columns)}"
-            }, 400
-        
-        # Rename columns according to mapping
-        df_mapped = df.rename(columns={v: k for k, v in column_mapping.items()})
-        
-        # Select only the required columns for the model
-        features_df = df_mapped[required_columns].copy()
-        
-        # Handle missing values based on data types
-        for col in numeric_columns:
-            if col in features_df.columns:
-                features_df[col] = pd.to_numeric(features_df[col], errors='coerce').fillna(0)
-        
-        for col in categorical_columns:
-            if col in features_df.columns:
-                features_df[col] = features_df[col].astype(str).fillna('unknown')
+        with stage('decode'):
+            csv_buffer = io.StringIO(csv_content.decode('utf-8'))
+            df = pd.read_csv(csv_buffer, **plan.read_options())
         
-        for col in json_columns:
-            if col in features_df.columns:
-                # For JSON columns, try to parse or convert to string
-                try:
-                    features_df[col] = features_df[col].apply(
-                        lambda x: json.loads(x) if isinstance(x, str) and x.startswith('{') else x
-                    )
-                except:
-                    features_df[col] = features_df[col].astype(str).fillna('{}')
-        
-        # Make predictions for each row
-        predictions = []
-        for index, row in features_df.iterrows():
-            try:
-                # Convert row to list for prediction, handling JSON columns
-                features = []
-                for col in required_columns:
-                    value = row[col]
-                    if col in json_columns and isinstance(value, (dict, list)):
-                        # For JSON columns, convert to string representation
-                        features.append(json.dumps(value))
-                    else:
-                        features.append(value)
-                
-                # Choose prediction method based on model type
-                if model_type == 'deep':
-                    prediction = predictor.deep_predict(features)
-                else:
-                    prediction = predictor.fast_predict(features)
-                
-                predictions.append(prediction)
-            except Exception as e:
-                # If prediction fails for a row, add None
-                predictions.append(None)
+        features_df, error = plan.select(df)
+        if error:
+            return error
         
         # Add predictions to the original dataframe with appropriate column name
         prediction_column = 'ai_deep_prediction' if model_type == 'deep' else 'ai_prediction'
-        df[prediction_column] = predictions
+        df[prediction_column] = score_features(features_df, model_type)
         
         # Create result CSV
-        result_csv_buffer = io.StringIO()
-        df.to_csv(result_csv_buffer, index=False)
-        result_csv_bytes = result_csv_buffer.getvalue().encode('utf-8')
+        with stage('serialize'):
+            result_csv_buffer = io.StringIO()
+            df.to_csv(result_csv_buffer, index=False)
+            result_csv_bytes = result_csv_buffer.getvalue().encode('utf-8')
         
         return result_csv_bytes, 200
         
@@ -204,6 +346,43 @@ def process_csv_with_predictions(csv_content, column_mapping, schema=None, model
         }, 500
 
 
+def summarize_predictions(predictions, schema=None, model_type='fast'):
+    """
+    Build the summary statistics dictionary for an array of predictions
+
+    Args:
+        predictions: Float array of predictions, NaN for rows that failed
+        schema: Schema used for the request, if any
+        model_type: 'fast' or 'deep' - which model produced the predictions
+
+    Returns:
+        dict: Summary statistics
+    """
+    valid_predictions = predictions[~np.isnan(predictions)]
+    successful_predictions = int(valid_predictions.size)
+    has_valid = successful_predictions > 0
+
+    summary = {
+        "total_rows": len(predictions),
+        "successful_predictions": successful_predictions,
+        "failed_predictions": len(predictions) - successful_predictions,
+        "prediction_stats": {
+            "mean": float(valid_predictions.mean()) if has_valid else None,
+            "std": float(valid_predictions.std()) if has_valid else None,
+            "min": float(valid_predictions.min()) if has_valid else None,
+            "max": float(valid_predictions.max()) if has_valid else None,
+        },
+        "sample_predictions": valid_predictions[:5].tolist(),  # First 5 predictions as sample
+        "schema_used": "custom" if schema else "default"
+    }
+    
+    # Add model type for deep learning
+    if model_type == 'deep':
+        summary["model_type"] = "deep_learning"
+    
+    return summary
+
+
 def get_prediction_summary(csv_content, column_mapping, schema=None, model_type='fast'):
     """
     Get summary statistics of predictions without returning the full CSV
@@ -218,116 +397,225 @@ def get_prediction_summary(csv_content, column_mapping, schema=None, model_type=
         tuple: (summary_dict, status_code)
     """
     try:
-        # Read CSV from bytes
-        csv_buffer = io.StringIO(csv_content.decode('utf-8'))
-        df = pd.read_csv(csv_buffer)
-        
-        # Determine required columns based on schema or use default
-        if schema:
-            # Validate schema
-            is_valid, error_msg = validate_schema(schema)
-            if not is_valid:
-                return {"error": f"Invalid schema: {error_msg}"}, 400
-            
-            # Extract column information from schema
-            column_info = extract_column_info(schema)
-            required_columns = column_info['required_columns']
-            numeric_columns = column_info['numeric_columns']
-            categorical_columns = column_info['categorical_columns']
-            json_columns = column_info['json_columns']
-        else:
-            # Use default schema for backward compatibility
-            required_columns = [
-                'search_id', 'num_planet', 'disposition', 'ror', 'stellar_mass',
-                'ss_gravity', 'period', 'duration', 'transit_epoch', 'global_view', 'local_view'
-            ]
-            numeric_columns = ['search_id', 'num_planet', 'ror', 'stellar_mass', 'ss_gravity', 
-                              'period', 'duration', 'transit_epoch', 'global_view', 'local_view']
-            categorical_columns = ['disposition']
-            json_columns = []
-        
-        # Validate and process
-        mapped_columns = set(column_mapping.keys())
-        missing_columns = set(required_columns) - mapped_columns
-        
-        if missing_columns:
-            return {
-                "error": f"Missing the following columns in mapping: {', '.join(missing_columns)}"
-            }, 400
-        
-        # Rename columns and process
-        df_mapped = df.rename(columns={v: k for k, v in column_mapping.items()})
-        features_df = df_mapped[required_columns].copy()
-        
-        # Handle missing values based on data types
-        for col in numeric_columns:
-            if col in features_df.columns:
-                features_df[col] = pd.to_numeric(features_df[col], errors='coerce').fillna(0)
-        
-        for col in categorical_columns:
-            if col in features_df.columns:
-                features_df[col] = features_df[col].astype(str).fillna('unknown')
-        
-        for col in json_columns:
-            if col in features_df.columns:
-                try:
-                    features_df[col] = features_df[col].apply(
-                        lambda x: json.loads(x) if isinstance(x, str) and x.startswith('{') else x
-                    )
-                except:
-                    features_df[col] = features_df[col].astype(str).fillna('{}')
-        
-        # Make predictions
-        predictions = []
-        successful_predictions = 0
-        
-        for index, row in features_df.iterrows():
-            try:
-                # Convert row to list for prediction, handling JSON columns
-                features = []
-                for col in required_columns:
-                    value = row[col]
-                    if col in json_columns and isinstance(value, (dict, list)):
-                        features.append(json.dumps(value))
-                    else:
-                        features.append(value)
-                
-                # Choose prediction method based on model type
-                if model_type == 'deep':
-                    prediction = predictor.deep_predict(features)
-                else:
-                    prediction = predictor.fast_predict(features)
-                
-                predictions.append(prediction)
-                if prediction is not None:
-                    successful_predictions += 1
-            except Exception as e:
-                predictions.append(None)
-        
-        # Calculate statistics
-        valid_predictions = [p for p in predictions if p is not None]
-        
-        summary = {
-            "total_rows": len(df),
-            "successful_predictions": successful_predictions,
-            "failed_predictions": len(df) - successful_predictions,
-            "prediction_stats": {
-                "mean": float(np.mean(valid_predictions)) if valid_predictions else None,
-                "std": float(np.std(valid_predictions)) if valid_predictions else None,
-                "min": float(np.min(valid_predictions)) if valid_predictions else None,
-                "max": float(np.max(valid_predictions)) if valid_predictions else None,
-            },
-            "sample_predictions": valid_predictions[:5],  # First 5 predictions as sample
-            "schema_used": "custom" if schema else "default"
-        }
+        plan, error = get_column_plan(column_mapping, schema, model_type)
+        if error:
+            return error
+
+        # Read CSV from bytes, only the mapped columns
+        with stage('decode'):
+            csv_buffer = io.StringIO(csv_content.decode('utf-8'))
+            df = pd.read_csv(csv_buffer, **plan.read_options(all_columns=False))
         
-        # Add model type for deep learning
-        if model_type == 'deep':
-            summary["model_type"] = "deep_learning"
+        features_df, error = plan.select(df)
+        if error:
+            return error
         
-        return summary, 200
+        predictions = score_features(features_df, model_type)
+        return summarize_predictions(predictions, schema, model_type), 200
         
     except Exception as e:
         return {
             "error": f"Error generating summary: {str(e)}"
         }, 500
+
+
+class _RawStream(io.RawIOBase):
+    """
+    Raw binary stream over an object that only has read(size), such as
+    gunicorn's request body, so it can be buffered and decoded by io
+    """
+
+    def __init__(self, stream):
+        self._stream = stream
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self._stream.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+
+def text_stream(csv_stream):
+    """
+    Decode a binary CSV stream as UTF-8 text
+    """
+    if not isinstance(csv_stream, io.IOBase):
+        csv_stream = io.BufferedReader(_RawStream(csv_stream))
+    return io.TextIOWrapper(csv_stream, encoding='utf-8')
+
+
+def iter_scored_chunks(csv_stream, column_mapping, schema=None, model_type='fast', chunk_size=DEFAULT_CHUNK_SIZE,
+                       all_columns=True):
+    """
+    Read a CSV stream in fixed-size row chunks and score each chunk
+
+    Only one chunk is held in memory at a time, so peak memory depends on
+    chunk_size and not on the size of the upload. The mapping is validated
+    against the first chunk before any chunk is yielded.
+
+    Args:
+        csv_stream: Binary file-like object with the CSV content
+        column_mapping: Dictionary mapping CSV columns to expected model features
+        schema: Optional schema definition for flexible column handling
+        model_type: 'fast' or 'deep' - which model to use for predictions
+        chunk_size: Number of rows per chunk
+        all_columns: Keep every CSV column in the yielded chunks; when False
+            only the mapped columns are parsed
+
+    Returns:
+        tuple: (chunk_iterator, status_code) or (error_dict, status_code).
+        The iterator yields (chunk_df, predictions) pairs.
+    """
+    plan, error = get_column_plan(column_mapping, schema, model_type)
+    if error:
+        return error
+
+    # Streamed chunks are read after the request handler returns
+    endpoint = current_endpoint.get()
+    try:
+        with stage('decode', endpoint=endpoint):
+            reader = pd.read_csv(text_stream(csv_stream), chunksize=chunk_size, **plan.read_options(all_columns))
+            first_chunk = next(reader)
+    except (StopIteration, pd.errors.EmptyDataError):
+        return {"error": "CSV file is empty"}, 400
+    except (pd.errors.ParserError, UnicodeDecodeError) as e:
+        return {"error": f"Invalid CSV file: {str(e)}"}, 400
+
+    _, error = plan.select(first_chunk)
+    if error:
+        return error
+
+    def read_chunks():
+        yield first_chunk
+        while True:
+            with stage('decode', endpoint=endpoint):
+                chunk = next(reader, None)
+            if chunk is None:
+                return
+            yield chunk
+
+    def scored_chunks():
+        for chunk in read_chunks():
+            features_df, _ = plan.select(chunk)
+            yield chunk, score_features(features_df, model_type, endpoint)
+
+    def pooled_chunks():
+        # Each chunk goes to the pool as soon as it is parsed; up to
+        # max_in_flight() are scored while the next ones are read. The
+        # inference stage then measures the wait for a chunk's result.
+        pending = deque()
+
+        def collect():
+            chunk, valid_mask, futures = pending.popleft()
+            with stage('inference', model_type, endpoint):
+                scores = gather(futures) if futures else []
+            return chunk, fill_predictions(valid_mask, scores, model_type, endpoint)
+
+        try:
+            for chunk in read_chunks():
+                features_df, _ = plan.select(chunk)
+                inputs, valid_mask = coerce_features(features_df, model_type, endpoint)
+                futures = submit_rows(inputs, model_type) if valid_mask.any() else []
+                pending.append((chunk, valid_mask, futures))
+                if len(pending) >= max_in_flight():
+                    yield collect()
+            while pending:
+                yield collect()
+        finally:
+            # Stream abandoned or failed: drop the blocks nobody will read
+            for _, _, futures in pending:
+                for future in futures:
+                    future.cancel()
+
+    return (pooled_chunks() if pool_enabled() else scored_chunks()), 200
+
+
+def stream_csv_with_predictions(csv_stream, column_mapping, schema=None, model_type='fast', chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Streaming version of process_csv_with_predictions
+
+    The header, the column mapping and the first chunk (read and scored) are
+    checked before this returns, so those errors still get a JSON error
+    response. Once the 200 response has started, a failure in a later chunk
+    can no longer change the status: the generator then writes a last line
+    starting with STREAM_ERROR_MARKER and raises, so the server closes the
+    connection without finishing the chunked body. Clients must treat a body
+    that ends with that line, or a truncated transfer, as failed.
+
+    Args:
+        csv_stream: Binary file-like object with the CSV content
+        column_mapping: Dictionary mapping CSV columns to expected model features
+        schema: Optional schema definition for flexible column handling
+        model_type: 'fast' or 'deep' - which model to use for predictions
+        chunk_size: Number of rows per chunk
+
+    Returns:
+        tuple: (csv_bytes_generator, status_code) or (error_dict, status_code)
+    """
+    try:
+        chunks, status_code = iter_scored_chunks(csv_stream, column_mapping, schema, model_type, chunk_size)
+        if status_code != 200:
+            return chunks, status_code
+        first_chunk = next(chunks)
+    except Exception as e:
+        return {
+            "error": f"Error processing CSV: {str(e)}"
+        }, 500
+
+    prediction_column = 'ai_deep_prediction' if model_type == 'deep' else 'ai_prediction'
+
+    endpoint = current_endpoint.get()
+
+    def generate():
+        header = True
+        rows_sent = 0
+        try:
+            for chunk, predictions in itertools.chain([first_chunk], chunks):
+                chunk[prediction_column] = predictions
+                with stage('serialize', endpoint=endpoint):
+                    data = chunk.to_csv(index=False, header=header).encode('utf-8')
+                yield data
+                header = False
+                rows_sent += len(chunk)
+        except Exception as e:
+            logger.exception("CSV stream failed after %d rows", rows_sent)
+            message = ' '.join(str(e).split())
+            yield f"{STREAM_ERROR_MARKER}after {rows_sent} rows: {message}\n".encode('utf-8')
+            raise
+
+    return generate(), 200
+
+
+def summarize_csv_stream(csv_stream, column_mapping, schema=None, model_type='fast', chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Streaming version of get_prediction_summary
+
+    Only the mapped columns are parsed and only the prediction column is
+    kept across chunks.
+
+    Args:
+        csv_stream: Binary file-like object with the CSV content
+        column_mapping: Dictionary mapping CSV columns to expected model features
+        schema: Optional schema definition for flexible column handling
+        model_type: 'fast' or 'deep' - which model to use for predictions
+        chunk_size: Number of rows per chunk
+
+    Returns:
+        tuple: (summary_dict, status_code)
+    """
+    try:
+        chunks, status_code = iter_scored_chunks(
+            csv_stream, column_mapping, schema, model_type, chunk_size, all_columns=False
+        )
+        if status_code != 200:
+            return chunks, status_code
+
+        predictions = np.concatenate([chunk_predictions for _, chunk_predictions in chunks])
+        return summarize_predictions(predictions, schema, model_type), 200
+
+    except Exception as e:
+        return {
+            "error": f"Error generating summary: {str(e)}"
+        }, 500
@@ -0,0 +1,3 @@
+"""
+Micro-benchmarks for the KINAI Exoplanets API inference paths
+"""
@@ -0,0 +1,325 @@
+"""
+Benchmark runner for the KINAI Exoplanets API
+
+Times the inference hot paths (Predict, CSV services, view parsing and the
+Flask routes through the test client) on synthetic inputs derived from
+kepler_tess_dataset.csv. Runs offline on CPU; when deep_model.h5 or
+TensorFlow is not available, the deep model is replaced by a stub so the
+code around it can still be measured.
+
+Usage:
+    python -m benchmarks.run --save benchmarks/baseline.json
+    python -m benchmarks.run --compare benchmarks/baseline.json --threshold 0.2
+    python -m benchmarks.run --filter csv --quick
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import warnings
+
+# Benchmarks measure the models, not the prediction cache
+os.environ['PREDICTION_CACHE_SIZE'] = '0'
+os.environ.setdefault('MODEL_WARMUP', '')
+
+import numpy as np
+import pandas as pd
+
+# The models are fitted with feature names; arrays are passed on purpose
+warnings.filterwarnings('ignore', message='X does not have valid feature names')
+
+from classes.features import FAST_COLUMNS, GLOBAL_VIEW_SIZE, LOCAL_VIEW_SIZE, build_deep_inputs, parse_view
+from classes.prediction import predictor
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_DATASET = os.path.join(
+    BASE_DIR, '..', 'kinai-machine-learning', 'data', 'koi_tess_tabular_dataset', 'kepler_tess_dataset.csv'
+)
+
+BATCH_SIZES = (1, 10, 100, 1000, 10000)
+QUICK_BATCH_SIZES = (1, 100, 1000)
+CSV_ROWS = (1000, 10000)
+QUICK_CSV_ROWS = (1000,)
+
+# Minimum measuring time and repeats per case
+MIN_TIME = 0.5
+MIN_REPEATS = 5
+MAX_REPEATS = 1000
+
+
+class StubDeepModel:
+    """
+    Stand-in for the Keras model: same inputs and output shape, cheap math
+    """
+
+    def predict(self, inputs, batch_size=None, verbose=0):
+        global_views = np.asarray(inputs[0])
+        scalars = np.asarray(inputs[2])
+        score = global_views.reshape(len(global_views), -1).mean(axis=1) + scalars.sum(axis=1)
+        return (1.0 / (1.0 + np.exp(-score))).astype(np.float32).reshape(-1, 1)
+
+
+def setup_deep_model():
+    """
+    Load the real deep model if possible, else install StubDeepModel
+
+    Returns:
+        str: 'keras' or 'stub'
+    """
+    if os.path.exists(predictor.deep_model_path):
+        try:
+            predictor.deep_model
+            return 'keras'
+        except ImportError:
+            pass
+    predictor._deep_model = StubDeepModel()
+    predictor.deep_model_id = 'stub'
+    return 'stub'
+
+
+# ===========================
+# Synthetic data
+# ===========================
+def load_features(dataset_path, rng):
+    """
+    Tabular rows of the KOI dataset, or random rows if it is not available
+    """
+    if os.path.exists(dataset_path):
+        df = pd.read_csv(dataset_path).drop(columns=['Unnamed: 0'], errors='ignore')
+        return df.dropna(subset=FAST_COLUMNS).reset_index(drop=True)
+
+    n_rows = 2000
+    return pd.DataFrame({
+        'search_id': [f"KIC {i}" for i in range(n_rows)],
+        'num_planet': 1,
+        'disposition': rng.integers(0, 2, n_rows),
+        'ror': rng.uniform(0.005, 0.3, n_rows),
+        'stellar_mass': rng.uniform(0.5, 1.5, n_rows),
+        'ss_gravity': rng.uniform(3.5, 4.8, n_rows),
+        'period': rng.uniform(0.5, 400, n_rows),
+        'duration': rng.uniform(1, 12, n_rows),
+        'transit_epoch': rng.uniform(2454950, 2455300, n_rows),
+    })
+
+
+def sample_rows(features, n_rows, rng, with_views=False):
+    """
+    n_rows rows sampled with replacement, optionally with JSON view columns
+    """
+    df = features.iloc[rng.integers(0, len(features), n_rows)].reset_index(drop=True)
+    if with_views:
+        global_views = np.round(rng.normal(0, 0.3, (n_rows, GLOBAL_VIEW_SIZE)), 4)
+        local_views = np.round(rng.normal(0, 0.3, (n_rows, LOCAL_VIEW_SIZE)), 4)
+        df['global_view'] = [json.dumps(view.tolist()) for view in global_views]
+        df['local_view'] = [json.dumps(view.tolist()) for view in local_views]
+    return df
+
+
+# ===========================
+# Cases
+# ===========================
+def build_cases(features, rng, quick=False):
+    """
+    Returns:
+        list: (name, rows, callable) tuples
+    """
+    from app.services.unified_csv_service import (
+        DEFAULT_REQUIRED_COLUMNS,
+        get_prediction_summary,
+        process_csv_with_predictions,
+    )
+    from main import create_app
+
+    batch_sizes = QUICK_BATCH_SIZES if quick else BATCH_SIZES
+    csv_rows = QUICK_CSV_ROWS if quick else CSV_ROWS
+    mapping = {column: column for column in DEFAULT_REQUIRED_COLUMNS}
+    cases = []
+
+    # Predict
+    for n_rows in batch_sizes:
+        X = sample_rows(features, n_rows, rng)[FAST_COLUMNS].to_numpy(dtype=float)
+        cases.append((f"predict.fast[{n_rows}]", n_rows, lambda X=X: predictor.fast_predict(X)))
+
+    for n_rows in batch_sizes:
+        inputs, _, _ = build_deep_inputs(sample_rows(features, n_rows, rng, with_views=True))
+        cases.append((f"predict.deep[{n_rows}]", n_rows, lambda inputs=inputs: predictor.deep_predict_batch(inputs)))
+
+    view = [rng.normal(size=GLOBAL_VIEW_SIZE), rng.normal(size=LOCAL_VIEW_SIZE), rng.normal(size=3)]
+    cases.append(("predict.deep_single", 1, lambda: predictor.deep_predict(view)))
+
+    # View parsing
+    views_df = sample_rows(features, 1000, rng, with_views=True)
+    global_cell = views_df['global_view'][0]
+    cases.append(("parse.view", 1, lambda: parse_view(global_cell, GLOBAL_VIEW_SIZE)))
+    cases.append(("parse.build_deep_inputs[1000]", 1000, lambda: build_deep_inputs(views_df)))
+
+    # CSV services
+    for n_rows in csv_rows:
+        csv_bytes = sample_rows(features, n_rows, rng, with_views=True).to_csv(index=False).encode('utf-8')
+        cases.append((f"csv.process_fast[{n_rows}]", n_rows,
+                      lambda b=csv_bytes: process_csv_with_predictions(b, mapping)))
+        cases.append((f"csv.summary_fast[{n_rows}]", n_rows,
+                      lambda b=csv_bytes: get_prediction_summary(b, mapping)))
+        cases.append((f"csv.summary_deep[{n_rows}]", n_rows,
+                      lambda b=csv_bytes: get_prediction_summary(b, mapping, model_type='deep')))
+
+    # Flask routes
+    client = create_app().test_client()
+    for n_rows in (1, 1000):
+        df = sample_rows(features, n_rows, rng)
+        payload = {"csvData": {"headers": list(df.columns), "rows": df.astype(object).values.tolist()}}
+        cases.append((f"route.fast_predict[{n_rows}]", n_rows,
+                      lambda p=payload: _post(client, '/fast-predict', json=p)))
+
+    candidate = sample_rows(features, 1, rng).iloc[0].to_dict()
+    candidate = {key: (value.item() if hasattr(value, 'item') else value) for key, value in candidate.items()}
+    cases.append(("route.fast_predict_candidate", 1,
+                  lambda: _post(client, '/fast-predict/candidate', json=candidate)))
+
+    df = sample_rows(features, 100, rng, with_views=True)
+    payload = {"csvData": {"headers": list(df.columns), "rows": df.astype(object).values.tolist()}}
+    cases.append(("route.deep_predict[100]", 100, lambda: _post(client, '/deep-predict', json=payload)))
+
+    csv_bytes = sample_rows(features, csv_rows[-1], rng, with_views=True).to_csv(index=False).encode('utf-8')
+    query = {"columnMapping": json.dumps(mapping)}
+    cases.append((f"route.csv_summary[{csv_rows[-1]}]", csv_rows[-1],
+                  lambda: _post(client, '/csv/summary', query_string=query, data=csv_bytes,
+                                content_type='text/csv')))
+    return cases
+
+
+def _post(client, path, **kwargs):
+    # Routes may print debug output; keep it out of the benchmark report
+    with contextlib.redirect_stdout(io.StringIO()):
+        response = client.post(path, **kwargs)
+    if response.status_code != 200:
+        raise RuntimeError(f"{path} returned {response.status_code}: {response.get_data(as_text=True)[:200]}")
+    return response
+
+
+# ===========================
+# Timing and reports
+# ===========================
+def measure(fn, min_time=MIN_TIME, min_repeats=MIN_REPEATS, max_repeats=MAX_REPEATS):
+    """
+    Call fn repeatedly (after one warm-up call) and return per-call timings
+
+    Returns:
+        dict: median_s, p95_s, min_s and repeats
+    """
+    fn()
+    timings = []
+    started = time.perf_counter()
+    while len(timings) < max_repeats and (len(timings) < min_repeats or time.perf_counter() - started < min_time):
+        call_start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - call_start)
+
+    return {
+        "median_s": statistics.median(timings),
+        "p95_s": float(np.percentile(timings, 95)),
+        "min_s": min(timings),
+        "repeats": len(timings),
+    }
+
+
+def run(cases, name_filter=None, min_time=MIN_TIME):
+    results = {}
+    for name, n_rows, fn in cases:
+        if name_filter and name_filter not in name:
+            continue
+        timing = measure(fn, min_time=min_time)
+        timing["rows"] = n_rows
+        timing["rows_per_s"] = n_rows / timing["median_s"] if timing["median_s"] > 0 else None
+        results[name] = timing
+        print(f"{name:<36} {timing['median_s'] * 1000:10.3f} ms  p95 {timing['p95_s'] * 1000:10.3f} ms  "
+              f"({timing['repeats']} runs)")
+    return results
+
+
+def environment_info(deep_model):
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "deep_model": deep_model,
+        "fast_model_engine": predictor.fast_engine,
+        "deep_model_engine": predictor.deep_engine,
+        "timestamp": time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+
+
+def compare(results, baseline, threshold):
+    """
+    Print the change of each case against a baseline
+
+    A case regresses when its median time grows by more than threshold
+    (0.2 = 20%).
+
+    Returns:
+        list: Names of the regressed cases
+    """
+    regressions = []
+    print(f"\n{'case':<36} {'baseline ms':>12} {'current ms':>12} {'change':>8}")
+    for name, current in results.items():
+        previous = baseline["results"].get(name)
+        if previous is None:
+            print(f"{name:<36} {'-':>12} {current['median_s'] * 1000:12.3f} {'new':>8}")
+            continue
+        change = current["median_s"] / previous["median_s"] - 1.0
+        flag = ''
+        if change > threshold:
+            flag = '  REGRESSION'
+            regressions.append(name)
+        print(f"{name:<36} {previous['median_s'] * 1000:12.3f} {current['median_s'] * 1000:12.3f} "
+              f"{change:+8.1%}{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run the KINAI inference benchmarks')
+    parser.add_argument('--dataset', default=DEFAULT_DATASET, help='kepler_tess_dataset.csv used to build inputs')
+    parser.add_argument('--filter', help='Only run cases whose name contains this text')
+    parser.add_argument('--quick', action='store_true', help='Fewer sizes, for a fast check')
+    parser.add_argument('--min-time', type=float, default=MIN_TIME, help='Seconds spent measuring each case')
+    parser.add_argument('--save', help='Write the results to this JSON file')
+    parser.add_argument('--compare', help='Baseline JSON file to compare against')
+    parser.add_argument('--threshold', type=float, default=0.2, help='Allowed slowdown before flagging (0.2 = 20%%)')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(args.seed)
+    deep_model = setup_deep_model()
+    features = load_features(args.dataset, rng)
+    print(f"Deep model: {deep_model}, fast engine: {predictor.fast_engine}, rows available: {len(features)}\n")
+
+    results = run(build_cases(features, rng, quick=args.quick), args.filter, args.min_time)
+    report = {"environment": environment_info(deep_model), "results": results}
+
+    if args.save:
+        with open(args.save, 'w') as output:
+            json.dump(report, output, indent=2)
+        print(f"\nSaved {len(results)} results to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)
+        if baseline["environment"].get("deep_model") != deep_model:
+            print(f"\nWarning: baseline used the '{baseline['environment'].get('deep_model')}' deep model")
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) above {args.threshold:.0%}: {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,182 @@
+"""
+Índice precalculado de predicciones del catálogo KOI/TOI
+
+Un comando por lotes puntúa todo el catálogo (kepler_tess_dataset.csv) con
+ambos modelos y guarda un archivo SQLite con una fila por (search_id,
+num_planet): las características del modelo rápido y los puntajes fast y
+deep. La clave primaria es un B-tree (tabla WITHOUT ROWID), así que una
+consulta es una sola búsqueda en un archivo que queda en la caché de páginas
+del sistema y se comparte entre workers.
+
+El índice guarda la huella (hash del contenido) de cada modelo; si el modelo
+cargado cambió, su puntaje guardado se ignora y quien consulta recalcula en
+vivo (el fast desde las características guardadas).
+
+Uso:
+    python -m classes.catalog_index kepler_tess_dataset.csv ai_models/catalog_index.sqlite --store light_curves_store/
+"""
+import argparse
+import os
+import sqlite3
+import threading
+import time
+import numpy as np
+import pandas as pd
+
+from classes.features import FAST_COLUMNS
+from classes.prediction import model_digest
+
+KEY_COLUMNS = ['search_id', 'num_planet']
+
+# Filas por lote al puntuar con el modelo profundo
+DEFAULT_CHUNK_SIZE = 1024
+
+
+def build_index(csv_path, index_path, predictor, store_path=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Puntúa el catálogo y escribe el índice (reemplazo atómico del archivo)
+
+    Args:
+        csv_path: CSV tabular con KEY_COLUMNS y FAST_COLUMNS
+        index_path: Archivo SQLite de salida
+        predictor: Instancia de classes.prediction.Predict
+        store_path: Store de curvas de luz (classes.light_curve_store) para
+            los puntajes deep; sin él la columna deep queda vacía
+        chunk_size: Filas por lote del modelo profundo
+
+    Returns:
+        dict: Filas escritas y filas con puntaje fast y deep
+    """
+    catalog = pd.read_csv(csv_path, usecols=KEY_COLUMNS + FAST_COLUMNS)
+    catalog = catalog.drop_duplicates(KEY_COLUMNS, keep='last').reset_index(drop=True)
+
+    features = catalog[FAST_COLUMNS].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)
+    valid = np.isfinite(features).all(axis=1)
+    fast = np.full(len(catalog), np.nan)
+    if valid.any():
+        fast[valid] = predictor.fast_predict(features[valid])
+
+    deep = np.full(len(catalog), np.nan)
+    deep_digest = None
+    if store_path:
+        from classes.light_curve_store import open_store
+
+        store = open_store(store_path)
+        positions = pd.MultiIndex.from_frame(catalog[KEY_COLUMNS]).get_indexer(
+            pd.MultiIndex.from_frame(store.catalog[KEY_COLUMNS])
+        )
+        for start in range(0, len(store), chunk_size):
+            rows = slice(start, start + chunk_size)
+            scores = predictor.deep_predict_batch(store.deep_inputs(rows))
+            found = positions[rows] >= 0
+            deep[positions[rows][found]] = scores[found]
+        deep_digest = model_digest(predictor.deep_model_path)
+
+    tmp_path = index_path + '.tmp'
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    connection = sqlite3.connect(tmp_path)
+    try:
+        feature_columns = ', '.join(f'{column} REAL' for column in FAST_COLUMNS)
+        connection.execute(
+            f"CREATE TABLE predictions (search_id TEXT NOT NULL, num_planet INTEGER NOT NULL, "
+            f"{feature_columns}, fast REAL, deep REAL, PRIMARY KEY (search_id, num_planet)) WITHOUT ROWID"
+        )
+        connection.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)")
+
+        rows = zip(
+            catalog['search_id'].astype(str), catalog['num_planet'].astype(int).tolist(),
+            *(features[:, i].tolist() for i in range(len(FAST_COLUMNS))),
+            fast.tolist(), deep.tolist(),
+        )
+        placeholders = ', '.join('?' * (len(KEY_COLUMNS) + len(FAST_COLUMNS) + 2))
+        connection.executemany(
+            f"INSERT INTO predictions VALUES ({placeholders})",
+            ([None if value != value else value for value in row] for row in rows),
+        )
+        connection.executemany("INSERT INTO meta VALUES (?, ?)", [
+            ('fast_model', model_digest(predictor.fast_model_path)),
+            ('deep_model', deep_digest),
+            ('built_at', time.strftime('%Y-%m-%dT%H:%M:%S')),
+            ('source', os.path.basename(csv_path)),
+        ])
+        connection.commit()
+    finally:
+        connection.close()
+    os.replace(tmp_path, index_path)
+
+    return {
+        "rows": len(catalog),
+        "fast_scores": int(np.isfinite(fast).sum()),
+        "deep_scores": int(np.isfinite(deep).sum()),
+    }
+
+
+class CatalogIndex:
+    """
+    Índice abierto en solo lectura; una conexión por hilo y por proceso
+
+    Si el archivo se reemplaza (build_index de nuevo) las conexiones se
+    reabren en la siguiente consulta.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def _connection(self):
+        stat = os.stat(self.path)
+        version = (os.getpid(), stat.st_ino, stat.st_mtime_ns)
+        local = self._local
+        if getattr(local, 'version', None) != version:
+            if getattr(local, 'connection', None) is not None:
+                local.connection.close()
+            local.connection = sqlite3.connect(f"file:{self.path}?mode=ro&immutable=1", uri=True)
+            local.meta = dict(local.connection.execute("SELECT key, value FROM meta"))
+            local.version = version
+        return local.connection, local.meta
+
+    def lookup(self, search_id, num_planet, fast_model_path=None, deep_model_path=None):
+        """
+        Fila guardada de un candidato
+
+        Los puntajes de un modelo cuya huella no coincide con el archivo
+        indicado (el modelo cargado) se devuelven como None.
+
+        Returns:
+            dict: Características, 'fast' y 'deep'; None si el candidato no está
+        """
+        connection, meta = self._connection()
+        row = connection.execute(
+            "SELECT * FROM predictions WHERE search_id = ? AND num_planet = ?", (search_id, int(num_planet))
+        ).fetchone()
+        if row is None:
+            return None
+
+        entry = dict(zip(KEY_COLUMNS + FAST_COLUMNS + ['fast', 'deep'], row))
+        if fast_model_path and meta.get('fast_model') != model_digest(fast_model_path):
+            entry['fast'] = None
+        if deep_model_path and meta.get('deep_model') != model_digest(deep_model_path):
+            entry['deep'] = None
+        return entry
+
+    def meta(self):
+        return dict(self._connection()[1])
+
+
+if __name__ == '__main__':
+    from classes.prediction import predictor
+
+    parser = argparse.ArgumentParser(description='Score the catalog and write the prediction index')
+    parser.add_argument('csv_path', help='Tabular catalog (kepler_tess_dataset.csv)')
+    parser.add_argument('index_path', help='SQLite file to write')
+    parser.add_argument('--store', help='Light-curve store with the views for the deep model scores')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    result = build_index(args.csv_path, args.index_path, predictor, args.store, args.chunk_size)
+    print(f"Indexed {result['rows']} candidates ({result['fast_scores']} fast, "
+          f"{result['deep_scores']} deep scores) in {args.index_path}")
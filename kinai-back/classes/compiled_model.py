@@ -0,0 +1,150 @@
+"""
+Inferencia del modelo profundo con una función compilada de firma fija
+
+model.predict arma un adaptador de datos y un ciclo de predicción en cada
+llamada, lo que domina la latencia con lotes pequeños. CompiledKerasModel
+llama al modelo dentro de un tf.function con firma fija para global_view
+(1001, 1), local_view (101, 1) y scalar_features (3,), y rellena cada lote
+hasta el bucket (tamaño de lote permitido) más cercano, así que la función
+solo ve unas pocas formas y cada una se calienta al cargar el modelo.
+"""
+import os
+import numpy as np
+
+from classes.features import GLOBAL_VIEW_SIZE, LOCAL_VIEW_SIZE, SCALAR_COLUMNS
+
+# Tamaños de lote a los que se rellenan las entradas (DEEP_BATCH_BUCKETS)
+DEFAULT_BUCKETS = (1, 8, 32, 128, 256)
+
+INPUT_SHAPES = ((GLOBAL_VIEW_SIZE, 1), (LOCAL_VIEW_SIZE, 1), (len(SCALAR_COLUMNS),))
+
+
+def parse_buckets(text):
+    """
+    "1,8,32" -> (1, 8, 32)
+    """
+    buckets = sorted({int(value) for value in text.split(',') if value.strip()})
+    if not buckets or buckets[0] < 1:
+        raise ValueError(f"Invalid batch buckets '{text}'")
+    return tuple(buckets)
+
+
+def bucket_for(buckets, n_rows):
+    """
+    Bucket más pequeño de buckets (ordenados) que admite n_rows filas, o el último
+    """
+    index = int(np.searchsorted(buckets, n_rows))
+    return buckets[min(index, len(buckets) - 1)]
+
+
+def bucket_pieces(buckets, n_rows, max_rows):
+    """
+    Trozos (filas, bucket) que cubren n_rows filas con poco relleno
+
+    Cada trozo tiene como máximo max_rows filas. Se rellena hasta el bucket
+    siguiente solo si este es a lo sumo el doble de sus filas; si no, se
+    toma el bucket más grande que cabe entero (39 filas con buckets 1, 8, 32,
+    128 son 32 + 8 con una fila de relleno, no 128).
+    """
+    pieces = []
+    while n_rows > 0:
+        rows = min(n_rows, max_rows)
+        size = bucket_for(buckets, rows)
+        if size > 2 * rows:
+            fitting = [bucket for bucket in buckets if bucket <= rows]
+            if fitting:
+                size = fitting[-1]
+        rows = min(rows, size)
+        pieces.append((rows, size))
+        n_rows -= rows
+    return pieces
+
+
+def pad_rows(batch, size):
+    """
+    Rellena con ceros cada arreglo de batch hasta size filas
+    """
+    n_rows = len(batch[0])
+    if n_rows == size:
+        return batch
+    return [np.concatenate([x, np.zeros((size - n_rows, *x.shape[1:]), dtype=np.float32)]) for x in batch]
+
+
+def configure_threads():
+    """
+    Aplica TF_NUM_INTRAOP_THREADS y TF_NUM_INTEROP_THREADS a TensorFlow
+
+    Debe llamarse antes de ejecutar cualquier operación; si el runtime ya
+    se inicializó, TensorFlow ya tomó esas mismas variables de entorno.
+    """
+    import tensorflow as tf
+
+    intra = os.environ.get('TF_NUM_INTRAOP_THREADS')
+    inter = os.environ.get('TF_NUM_INTEROP_THREADS')
+    try:
+        if intra:
+            tf.config.threading.set_intra_op_parallelism_threads(int(intra))
+        if inter:
+            tf.config.threading.set_inter_op_parallelism_threads(int(inter))
+    except RuntimeError:
+        pass
+
+
+class CompiledKerasModel:
+    """
+    Modelo Keras con predict(inputs, batch_size, verbose) sobre un tf.function
+
+    Args:
+        model: Modelo Keras con entradas [global_view, local_view, scalar_features]
+        buckets: Tamaños de lote permitidos; los lotes mayores que el último
+            se parten en trozos de ese tamaño
+        jit_compile: Compilar con XLA (una compilación por bucket)
+    """
+
+    def __init__(self, model, buckets=DEFAULT_BUCKETS, jit_compile=False):
+        import tensorflow as tf
+
+        self.model = model
+        self.buckets = tuple(sorted(buckets))
+        signature = [
+            tf.TensorSpec((None, *shape), tf.float32, name=name)
+            for shape, name in zip(INPUT_SHAPES, ('global_view', 'local_view', 'scalar_features'))
+        ]
+        self._call = tf.function(
+            lambda global_views, local_views, scalars: model([global_views, local_views, scalars], training=False),
+            input_signature=signature,
+            jit_compile=jit_compile,
+        )
+
+    def bucket_for(self, n_rows):
+        """
+        Bucket más pequeño que admite n_rows filas (el último si ninguno)
+        """
+        return bucket_for(self.buckets, n_rows)
+
+    def _run(self, batch, n_rows, size):
+        return self._call(*pad_rows(batch, size)).numpy()[:n_rows].reshape(-1, 1)
+
+    def predict(self, inputs, batch_size=None, verbose=0):
+        """
+        Predicciones (N, 1) float32
+
+        Los trozos tienen como máximo batch_size filas (redondeado a un
+        bucket) y nunca más que el bucket mayor.
+        """
+        n_rows = len(inputs[0])
+        inputs = [np.asarray(x, dtype=np.float32).reshape(n_rows, *shape) for x, shape in zip(inputs, INPUT_SHAPES)]
+        chunk = self.bucket_for(batch_size or self.buckets[-1])
+        output = np.empty((n_rows, 1), dtype=np.float32)
+        for start in range(0, n_rows, chunk):
+            stop = min(start + chunk, n_rows)
+            output[start:stop] = self._run([x[start:stop] for x in inputs], stop - start, self.bucket_for(stop - start))
+        return output
+
+    def warmup(self):
+        """
+        Ejecuta la función con cada bucket para que ninguna petición pague
+        el trazado o la compilación
+        """
+        for size in self.buckets:
+            self._run([np.zeros((size, *shape), dtype=np.float32) for shape in INPUT_SHAPES], size, size)
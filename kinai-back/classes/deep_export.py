@@ -0,0 +1,271 @@
+"""
+Exportación de variantes float16 e int8 (TensorFlow Lite) del modelo profundo
+
+Cada variante se convierte desde deep_model.h5 con cuantización post-
+entrenamiento (int8 calibrado con vistas del conjunto de entrenamiento) y se
+evalúa contra el modelo float32 en filas que ningún entrenamiento del modelo
+guardado usó. CNN1D.ipynb entrena el mismo modelo dos veces con particiones
+distintas, así que esas filas son las de prueba de ambas; el notebook las
+guarda, junto con el umbral de F1 (best_thr), en deep_model.json al lado del
+.h5. Sin ese archivo se recalculan las dos particiones y el umbral se busca
+como en el notebook, sobre las filas de validación.
+
+Solo se escriben en ai_models las variantes cuya caída de AUC y de F1 está
+dentro de la tolerancia; Predict las carga con DEEP_MODEL_VARIANT.
+
+Uso:
+    python -m classes.deep_export ai_models/deep_model.h5 light_curves_store/ --tolerance 0.01
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+import numpy as np
+from sklearn.metrics import accuracy_score, f1_score, precision_recall_curve, roc_auc_score
+from sklearn.model_selection import train_test_split
+
+from classes.light_curve_store import open_store
+from classes.prediction import DEEP_MODEL_FILES
+from classes.tflite_model import INPUT_NAMES, TFLiteModel
+
+VARIANTS = ('float16', 'int8')
+
+# Particiones (test_size, val_size) de los dos entrenamientos de CNN1D.ipynb:
+# el principal y el re-entrenamiento corto de la última celda
+NOTEBOOK_SPLITS = ((0.15, 0.1765), (0.2, 0.2))
+RANDOM_STATE = 42
+
+CALIBRATION_ROWS = 500
+REPORT_FILE = 'deep_model_variants.json'
+
+
+def split_rows(labels, rows, test_size, val_size, random_state=RANDOM_STATE):
+    """
+    (train_rows, val_rows, test_rows) igual que split_rows de
+    models/light_curve_dataset.py
+    """
+    train_rows, test_rows = train_test_split(rows, test_size=test_size, random_state=random_state,
+                                             stratify=labels[rows])
+    train_rows, val_rows = train_test_split(train_rows, test_size=val_size, random_state=random_state,
+                                            stratify=labels[train_rows])
+    return train_rows, val_rows, test_rows
+
+
+def metadata_path(model_path):
+    """
+    Archivo de metadatos que CNN1D.ipynb guarda junto al modelo
+    """
+    return os.path.splitext(model_path)[0] + '.json'
+
+
+def load_metadata(model_path):
+    path = metadata_path(model_path)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as metadata_file:
+        return json.load(metadata_file)
+
+
+def evaluation_rows(store, metadata):
+    """
+    Filas de calibración, de prueba y de validación (para el umbral)
+
+    Las de prueba no pertenecen a los datos de entrenamiento ni de
+    validación de ninguno de los entrenamientos del notebook; las de
+    validación son las del entrenamiento principal que el segundo tampoco
+    usó para entrenar.
+
+    Returns:
+        tuple: (calibration_rows, test_rows, val_rows)
+    """
+    labels = store.catalog['disposition'].to_numpy()
+    rows = np.flatnonzero(np.isin(labels, (0, 1)))
+    splits = [split_rows(labels, rows, test_size, val_size) for test_size, val_size in NOTEBOOK_SPLITS]
+    calibration_rows, val_rows, _ = splits[0]
+    for other_train_rows, _, _ in splits[1:]:
+        val_rows = np.setdiff1d(val_rows, other_train_rows)
+
+    if 'held_out_rows' in metadata:
+        if metadata.get('store_rows') != len(store):
+            raise ValueError(f"Model metadata was written for a store with {metadata.get('store_rows')} rows, "
+                             f"this one has {len(store)}")
+        test_rows = np.asarray(metadata['held_out_rows'], dtype=int)
+    else:
+        test_rows = splits[0][2]
+        for _, _, other_test_rows in splits[1:]:
+            test_rows = np.intersect1d(test_rows, other_test_rows)
+    return calibration_rows, test_rows, val_rows
+
+
+def f1_threshold(y, scores):
+    """
+    Umbral que maximiza F1 en la curva precisión-recall, como best_thr en CNN1D.ipynb
+    """
+    precision, recall, thresholds = precision_recall_curve(y, scores)
+    f1s = 2 * (precision * recall) / (precision + recall + 1e-12)
+    best = int(np.nanargmax(f1s))
+    return float(thresholds[best]) if best < len(thresholds) else 0.5
+
+
+def rows_inputs(store, rows):
+    """
+    [global_views, local_views, scalars] en float32 de las filas indicadas
+    """
+    rows = np.sort(rows)
+    return [np.asarray(x, dtype=np.float32) for x in store.deep_inputs(rows)], rows
+
+
+def convert(model, variant, calibration_inputs=None):
+    """
+    Convierte un modelo Keras a TFLite
+
+    Args:
+        model: Modelo Keras cargado
+        variant: 'float16' (pesos en float16) o 'int8' (cuantización
+            post-entrenamiento calibrada con calibration_inputs)
+        calibration_inputs: [global_views, local_views, scalars] para int8
+
+    Returns:
+        bytes: Modelo .tflite
+    """
+    import tensorflow as tf
+
+    with tempfile.TemporaryDirectory() as saved_model_dir:
+        # SavedModel con lote dinámico; sus entradas conservan los nombres de las capas Input
+        model.export(saved_model_dir)
+        converter = tf.lite.TFLiteConverter.from_saved_model(saved_model_dir)
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+
+        if variant == 'float16':
+            converter.target_spec.supported_types = [tf.float16]
+        elif variant == 'int8':
+            if calibration_inputs is None:
+                raise ValueError("int8 conversion needs calibration inputs")
+
+            def representative_dataset():
+                for i in range(len(calibration_inputs[0])):
+                    yield {name: x[i:i + 1] for name, x in zip(INPUT_NAMES, calibration_inputs)}
+
+            converter.representative_dataset = representative_dataset
+        else:
+            raise ValueError(f"Unknown variant '{variant}'. Options: {list(VARIANTS)}")
+
+        return converter.convert()
+
+
+def evaluate(model, inputs, y, threshold, batch_size=256):
+    """
+    AUC, F1 y exactitud (con el umbral dado), y milisegundos por fila
+    """
+    start = time.perf_counter()
+    scores = np.asarray(model.predict(inputs, batch_size=batch_size, verbose=0)).reshape(-1)
+    elapsed = time.perf_counter() - start
+    predicted = (scores >= threshold).astype(int)
+    return {
+        "auc": float(roc_auc_score(y, scores)),
+        "f1": float(f1_score(y, predicted, zero_division=0)),
+        "accuracy": float(accuracy_score(y, predicted)),
+        "ms_per_row": 1000.0 * elapsed / len(y),
+    }
+
+
+def export_variants(model_path, store_path, out_dir, variants=VARIANTS, tolerance=0.01,
+                    calibration_rows=CALIBRATION_ROWS, seed=0, threshold=None):
+    """
+    Convierte, evalúa y promueve las variantes del modelo profundo
+
+    Args:
+        model_path: deep_model.h5 (float32)
+        store_path: Store de curvas de luz con el dataset de entrenamiento
+        out_dir: Directorio donde se escriben las variantes promovidas
+        variants: Variantes a probar
+        tolerance: Caída máxima de AUC y de F1 respecto al float32
+        calibration_rows: Filas de entrenamiento usadas para calibrar int8
+        seed: Semilla de la muestra de calibración
+        threshold: Umbral de F1; por defecto el de los metadatos del modelo
+            o, si no hay, el recalculado en las filas de validación
+
+    Returns:
+        dict: Reporte con las métricas de cada modelo y las variantes promovidas
+    """
+    from tensorflow.keras.models import load_model
+
+    store = open_store(store_path)
+    metadata = load_metadata(model_path)
+    calibration_pool, test_rows, val_rows = evaluation_rows(store, metadata)
+    if not len(test_rows):
+        raise ValueError("No held-out rows to evaluate the variants on")
+    test_inputs, test_rows = rows_inputs(store, test_rows)
+    y_test = store.catalog['disposition'].to_numpy()[test_rows].astype(int)
+
+    rng = np.random.default_rng(seed)
+    sample = rng.choice(calibration_pool, size=min(calibration_rows, len(calibration_pool)), replace=False)
+    calibration_inputs, _ = rows_inputs(store, sample)
+
+    model = load_model(model_path)
+    threshold_source = 'argument'
+    if threshold is None and 'threshold' in metadata:
+        threshold, threshold_source = float(metadata['threshold']), 'metadata'
+    elif threshold is None:
+        val_inputs, val_rows = rows_inputs(store, val_rows)
+        y_val = store.catalog['disposition'].to_numpy()[val_rows].astype(int)
+        val_scores = np.asarray(model.predict(val_inputs, batch_size=256, verbose=0)).reshape(-1)
+        threshold, threshold_source = f1_threshold(y_val, val_scores), 'validation'
+
+    baseline = evaluate(model, test_inputs, y_test, threshold)
+    report = {
+        "source": os.path.basename(model_path),
+        "test_rows": len(test_rows),
+        "test_rows_source": 'metadata' if 'held_out_rows' in metadata else 'notebook_splits',
+        "threshold": threshold,
+        "threshold_source": threshold_source,
+        "tolerance": tolerance,
+        "float32": {**baseline, "size_bytes": os.path.getsize(model_path)},
+        "variants": {},
+    }
+
+    os.makedirs(out_dir, exist_ok=True)
+    for variant in variants:
+        tflite_bytes = convert(model, variant, calibration_inputs)
+        tmp_path = os.path.join(out_dir, DEEP_MODEL_FILES[variant] + '.tmp')
+        with open(tmp_path, 'wb') as tflite_file:
+            tflite_file.write(tflite_bytes)
+
+        metrics = evaluate(TFLiteModel(tmp_path), test_inputs, y_test, threshold)
+        promoted = (baseline["auc"] - metrics["auc"] <= tolerance
+                    and baseline["f1"] - metrics["f1"] <= tolerance)
+        if promoted:
+            os.replace(tmp_path, os.path.join(out_dir, DEEP_MODEL_FILES[variant]))
+        else:
+            os.remove(tmp_path)
+        report["variants"][variant] = {**metrics, "size_bytes": len(tflite_bytes), "promoted": promoted}
+
+    with open(os.path.join(out_dir, REPORT_FILE), 'w') as report_file:
+        json.dump(report, report_file, indent=2)
+    return report
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Export float16/int8 TFLite variants of the deep model')
+    parser.add_argument('model_path', help='Float32 Keras model (deep_model.h5)')
+    parser.add_argument('store_path', help='Light-curve store of the training dataset')
+    parser.add_argument('--out-dir', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'ai_models'))
+    parser.add_argument('--variants', nargs='+', choices=VARIANTS, default=list(VARIANTS))
+    parser.add_argument('--tolerance', type=float, default=0.01, help='Maximum AUC and F1 drop')
+    parser.add_argument('--calibration-rows', type=int, default=CALIBRATION_ROWS)
+    parser.add_argument('--threshold', type=float,
+                        help='F1 threshold (default: best_thr from the model metadata, else tuned on validation rows)')
+    args = parser.parse_args()
+
+    report = export_variants(args.model_path, args.store_path, args.out_dir, args.variants,
+                             args.tolerance, args.calibration_rows, threshold=args.threshold)
+    base = report["float32"]
+    print(f"{report['test_rows']} held-out rows ({report['test_rows_source']}), "
+          f"threshold {report['threshold']:.4f} ({report['threshold_source']})")
+    print(f"float32  AUC {base['auc']:.4f}  F1 {base['f1']:.4f}  {base['ms_per_row']:.3f} ms/row  "
+          f"{base['size_bytes'] / 1e6:.1f} MB")
+    for variant, metrics in report["variants"].items():
+        status = 'promoted' if metrics["promoted"] else 'rejected'
+        print(f"{variant:<8} AUC {metrics['auc']:.4f}  F1 {metrics['f1']:.4f}  {metrics['ms_per_row']:.3f} ms/row  "
+              f"{metrics['size_bytes'] / 1e6:.1f} MB  {status}")
@@ -0,0 +1,92 @@
+"""
+Construcción de tensores de entrada para los modelos de KINAI
+"""
+import json
+import numpy as np
+import pandas as pd
+
+# Entradas del modelo profundo (ver models/CNN1D.ipynb)
+GLOBAL_VIEW_SIZE = 1001
+LOCAL_VIEW_SIZE = 101
+SCALAR_COLUMNS = ['ror', 'stellar_mass', 'ss_gravity']
+
+# Entradas del modelo rápido (ver models/RF.ipynb)
+FAST_COLUMNS = ['ror', 'stellar_mass', 'ss_gravity', 'period', 'duration', 'transit_epoch']
+
+
+def parse_view(value, size):
+    """
+    Convierte una celda global_view/local_view en un vector float32
+
+    Args:
+        value: Cadena JSON ("[0.1, ...]"), lista o arreglo con los valores
+        size: Número de valores esperado
+
+    Returns:
+        np.ndarray: Vector de forma (size,)
+
+    Raises:
+        ValueError: Si la celda no contiene exactamente `size` valores finitos
+    """
+    if isinstance(value, str):
+        value = json.loads(value)
+    view = np.asarray(value, dtype=np.float32).ravel()
+    if view.shape[0] != size:
+        raise ValueError(f"expected {size} values, got {view.shape[0]}")
+    if not np.isfinite(view).all():
+        raise ValueError("contains NaN or infinite values")
+    return view
+
+
+def build_deep_inputs(df):
+    """
+    Valida todas las filas de un DataFrame y arma los tensores del modelo profundo
+
+    La validación ocurre antes de la inferencia, de modo que las filas
+    inválidas se reportan individualmente y las válidas se envían juntas
+    al modelo.
+
+    Args:
+        df: DataFrame con las columnas global_view, local_view y SCALAR_COLUMNS
+
+    Returns:
+        tuple: (inputs, valid_mask, errors) donde inputs es una lista
+        [global_views (M, 1001, 1), local_views (M, 101, 1), scalars (M, 3)]
+        con solo las M filas válidas, valid_mask es un arreglo booleano (N,)
+        y errors es una lista de mensajes "Row i: ..."
+    """
+    missing = [col for col in ['global_view', 'local_view'] + SCALAR_COLUMNS if col not in df.columns]
+    if missing:
+        raise ValueError(f"Missing columns for deep model: {', '.join(missing)}")
+
+    n_rows = len(df)
+    global_views = np.empty((n_rows, GLOBAL_VIEW_SIZE), dtype=np.float32)
+    local_views = np.empty((n_rows, LOCAL_VIEW_SIZE), dtype=np.float32)
+    scalars = df[SCALAR_COLUMNS].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=np.float32)
+
+    valid_mask = np.isfinite(scalars).all(axis=1)
+    errors = []
+    for i, (index, global_cell, local_cell) in enumerate(
+        zip(df.index, df['global_view'], df['local_view'])
+    ):
+        if not valid_mask[i]:
+            errors.append(f"Row {index}: non-numeric value in {', '.join(SCALAR_COLUMNS)}")
+            continue
+        try:
+            global_views[i] = parse_view(global_cell, GLOBAL_VIEW_SIZE)
+        except (TypeError, ValueError) as e:
+            valid_mask[i] = False
+            errors.append(f"Row {index}: global_view {e}")
+            continue
+        try:
+            local_views[i] = parse_view(local_cell, LOCAL_VIEW_SIZE)
+        except (TypeError, ValueError) as e:
+            valid_mask[i] = False
+            errors.append(f"Row {index}: local_view {e}")
+
+    inputs = [
+        global_views[valid_mask][..., np.newaxis],
+        local_views[valid_mask][..., np.newaxis],
+        scalars[valid_mask],
+    ]
+    return inputs, valid_mask, errors
@@ -0,0 +1,159 @@
+"""
+Motor de inferencia por arreglos para el RandomForest del modelo rápido
+
+Todos los árboles de un RandomForestClassifier de sklearn se aplanan en
+arreglos contiguos de NumPy (característica, umbral, hijos y probabilidades
+de hoja) y un lote completo se recorre de forma vectorizada: un paso por
+nivel de profundidad para todas las filas y todos los árboles a la vez.
+Las etiquetas son idénticas a las de sklearn y las probabilidades difieren
+solo por el orden de la suma (< 1e-12).
+
+Verificación de paridad contra sklearn (también en tests/test_forest_engine.py):
+    python -m classes.forest_engine ai_models/fast_model.pkl dataset.csv
+"""
+import argparse
+import numpy as np
+
+# Filas evaluadas a la vez (limita la memoria del arreglo filas x árboles)
+DEFAULT_CHUNK_SIZE = 512
+
+
+class CompiledForest:
+    """
+    RandomForestClassifier aplanado en arreglos, con predict/predict_proba
+    """
+
+    def __init__(self, feature, threshold, children, leaf_proba, roots, max_depth, classes,
+                 n_features, feature_names=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.children = children
+        self.leaf_proba = leaf_proba
+        self.roots = roots
+        self.max_depth = max_depth
+        self.classes_ = classes
+        self.feature_names_in_ = feature_names
+        self.n_estimators = len(roots)
+        self.n_features_in_ = n_features
+
+        # sklearn compara x en float32 contra umbrales float64. Redondear cada
+        # umbral hacia abajo al float32 más cercano da el mismo resultado
+        # (x32 <= t  <=>  x32 <= t32) y permite comparar todo en float32
+        threshold32 = threshold.astype(np.float32)
+        rounded_up = threshold32.astype(np.float64) > threshold
+        threshold32[rounded_up] = np.nextafter(threshold32[rounded_up], np.float32(-np.inf))
+        self._threshold32 = threshold32
+        self._children_flat = children.ravel()
+        self._class_proba = [np.ascontiguousarray(leaf_proba[:, k]) for k in range(leaf_proba.shape[1])]
+
+    @classmethod
+    def from_sklearn(cls, forest):
+        """
+        Aplana un RandomForestClassifier entrenado (una sola salida)
+        """
+        features, thresholds, children, leaf_probas, roots = [], [], [], [], []
+        offset = 0
+        for estimator in forest.estimators_:
+            tree = estimator.tree_
+            n_nodes = tree.node_count
+            node_ids = np.arange(n_nodes)
+            is_leaf = tree.children_left == -1
+
+            # Las hojas apuntan a sí mismas, así que el recorrido puede dar
+            # siempre max_depth pasos sin comprobar si ya llegó a una hoja
+            left = np.where(is_leaf, node_ids, tree.children_left) + offset
+            right = np.where(is_leaf, node_ids, tree.children_right) + offset
+
+            # Igual que DecisionTreeClassifier.predict_proba: normalizar value
+            proba = tree.value[:, 0, :].astype(np.float64)
+            normalizer = proba.sum(axis=1, keepdims=True)
+            normalizer[normalizer == 0.0] = 1.0
+
+            features.append(np.where(is_leaf, 0, tree.feature))
+            thresholds.append(np.where(is_leaf, np.inf, tree.threshold))
+            children.append(np.stack([right, left], axis=1))
+            leaf_probas.append(proba / normalizer)
+            roots.append(offset)
+            offset += n_nodes
+
+        return cls(
+            feature=np.ascontiguousarray(np.concatenate(features), dtype=np.intp),
+            threshold=np.ascontiguousarray(np.concatenate(thresholds), dtype=np.float64),
+            children=np.ascontiguousarray(np.concatenate(children), dtype=np.intp),
+            leaf_proba=np.ascontiguousarray(np.concatenate(leaf_probas)),
+            roots=np.asarray(roots, dtype=np.intp),
+            max_depth=max(estimator.tree_.max_depth for estimator in forest.estimators_),
+            classes=forest.classes_,
+            n_features=forest.n_features_in_,
+            feature_names=getattr(forest, 'feature_names_in_', None),
+        )
+
+    def apply(self, X):
+        """
+        Índice global de la hoja alcanzada por cada fila en cada árbol, (n_filas, n_árboles)
+        """
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(f"X must have shape (n_samples, {self.n_features_in_})")
+        if not np.isfinite(X).all():
+            raise ValueError("Input X contains NaN or infinity")
+
+        # Índices planos: fila * n_características + característica del nodo
+        row_offsets = (np.arange(len(X)) * X.shape[1])[:, np.newaxis]
+        values = X.ravel()
+        nodes = np.broadcast_to(self.roots, (len(X), self.n_estimators))
+        for _ in range(self.max_depth):
+            go_left = values.take(row_offsets + self.feature.take(nodes)) <= self._threshold32.take(nodes)
+            nodes = self._children_flat.take(nodes * 2 + go_left)
+        return nodes
+
+    def predict_proba(self, X, chunk_size=DEFAULT_CHUNK_SIZE):
+        X = np.asarray(X)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        proba = np.empty((len(X), len(self.classes_)), dtype=np.float64)
+        for start in range(0, len(X), chunk_size):
+            leaves = self.apply(X[start:start + chunk_size])
+            for k, class_proba in enumerate(self._class_proba):
+                proba[start:start + chunk_size, k] = class_proba.take(leaves).sum(axis=1)
+        proba /= self.n_estimators
+        return proba
+
+    def predict(self, X):
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1), axis=0)
+
+
+def check_parity(forest, X):
+    """
+    Compara el motor compilado con sklearn sobre X
+
+    Returns:
+        dict: Filas evaluadas, etiquetas distintas y diferencia máxima de probabilidad
+    """
+    compiled = CompiledForest.from_sklearn(forest)
+    X = np.asarray(X, dtype=np.float64)
+    labels_match = compiled.predict(X) == forest.predict(X)
+    max_proba_diff = float(np.abs(compiled.predict_proba(X) - forest.predict_proba(X)).max()) if len(X) else 0.0
+    return {
+        "rows": len(X),
+        "label_mismatches": int((~labels_match).sum()),
+        "max_proba_diff": max_proba_diff,
+    }
+
+
+if __name__ == '__main__':
+    import joblib
+    import pandas as pd
+    from classes.features import FAST_COLUMNS
+
+    parser = argparse.ArgumentParser(description='Check the compiled forest against sklearn')
+    parser.add_argument('model_path')
+    parser.add_argument('csv_path')
+    args = parser.parse_args()
+
+    forest = joblib.load(args.model_path)
+    X = pd.read_csv(args.csv_path)[FAST_COLUMNS].dropna().to_numpy(dtype=np.float64)
+    result = check_parity(forest, X)
+    print(result)
+    if result["label_mismatches"] or result["max_proba_diff"] > 1e-12:
+        raise SystemExit("Compiled forest does not match sklearn")
@@ -0,0 +1,119 @@
+"""
+Almacenamiento binario del dataset de curvas de luz
+
+Un store es un directorio con tres archivos alineados por fila:
+
+    catalog.csv       columnas tabulares (search_id, num_planet, disposition, ror, ...)
+    global_view.npy   float32 (N, 1001)
+    local_view.npy    float32 (N, 101)
+
+Los .npy se abren con np.load(mmap_mode='r'), así que cargar el store no lee
+las vistas y cualquier rebanada por filas es una vista sin copia. Los
+notebooks pueden leerlo solo con numpy y pandas.
+
+Uso:
+    python -m classes.light_curve_store dataset.csv light_curves_store/
+"""
+import argparse
+import os
+import numpy as np
+import pandas as pd
+
+from classes.features import GLOBAL_VIEW_SIZE, LOCAL_VIEW_SIZE, SCALAR_COLUMNS, parse_view
+
+CATALOG_FILE = 'catalog.csv'
+GLOBAL_VIEW_FILE = 'global_view.npy'
+LOCAL_VIEW_FILE = 'local_view.npy'
+
+
+class LightCurveStore:
+    """
+    Store de curvas de luz abierto en modo solo lectura
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.catalog = pd.read_csv(os.path.join(path, CATALOG_FILE))
+        self.global_views = np.load(os.path.join(path, GLOBAL_VIEW_FILE), mmap_mode='r')
+        self.local_views = np.load(os.path.join(path, LOCAL_VIEW_FILE), mmap_mode='r')
+
+        if not len(self.catalog) == len(self.global_views) == len(self.local_views):
+            raise ValueError(f"Store '{path}' has misaligned files")
+        self.scalars = self.catalog[SCALAR_COLUMNS].to_numpy(dtype=np.float32)
+
+    def __len__(self):
+        return len(self.catalog)
+
+    def deep_inputs(self, rows=slice(None)):
+        """
+        Devuelve [global_views, local_views, scalars] listos para Predict.deep_predict_batch
+
+        Con un slice las vistas son rebanadas del memmap, sin copia.
+        """
+        return [
+            self.global_views[rows][..., np.newaxis],
+            self.local_views[rows][..., np.newaxis],
+            self.scalars[rows],
+        ]
+
+
+def open_store(path):
+    """
+    Abre un store de curvas de luz en modo solo lectura
+    """
+    return LightCurveStore(path)
+
+
+def convert_csv(csv_path, store_path, chunk_size=1000):
+    """
+    Convierte un CSV con columnas JSON global_view/local_view a un store binario
+
+    El CSV se lee por bloques y las vistas se escriben directamente en los
+    .npy de destino, así que la conversión no carga el archivo completo.
+
+    Args:
+        csv_path: CSV de entrada (formato de data/koi_lightcurves_dataset)
+        store_path: Directorio de salida
+        chunk_size: Filas por bloque
+
+    Returns:
+        int: Número de filas escritas
+    """
+    n_rows = sum(len(chunk) for chunk in pd.read_csv(csv_path, usecols=['global_view'], chunksize=chunk_size))
+
+    os.makedirs(store_path, exist_ok=True)
+    global_views = np.lib.format.open_memmap(
+        os.path.join(store_path, GLOBAL_VIEW_FILE), mode='w+', dtype=np.float32, shape=(n_rows, GLOBAL_VIEW_SIZE)
+    )
+    local_views = np.lib.format.open_memmap(
+        os.path.join(store_path, LOCAL_VIEW_FILE), mode='w+', dtype=np.float32, shape=(n_rows, LOCAL_VIEW_SIZE)
+    )
+
+    catalog_path = os.path.join(store_path, CATALOG_FILE)
+    start = 0
+    for chunk in pd.read_csv(csv_path, chunksize=chunk_size):
+        chunk = chunk.drop(columns=['Unnamed: 0'], errors='ignore')
+        stop = start + len(chunk)
+        for offset, (global_cell, local_cell) in enumerate(zip(chunk['global_view'], chunk['local_view'])):
+            global_views[start + offset] = parse_view(global_cell, GLOBAL_VIEW_SIZE)
+            local_views[start + offset] = parse_view(local_cell, LOCAL_VIEW_SIZE)
+
+        chunk.drop(columns=['global_view', 'local_view']).to_csv(
+            catalog_path, mode='w' if start == 0 else 'a', header=start == 0, index=False
+        )
+        start = stop
+
+    global_views.flush()
+    local_views.flush()
+    return n_rows
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Convert a light-curve CSV to the binary store format')
+    parser.add_argument('csv_path')
+    parser.add_argument('store_path')
+    parser.add_argument('--chunk-size', type=int, default=1000)
+    args = parser.parse_args()
+
+    rows = convert_csv(args.csv_path, args.store_path, args.chunk_size)
+    print(f"Wrote {rows} light curves to {args.store_path}")
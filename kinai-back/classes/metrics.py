@@ -0,0 +1,443 @@
+"""
+Métricas de latencia por etapa y contadores, exportadas en formato de texto de Prometheus
+
+Cada proceso lleva su propio registro en memoria (sin dependencias externas).
+Observar un valor cuesta un lock y una búsqueda binaria, así que se puede
+medir cada petición. Las etapas se etiquetan con el endpoint de la petición
+en curso (current_endpoint, lo fija app.routes.metrics_routes), el modelo y
+el nombre de la etapa.
+
+Con varios workers (gunicorn) cada proceso escribe su registro en
+METRICS_DIR/<pid>.json cada METRICS_FLUSH_SECONDS, y /metrics suma los
+archivos de todos. Cuando un worker termina (worker_exit, o /metrics ve que
+su pid ya no existe) sus contadores e histogramas se suman a
+METRICS_DIR/retired.json y su archivo se borra: los totales nunca
+retroceden y los gauges (cola, caché) solo cuentan workers vivos.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+import fcntl
+import json
+import logging
+import os
+import random
+import threading
+import time
+
+import numpy as np
+
+# Límites de los histogramas de latencia, en segundos
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# Fracción de peticiones con log de depuración (DEBUG_LOG_SAMPLE_RATE)
+DEBUG_LOG_SAMPLE_RATE = float(os.environ.get('DEBUG_LOG_SAMPLE_RATE', 0.01))
+
+# Directorio compartido por los procesos ('' = solo el proceso actual) e
+# intervalo de escritura de cada proceso
+METRICS_DIR = os.environ.get('METRICS_DIR', '')
+METRICS_FLUSH_SECONDS = float(os.environ.get('METRICS_FLUSH_SECONDS', 5))
+SNAPSHOT_SUFFIX = '.json'
+# Suma de los workers que ya terminaron, sin gauges
+RETIRED_FILE = 'retired.json'
+LOCK_FILE = '.lock'
+
+logger = logging.getLogger(__name__)
+
+# Endpoint de la petición en curso; los hilos de fondo (jobs) quedan como 'background'
+current_endpoint = ContextVar('kinai_endpoint', default='background')
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels) + '}'
+
+
+def _format_value(value):
+    if value is None:
+        return 'NaN'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """
+    Histograma acumulativo con límites fijos (estilo Prometheus)
+    """
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        index = int(np.searchsorted(self.buckets, value))
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+
+    def snapshot(self):
+        cumulative = np.cumsum(self.counts).tolist()
+        labels = [str(bucket) for bucket in self.buckets] + ['+Inf']
+        return {
+            "buckets": dict(zip(labels, cumulative)),
+            "count": self.count,
+            "sum": self.sum,
+        }
+
+
+class Metric:
+    """
+    Métrica con etiquetas: un valor (o histograma) por combinación de etiquetas
+    """
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def collect(self):
+        with self._lock:
+            samples = [[list(labels), self._sample(child)] for labels, child in self._children.items()]
+        return family(self.name, self.kind, self.documentation, samples, self.labelnames)
+
+    def _sample(self, child):
+        return child
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, *label_values):
+        with self._lock:
+            self._children[label_values] = self._children.get(label_values, 0) + amount
+
+    def value(self, *label_values):
+        with self._lock:
+            return self._children.get(label_values, 0)
+
+
+class LabeledHistogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, *label_values):
+        with self._lock:
+            histogram = self._children.get(label_values)
+            if histogram is None:
+                histogram = self._children[label_values] = Histogram(self.buckets)
+            histogram.observe(value)
+
+    def snapshot(self, *label_values):
+        with self._lock:
+            histogram = self._children.get(label_values)
+            return histogram.snapshot() if histogram else None
+
+    def _sample(self, child):
+        return child.snapshot()
+
+
+def family(name, kind, documentation, samples, labelnames=()):
+    """
+    Métrica exportable (y serializable en JSON): samples es una lista de
+    [valores de etiquetas, valor], donde valor es un número o un
+    Histogram.snapshot()
+    """
+    return {"name": name, "kind": kind, "help": documentation, "labelnames": list(labelnames), "samples": samples}
+
+
+def _add(kind, a, b):
+    if kind != 'histogram':
+        return a + b
+    return {
+        "buckets": {le: count + b["buckets"].get(le, 0) for le, count in a["buckets"].items()},
+        "count": a["count"] + b["count"],
+        "sum": a["sum"] + b["sum"],
+    }
+
+
+def merge_families(families):
+    """
+    Suma las muestras con el mismo nombre y etiquetas, en el orden de aparición
+    """
+    merged = {}
+    for item in families:
+        target = merged.setdefault(item["name"], {**item, "samples": {}})
+        for label_values, value in item["samples"]:
+            key = tuple(label_values)
+            current = target["samples"].get(key)
+            target["samples"][key] = value if current is None else _add(item["kind"], current, value)
+    return [{**item, "samples": sorted(item["samples"].items())} for item in merged.values()]
+
+
+def render_family(item):
+    """
+    Líneas de Prometheus de una métrica
+    """
+    name = item["name"]
+    lines = [f"# HELP {name} {item['help']}", f"# TYPE {name} {item['kind']}"]
+    for label_values, value in item["samples"]:
+        labels = list(zip(item["labelnames"], label_values))
+        if item["kind"] == 'histogram':
+            lines.extend(histogram_lines(name, labels, value))
+        else:
+            lines.append(f"{name}{format_labels(labels)} {_format_value(value)}")
+    return lines
+
+
+def pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def read_snapshot(path):
+    """
+    Familias guardadas en path, o None si no existe o está incompleto
+    """
+    try:
+        with open(path) as snapshot_file:
+            return json.load(snapshot_file)
+    except (OSError, ValueError):
+        return None
+
+
+def histogram_lines(name, labels, snapshot):
+    """
+    Líneas de Prometheus de un Histogram.snapshot()
+    """
+    lines = [
+        f"{name}_bucket{format_labels(labels + [('le', le)])} {count}"
+        for le, count in snapshot["buckets"].items()
+    ]
+    lines.append(f"{name}_sum{format_labels(labels)} {_format_value(float(snapshot['sum']))}")
+    lines.append(f"{name}_count{format_labels(labels)} {snapshot['count']}")
+    return lines
+
+
+class Registry:
+    """
+    Conjunto de métricas del proceso
+
+    Además de las métricas propias acepta colectores: funciones llamadas al
+    exportar que devuelven métricas (ver family), para publicar estadísticas
+    que ya llevan otros objetos (caché de predicciones, micro-batcher).
+
+    Args:
+        directory: Directorio compartido con los demás procesos; vacío para
+            exportar solo este proceso
+    """
+
+    def __init__(self, directory=''):
+        self.directory = directory
+        self._metrics = []
+        self._collectors = []
+        self._flusher_pid = None
+        self._writer_pid = None
+        self._flush_lock = threading.Lock()
+
+    def counter(self, name, documentation, labelnames=()):
+        metric = Counter(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        metric = LabeledHistogram(name, documentation, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector):
+        self._collectors.append(collector)
+
+    def collect(self):
+        """
+        Métricas de este proceso
+        """
+        families = [metric.collect() for metric in self._metrics]
+        for collector in self._collectors:
+            families.extend(collector())
+        return families
+
+    def _snapshot_path(self, pid):
+        return os.path.join(self.directory, f"{pid}{SNAPSHOT_SUFFIX}")
+
+    @contextmanager
+    def _directory_lock(self):
+        """
+        Lock exclusivo entre procesos sobre directory (flock de LOCK_FILE)
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, LOCK_FILE), 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            yield
+
+    def _write(self, path, families):
+        with open(path + '.tmp', 'w') as snapshot_file:
+            json.dump(families, snapshot_file)
+        os.replace(path + '.tmp', path)
+
+    def _retire(self, path):
+        """
+        Suma los contadores e histogramas de path a RETIRED_FILE y borra path
+
+        Hay que tener el lock del directorio.
+        """
+        families = read_snapshot(path)
+        if families is None:
+            return
+        retired_path = os.path.join(self.directory, RETIRED_FILE)
+        families = [item for item in families if item["kind"] != 'gauge']
+        self._write(retired_path, merge_families((read_snapshot(retired_path) or []) + families))
+        os.remove(path)
+
+    def flush(self):
+        """
+        Escribe las métricas de este proceso en directory/<pid>.json (reemplazo atómico)
+
+        Si el archivo es de un proceso anterior con el mismo pid, primero lo retira.
+        """
+        if not self.directory:
+            return
+        pid = os.getpid()
+        path = self._snapshot_path(pid)
+        with self._flush_lock, self._directory_lock():
+            if self._writer_pid != pid and os.path.exists(path):
+                self._retire(path)
+            self._writer_pid = pid
+            self._write(path, self.collect())
+
+    def retire(self):
+        """
+        Última escritura de un worker que termina (gunicorn worker_exit)
+
+        Sus contadores e histogramas pasan a RETIRED_FILE y su archivo se
+        borra, así que sus gauges dejan de contar.
+        """
+        if not self.directory:
+            return
+        self.flush()
+        with self._flush_lock, self._directory_lock():
+            self._retire(self._snapshot_path(os.getpid()))
+
+    def start_flusher(self, interval=METRICS_FLUSH_SECONDS):
+        """
+        Hilo que llama a flush cada interval segundos, uno por proceso
+
+        Se puede llamar en cada petición: después de un fork el proceso hijo
+        no tiene el hilo del padre y arranca el suyo.
+        """
+        if not self.directory or self._flusher_pid == os.getpid():
+            return
+        with self._flush_lock:
+            if self._flusher_pid == os.getpid():
+                return
+            self._flusher_pid = os.getpid()
+
+        def loop():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.flush()
+                except OSError as e:
+                    logger.warning("Could not write metrics snapshot: %s", e)
+
+        threading.Thread(target=loop, name='metrics-flusher', daemon=True).start()
+
+    def gather(self):
+        """
+        Métricas de todos los procesos que escriben en directory, sumadas
+
+        Los archivos de pids que ya no existen (workers terminados sin
+        worker_exit) se retiran antes de sumar.
+        """
+        if not self.directory:
+            return merge_families(self.collect())
+        self.flush()
+        with self._directory_lock():
+            live = []
+            for name in os.listdir(self.directory):
+                if not name.endswith(SNAPSHOT_SUFFIX) or not name[:-len(SNAPSHOT_SUFFIX)].isdigit():
+                    continue
+                if pid_alive(int(name[:-len(SNAPSHOT_SUFFIX)])):
+                    live.append(name)
+                else:
+                    self._retire(os.path.join(self.directory, name))
+            families = read_snapshot(os.path.join(self.directory, RETIRED_FILE)) or []
+            for name in live:
+                families.extend(read_snapshot(os.path.join(self.directory, name)) or [])
+        return merge_families(families)
+
+    def render(self):
+        lines = []
+        for item in self.gather():
+            lines.extend(render_family(item))
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry(METRICS_DIR)
+
+REQUESTS = registry.counter(
+    'kinai_requests_total', 'HTTP requests by endpoint and status code', ('endpoint', 'method', 'status')
+)
+REQUEST_SECONDS = registry.histogram(
+    'kinai_request_seconds', 'Time to build the response of a request', ('endpoint', 'method')
+)
+STAGE_SECONDS = registry.histogram(
+    'kinai_stage_seconds', 'Time spent in each request stage', ('endpoint', 'model', 'stage')
+)
+ROWS_SCORED = registry.counter(
+    'kinai_rows_scored_total', 'Rows scored, including rows answered from the prediction cache', ('endpoint', 'model')
+)
+ROWS_FAILED = registry.counter(
+    'kinai_rows_failed_total', 'Rows that could not be scored (invalid or missing features)', ('endpoint', 'model')
+)
+
+
+@contextmanager
+def stage(name, model='', endpoint=None):
+    """
+    Mide el bloque como la etapa name del endpoint actual
+
+    Args:
+        name: decode, dataframe, coerce, views, inference, serialize...
+        model: 'fast', 'deep' o '' si la etapa no depende del modelo
+        endpoint: Endpoint a usar; por defecto current_endpoint
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - start, endpoint or current_endpoint.get(), model, name)
+
+
+def count_rows(model, scored, failed=0, endpoint=None):
+    """
+    Suma filas predichas y fallidas al endpoint actual
+    """
+    endpoint = endpoint or current_endpoint.get()
+    if scored:
+        ROWS_SCORED.inc(int(scored), endpoint, model)
+    if failed:
+        ROWS_FAILED.inc(int(failed), endpoint, model)
+
+
+def sample_debug(logger):
+    """
+    True para una fracción DEBUG_LOG_SAMPLE_RATE de las llamadas, solo si
+    el logger tiene habilitado DEBUG (si no, no cuesta nada)
+    """
+    return logger.isEnabledFor(logging.DEBUG) and random.random() < DEBUG_LOG_SAMPLE_RATE
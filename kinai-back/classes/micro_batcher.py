@@ -0,0 +1,114 @@
+"""
+Agrupación dinámica (micro-batching) de peticiones al modelo profundo
+"""
+from concurrent.futures import Future
+import os
+import queue
+import threading
+import time
+import numpy as np
+
+from classes.metrics import Histogram
+
+# Límites de los histogramas (filas por lote y milisegundos de espera)
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+WAIT_MS_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 250)
+
+
+class MicroBatcher:
+    """
+    Junta las filas de peticiones concurrentes en una sola llamada al modelo
+
+    Cada llamada a predict() encola sus filas y espera. Un hilo de fondo toma
+    la primera petición de la cola y le agrega las que lleguen hasta juntar
+    max_batch_size filas o hasta que pasen max_wait_ms. Luego llama una vez a
+    predict_fn y devuelve a cada petición su parte del resultado.
+    """
+
+    def __init__(self, predict_fn, max_batch_size=64, max_wait_ms=5):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+
+        self.batch_sizes = Histogram(BATCH_SIZE_BUCKETS)
+        self.wait_ms = Histogram(WAIT_MS_BUCKETS)
+        self.requests = 0
+
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker = None
+        self._worker_pid = None
+
+    def predict(self, inputs):
+        """
+        Predice las filas de inputs (lista de arreglos con N filas) junto con
+        las peticiones concurrentes
+        """
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((inputs, len(inputs[0]), future, time.monotonic()))
+        return future.result()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "queue_length": self._queue.qsize(),
+                "requests": self.requests,
+                "batches": self.batch_sizes.count,
+                "batch_size": self.batch_sizes.snapshot(),
+                "wait_ms": self.wait_ms.snapshot(),
+            }
+
+    def _ensure_worker(self):
+        # El hilo no sobrevive a un fork (gunicorn), así que se crea por proceso
+        with self._lock:
+            if self._worker is None or self._worker_pid != os.getpid():
+                self._queue = queue.Queue()
+                self._worker_pid = os.getpid()
+                self._worker = threading.Thread(target=self._run, name='kinai-micro-batcher', daemon=True)
+                self._worker.start()
+
+    def _collect(self):
+        first = self._queue.get()
+        batch = [first]
+        n_rows = first[1]
+        deadline = first[3] + self.max_wait
+
+        while n_rows < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            batch.append(item)
+            n_rows += item[1]
+        return batch, n_rows
+
+    def _run(self):
+        while True:
+            batch, n_rows = self._collect()
+            dispatched_at = time.monotonic()
+
+            with self._lock:
+                self.requests += len(batch)
+                self.batch_sizes.observe(n_rows)
+                for _, _, _, enqueued_at in batch:
+                    self.wait_ms.observe((dispatched_at - enqueued_at) * 1000.0)
+
+            try:
+                inputs = [
+                    np.concatenate([item[0][k] for item in batch])
+                    for k in range(len(batch[0][0]))
+                ]
+                predictions = np.asarray(self.predict_fn(inputs)).reshape(n_rows)
+            except Exception as e:
+                for _, _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+
+            start = 0
+            for _, rows, future, _ in batch:
+                future.set_result(predictions[start:start + rows])
+                start += rows
@@ -1,36 +1,377 @@
-from tensorflow.keras.models import load_model
+from collections import OrderedDict
+import hashlib
 import joblib
 import numpy as np
 import os
+import threading
+import time
+
+from classes.micro_batcher import MicroBatcher
+
+# Tamaño de mini-lote por defecto para la inferencia por lotes
+DEFAULT_BATCH_SIZE = 256
+
+# Modelos a cargar al crear el predictor: '', 'fast', 'deep' o 'all' (MODEL_WARMUP)
+WARMUP_MODELS = {'': (), 'fast': ('fast',), 'deep': ('deep',), 'all': ('fast', 'deep')}
+
+# Micro-batching del modelo profundo (DEEP_MICRO_BATCH_SIZE=0 lo desactiva)
+DEFAULT_MICRO_BATCH_SIZE = 0
+DEFAULT_MICRO_BATCH_WAIT_MS = 5
+
+# Motor del modelo rápido: 'sklearn' o 'compiled' (FAST_MODEL_ENGINE)
+FAST_MODEL_ENGINES = ('sklearn', 'compiled')
+
+# Motor del modelo profundo Keras (DEEP_MODEL_ENGINE): 'keras' usa model.predict,
+# 'compiled' una función de firma fija con lotes rellenados a DEEP_BATCH_BUCKETS
+DEEP_MODEL_ENGINES = ('keras', 'compiled')
+
+# Variante del modelo profundo (DEEP_MODEL_VARIANT): Keras float32 o TFLite
+# generadas y validadas con classes.deep_export
+DEEP_MODEL_FILES = {
+    'keras': 'deep_model.h5',
+    'float16': 'deep_model_float16.tflite',
+    'int8': 'deep_model_int8.tflite',
+}
+
+# Caché de predicciones, opcional: PREDICTION_CACHE_SIZE > 0 la activa. Los
+# lotes de más de PREDICTION_CACHE_MAX_ROWS filas (CSV, trabajos) no la usan
+DEFAULT_CACHE_SIZE = 0
+DEFAULT_CACHE_TTL = 3600
+DEFAULT_CACHE_MAX_ROWS = 1000
+
+
+# ===========================
+# 🔹 Caché de predicciones
+# ===========================
+class PredictionCache:
+    """
+    Caché LRU con expiración (TTL en segundos) de predicciones por fila
+
+    Las claves combinan la identidad del modelo con los bytes del vector de
+    características, ver row_keys. max_rows es el tamaño de lote a partir del
+    cual no se consulta.
+    """
+
+    def __init__(self, max_size, ttl=DEFAULT_CACHE_TTL, max_rows=DEFAULT_CACHE_MAX_ROWS):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.max_rows = max_rows
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, keys):
+        """
+        Devuelve la predicción guardada para cada clave, o None si no existe o expiró
+        """
+        now = time.monotonic()
+        values = []
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is not None and (self.ttl is None or now - entry[1] <= self.ttl):
+                    self._entries.move_to_end(key)
+                    values.append(entry[0])
+                    self.hits += 1
+                else:
+                    if entry is not None:
+                        del self._entries[key]
+                    values.append(None)
+                    self.misses += 1
+        return values
+
+    def set_many(self, keys, values):
+        now = time.monotonic()
+        with self._lock:
+            for key, value in zip(keys, values):
+                self._entries[key] = (value, now)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl": self.ttl,
+                "max_rows": self.max_rows,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else None,
+            }
+
+
+def row_keys(model_id, inputs):
+    """
+    Claves de caché por fila: (model_id, bytes de la fila en todas las entradas)
+
+    Las filas se ven como un solo bloque np.void, así que las claves salen sin
+    un ciclo de Python por fila y son exactas (sin colisiones de hash).
+    """
+    n_rows = len(inputs[0])
+    rows = np.concatenate(
+        [np.ascontiguousarray(x).reshape(n_rows, -1).view(np.uint8) for x in inputs], axis=1
+    )
+    rows = np.ascontiguousarray(rows).view(np.dtype((np.void, rows.shape[1]))).ravel()
+    return [(model_id, row) for row in rows.tolist()]
+
+
+def model_identity(path):
+    """
+    Identidad de un modelo cargado: archivo y fecha de modificación
+    """
+    return f"{os.path.basename(path)}@{os.path.getmtime(path)}"
+
+
+_digests = {}
+_digests_lock = threading.Lock()
+
+
+def model_digest(path):
+    """
+    Hash del contenido de un archivo de modelo, recalculado solo si cambia su mtime
+
+    A diferencia de model_identity no depende de la fecha del archivo, que
+    cambia en cada despliegue; sirve para datos guardados entre ejecuciones
+    (índice del catálogo, manifiestos de re-puntuación).
+    """
+    if not path or not os.path.exists(path):
+        return None
+    mtime = os.path.getmtime(path)
+    with _digests_lock:
+        cached = _digests.get(path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as model_file:
+        for block in iter(lambda: model_file.read(1 << 20), b''):
+            digest.update(block)
+    with _digests_lock:
+        _digests[path] = (mtime, digest.hexdigest())
+    return digest.hexdigest()
+
+
+def build_cache_from_env():
+    max_size = int(os.environ.get('PREDICTION_CACHE_SIZE', DEFAULT_CACHE_SIZE))
+    if max_size <= 0:
+        return None
+    ttl = float(os.environ.get('PREDICTION_CACHE_TTL', DEFAULT_CACHE_TTL))
+    max_rows = int(os.environ.get('PREDICTION_CACHE_MAX_ROWS', DEFAULT_CACHE_MAX_ROWS))
+    return PredictionCache(max_size=max_size, ttl=ttl if ttl > 0 else None, max_rows=max_rows)
+
 
 # ===========================
 # 🔹 Clase para manejar modelos
 # ===========================
 class Predict:
-    def __init__(self):
+    def __init__(self, cache=None, warmup=''):
         base_dir = os.path.dirname(os.path.abspath(__file__))
         self.models_dir = os.path.join(base_dir, '..', 'ai_models')
+        self.cache = cache if cache is not None else build_cache_from_env()
+
+        # Los modelos se cargan en el primer uso (o en warmup), no al importar;
+        # así un worker que solo atiende /fast-predict nunca importa TensorFlow
+        self.deep_variant = os.environ.get('DEEP_MODEL_VARIANT', 'keras')
+        if self.deep_variant not in DEEP_MODEL_FILES:
+            raise ValueError(f"Invalid DEEP_MODEL_VARIANT '{self.deep_variant}'. Options: {list(DEEP_MODEL_FILES)}")
+        self.deep_model_path = os.path.join(self.models_dir, DEEP_MODEL_FILES[self.deep_variant])
+        self.fast_model_path = os.path.join(self.models_dir, 'fast_model.pkl')
+        self.deep_model_id = None
+        self.fast_model_id = None
+        self._deep_model = None
+        self._fast_model = None
+        self._load_lock = threading.RLock()
 
-        # Cargamos los modelos al iniciar (para no cargarlos en cada petición)
-        self.deep_model = load_model(os.path.join(self.models_dir, 'deep_model.h5'))
-        self.fast_model = joblib.load(os.path.join(self.models_dir, 'fast_model.pkl'))
+        self.deep_engine = os.environ.get('DEEP_MODEL_ENGINE', 'keras')
+        if self.deep_engine not in DEEP_MODEL_ENGINES:
+            raise ValueError(f"Invalid DEEP_MODEL_ENGINE '{self.deep_engine}'. Options: {list(DEEP_MODEL_ENGINES)}")
+
+        self.fast_engine = os.environ.get('FAST_MODEL_ENGINE', 'sklearn')
+        if self.fast_engine not in FAST_MODEL_ENGINES:
+            raise ValueError(f"Invalid FAST_MODEL_ENGINE '{self.fast_engine}'. Options: {list(FAST_MODEL_ENGINES)}")
+
+        # Peticiones pequeñas y concurrentes al modelo profundo se agrupan en un solo lote
+        micro_batch_size = int(os.environ.get('DEEP_MICRO_BATCH_SIZE', DEFAULT_MICRO_BATCH_SIZE))
+        micro_batch_wait = float(os.environ.get('DEEP_MICRO_BATCH_WAIT_MS', DEFAULT_MICRO_BATCH_WAIT_MS))
+        self.micro_batcher = MicroBatcher(
+            lambda rows: self.deep_model.predict(rows, batch_size=len(rows[0]), verbose=0),
+            max_batch_size=micro_batch_size,
+            max_wait_ms=micro_batch_wait,
+        ) if micro_batch_size > 0 else None
+
+        if warmup not in WARMUP_MODELS:
+            raise ValueError(f"Invalid warmup '{warmup}'. Options: {list(WARMUP_MODELS.keys())}")
+        self.warmup(WARMUP_MODELS[warmup])
+
+    @property
+    def deep_model(self):
+        if self._deep_model is None:
+            with self._load_lock:
+                if self._deep_model is None:
+                    self.load_deep_model(self.deep_model_path)
+        return self._deep_model
+
+    @property
+    def fast_model(self):
+        if self._fast_model is None:
+            with self._load_lock:
+                if self._fast_model is None:
+                    self.load_fast_model(self.fast_model_path)
+        return self._fast_model
+
+    def warmup(self, models=('fast', 'deep')):
+        """
+        Carga por adelantado los modelos indicados
+        """
+        if 'fast' in models:
+            self.fast_model
+        if 'deep' in models:
+            self.deep_model
+
+    def load_deep_model(self, path):
+        """
+        Carga (o reemplaza) el modelo profundo e invalida la caché
+
+        Los .tflite se cargan con classes.tflite_model.TFLiteModel, que
+        ofrece el mismo predict que un modelo Keras y rellena los lotes a
+        DEEP_BATCH_BUCKETS. Con el motor 'compiled'
+        el modelo Keras se envuelve en classes.compiled_model y se calienta
+        cada bucket antes de publicarlo.
+        """
+        with self._load_lock:
+            from classes.compiled_model import DEFAULT_BUCKETS, parse_buckets
+
+            threads = os.environ.get('TF_NUM_INTRAOP_THREADS')
+            buckets = os.environ.get('DEEP_BATCH_BUCKETS')
+            buckets = parse_buckets(buckets) if buckets else DEFAULT_BUCKETS
+            if path.endswith('.tflite'):
+                from classes.tflite_model import TFLiteModel
+                model = TFLiteModel(path, num_threads=int(threads) if threads else None, buckets=buckets)
+            else:
+                from tensorflow.keras.models import load_model
+                from classes.compiled_model import configure_threads
+
+                configure_threads()
+                model = load_model(path)
+                if self.deep_engine == 'compiled':
+                    from classes.compiled_model import CompiledKerasModel
+
+                    model = CompiledKerasModel(
+                        model,
+                        buckets=buckets,
+                        jit_compile=os.environ.get('DEEP_MODEL_JIT', '0') == '1',
+                    )
+                    model.warmup()
+            # Igual que en load_fast_model, el modelo se publica al final
+            self.deep_model_path = path
+            self.deep_model_id = model_identity(path)
+            if self.cache is not None:
+                self.cache.clear()
+            self._deep_model = model
+
+    def load_fast_model(self, path):
+        """
+        Carga (o reemplaza) el modelo rápido e invalida la caché
+        """
+        with self._load_lock:
+            model = joblib.load(path)
+            # El bosque se guardó con n_jobs=-1 (todos los núcleos por petición);
+            # FAST_MODEL_N_JOBS lo limita cuando varios procesos comparten la máquina
+            if os.environ.get('FAST_MODEL_N_JOBS'):
+                model.n_jobs = int(os.environ['FAST_MODEL_N_JOBS'])
+            # El motor compilado recorre el bosque con NumPy, sin el costo fijo
+            # de joblib por llamada (ver classes.forest_engine)
+            if self.fast_engine == 'compiled':
+                from classes.forest_engine import CompiledForest
+                model = CompiledForest.from_sklearn(model)
+            # fast_model se lee sin el lock: el modelo se publica al final,
+            # ya configurado y con su identidad
+            self.fast_model_path = path
+            self.fast_model_id = model_identity(path)
+            if self.cache is not None:
+                self.cache.clear()
+            self._fast_model = model
+
+    def set_fast_n_jobs(self, n_jobs):
+        """
+        Cambia los hilos del bosque ya cargado (el motor compilado no usa joblib)
+        """
+        model = self._fast_model
+        if model is not None and hasattr(model, 'n_jobs'):
+            model.n_jobs = n_jobs
+
+    def _predict_cached(self, model_id, inputs, predict_fn):
+        """
+        Ejecuta predict_fn solo sobre las filas que no están en caché
+        """
+        n_rows = len(inputs[0])
+        if self.cache is None or n_rows > self.cache.max_rows:
+            return np.asarray(predict_fn(inputs)).reshape(n_rows)
+
+        keys = row_keys(model_id, inputs)
+        values = self.cache.get_many(keys)
+        missing = [i for i, value in enumerate(values) if value is None]
+        if missing:
+            rows = np.asarray(missing)
+            fresh = np.asarray(predict_fn([x[rows] for x in inputs])).reshape(len(missing)).tolist()
+            self.cache.set_many([keys[i] for i in missing], fresh)
+            for i, value in zip(missing, fresh):
+                values[i] = value
+        return np.asarray(values)
 
     def deep_predict(self, features):
         """
-        Realiza predicción con el modelo profundo (.h5)
+        Realiza predicción con el modelo profundo (.h5) para un solo candidato
+
+        features es [global_view (1001,), local_view (101,), scalars (3,)]
         """
-        X = np.array([features], dtype=float)
-        pred = self.deep_model.predict(X)
-        return pred.tolist()
+        inputs = [
+            np.asarray(features[0], dtype=np.float32).reshape(1, -1, 1),
+            np.asarray(features[1], dtype=np.float32).reshape(1, -1, 1),
+            np.asarray(features[2], dtype=np.float32).reshape(1, -1),
+        ]
+        return self.deep_predict_batch(inputs).tolist()
+
+    def deep_predict_batch(self, inputs, batch_size=DEFAULT_BATCH_SIZE):
+        """
+        Realiza predicción por lotes con el modelo profundo
+
+        inputs es la lista [global_views (N, 1001, 1), local_views (N, 101, 1),
+        scalars (N, 3)] que arma classes.features.build_deep_inputs. El modelo
+        se ejecuta en mini-lotes de batch_size filas.
+        """
+        n_rows = len(inputs[0])
+        if n_rows == 0:
+            return np.empty(0, dtype=np.float32)
+
+        model = self.deep_model
+
+        def predict(rows):
+            if self.micro_batcher is not None and len(rows[0]) < self.micro_batcher.max_batch_size:
+                return self.micro_batcher.predict(rows)
+            size = max(1, min(int(batch_size), len(rows[0])))
+            return model.predict(rows, batch_size=size, verbose=0)
+
+        pred = self._predict_cached(self.deep_model_id, inputs, predict)
+        return pred.astype(np.float32)
 
     def fast_predict(self, features):
         if isinstance(features, np.ndarray) and features.ndim == 2:
             X = features.astype(float)
         else:
             X = np.array([features], dtype=float)
-        
-        pred = self.fast_model.predict(X)
+
+        model = self.fast_model
+        pred = self._predict_cached(self.fast_model_id, [X], lambda rows: model.predict(rows[0]))
         return pred.tolist()
 
 # Instancia global de Predict
-predictor = Predict()
\ No newline at end of file
+predictor = Predict(warmup=os.environ.get('MODEL_WARMUP', ''))
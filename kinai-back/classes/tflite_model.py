@@ -0,0 +1,102 @@
+"""
+Modelo profundo en TensorFlow Lite con la misma interfaz que un modelo Keras
+
+Predict usa model.predict(inputs, batch_size, verbose) con inputs
+[global_views, local_views, scalars]; TFLiteModel ofrece ese mismo método
+sobre un tf.lite.Interpreter, así que la caché, el micro-batching y las rutas
+no cambian al servir una variante float16 o int8 (ver classes.deep_export).
+"""
+import threading
+import numpy as np
+
+from classes.compiled_model import DEFAULT_BUCKETS, bucket_for, bucket_pieces, pad_rows
+
+# Nombres de las entradas del modelo (ver models/CNN1D.ipynb), en el orden de inputs
+INPUT_NAMES = ('global_view', 'local_view', 'scalar_features')
+
+
+def load_interpreter(path, num_threads=None):
+    """
+    Intérprete de TFLite: ai_edge_litert si está instalado, si no el de TensorFlow
+    """
+    try:
+        from ai_edge_litert.interpreter import Interpreter
+    except ImportError:
+        # tensorflow.lite es un alias perezoso: 'from tensorflow.lite import' falla
+        import tensorflow as tf
+        Interpreter = tf.lite.Interpreter
+    return Interpreter(model_path=path, num_threads=num_threads)
+
+
+def input_order(input_details, names=INPUT_NAMES):
+    """
+    Posición en input_details de cada entrada de names
+
+    El convertidor nombra las entradas como 'serving_default_global_view:0';
+    se buscan por el nombre de la capa Input.
+    """
+    order = []
+    for name in names:
+        matches = [i for i, detail in enumerate(input_details) if name in detail['name']]
+        if len(matches) != 1:
+            raise ValueError(f"TFLite model has no unique input named '{name}'")
+        order.append(matches[0])
+    return order
+
+
+class TFLiteModel:
+    """
+    Envoltorio de un .tflite con predict(inputs, batch_size, verbose)
+
+    Igual que CompiledKerasModel, cada lote se rellena hasta un bucket
+    (tamaño de lote permitido). Hay un intérprete por bucket con sus tensores
+    asignados una sola vez al cargar, así que ningún tamaño de petición
+    provoca resize_tensor_input ni allocate_tensors. Un intérprete no admite
+    llamadas concurrentes, así que cada uno tiene su lock; con varios hilos
+    por worker conviene el micro-batching.
+
+    Args:
+        path: Archivo .tflite
+        num_threads: Hilos de cada intérprete
+        buckets: Tamaños de lote permitidos (ver classes.compiled_model)
+    """
+
+    def __init__(self, path, num_threads=None, buckets=DEFAULT_BUCKETS):
+        self.path = path
+        self.buckets = tuple(sorted(buckets))
+        self._interpreters = {size: self._allocate(size, num_threads) for size in self.buckets}
+
+    def _allocate(self, size, num_threads):
+        interpreter = load_interpreter(self.path, num_threads)
+        details = interpreter.get_input_details()
+        inputs = [details[i] for i in input_order(details)]
+        for detail in inputs:
+            interpreter.resize_tensor_input(detail['index'], [size, *detail['shape'][1:]])
+        interpreter.allocate_tensors()
+        return interpreter, inputs, interpreter.get_output_details()[0], threading.Lock()
+
+    def _run(self, batch, n_rows, size):
+        interpreter, inputs, output, lock = self._interpreters[size]
+        batch = pad_rows(batch, size)
+        with lock:
+            for detail, x in zip(inputs, batch):
+                interpreter.set_tensor(detail['index'], x.reshape(size, *detail['shape'][1:]))
+            interpreter.invoke()
+            return interpreter.get_tensor(output['index'])[:n_rows].reshape(-1, 1)
+
+    def predict(self, inputs, batch_size=None, verbose=0):
+        """
+        Predicciones (N, 1) float32
+
+        Los trozos tienen como máximo batch_size filas (redondeado a un
+        bucket) y nunca más que el bucket mayor; ver bucket_pieces.
+        """
+        n_rows = len(inputs[0])
+        inputs = [np.asarray(x, dtype=np.float32) for x in inputs]
+        chunk = bucket_for(self.buckets, batch_size or self.buckets[-1])
+        output = np.empty((n_rows, 1), dtype=np.float32)
+        start = 0
+        for rows, size in bucket_pieces(self.buckets, n_rows, chunk):
+            output[start:start + rows] = self._run([x[start:start + rows] for x in inputs], rows, size)
+            start += rows
+        return output
@@ -0,0 +1,293 @@
+"""
+Generación de global_view y local_view a partir de una curva de luz cruda
+
+Mismo esquema que Shallue & Vanderburg (2018): la curva se pliega en fase
+con el periodo, se eliminan los valores atípicos hacia arriba (sigma-clipping)
+y el flujo se agrupa en bins por mediana. Todo es vectorizado con NumPy: los
+puntos se ordenan por fase una vez y los límites de cada bin se buscan con
+searchsorted; no hay ciclos de Python sobre los puntos.
+
+Diferencias conocidas con las vistas de entrenamiento: el dataset se generó
+con LightCurvePreprocess.preprocess_signal (preprocess_pipeline.py), que no
+está en este repositorio. De él solo se copiaron los parámetros
+(PREPROCESS_PARAMS). Aquí no hay detrending ni aplanado de la curva, y la
+normalización (mediana 0, mínimo -1) es una suposición: el README del dataset
+muestra vistas sin normalizar. Antes de confiar en /deep-predict/light-curves
+hay que medir la diferencia con check_parity sobre curvas del entrenamiento:
+
+    python -m classes.views light_curves_store/ raw_curves.parquet --epoch-offset 2454833
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from classes.features import GLOBAL_VIEW_SIZE, LOCAL_VIEW_SIZE
+
+# Parámetros por defecto (los de LightCurves_Preprocessing.ipynb)
+OUTLIER_SIGMA = 2.0
+MAX_ITER = 3
+K_DURATIONS = 4.0
+DELTA_FACTOR_GLOBAL = 1.0
+DELTA_FACTOR_LOCAL = 1.6
+
+# Columnas que necesita build_views_frame
+RAW_COLUMNS = ['time', 'flux', 'period', 'duration', 'transit_epoch']
+
+# Puntos de curva aceptados por petición en /deep-predict/light-curves
+DEFAULT_MAX_POINTS = 2_000_000
+
+# median_bin usa una matriz (bins, puntos del bin más poblado); si esa matriz
+# supera este múltiplo del número de puntos se calcula bin por bin
+MAX_PADDING_FACTOR = 8
+
+
+def sigma_clip(flux, sigma=OUTLIER_SIGMA, max_iter=MAX_ITER):
+    """
+    Máscara de puntos válidos: descarta flujos finitos por encima de
+    mediana + sigma * desviación robusta (los tránsitos quedan intactos)
+    """
+    keep = np.isfinite(flux)
+    for _ in range(max_iter):
+        if keep.sum() < 2:
+            break
+        median = np.median(flux[keep])
+        scale = 1.4826 * np.median(np.abs(flux[keep] - median))
+        if scale == 0:
+            break
+        clipped = keep & (flux <= median + sigma * scale)
+        if clipped.sum() == keep.sum():
+            break
+        keep = clipped
+    return keep
+
+
+def fold(time, period, transit_epoch):
+    """
+    Fase en días en [-period/2, period/2), con el tránsito en 0
+    """
+    half_period = period / 2.0
+    return np.mod(time - transit_epoch + half_period, period) - half_period
+
+
+def median_bin(phase, flux, n_bins, x_min, x_max, bin_width):
+    """
+    Mediana del flujo en n_bins bins equiespaciados entre x_min y x_max
+
+    phase debe estar ordenada. Los bins pueden solaparse (bin_width mayor que
+    la separación entre centros). Los bins vacíos se interpolan de sus vecinos.
+    """
+    centers = np.linspace(x_min, x_max, n_bins)
+    start = np.searchsorted(phase, centers - bin_width / 2.0, side='left')
+    stop = np.searchsorted(phase, centers + bin_width / 2.0, side='right')
+    counts = stop - start
+    if not counts.any():
+        raise ValueError("no points fall inside the view")
+
+    view = np.full(n_bins, np.nan)
+    filled = counts > 0
+    if n_bins * counts.max() <= MAX_PADDING_FACTOR * max(counts.sum(), len(flux)):
+        # Matriz (n_bins, puntos del bin más grande) con NaN de relleno
+        offsets = np.arange(counts.max())
+        index = start[:, np.newaxis] + offsets
+        values = np.where(offsets < counts[:, np.newaxis], flux[np.minimum(index, len(flux) - 1)], np.nan)
+        view[filled] = np.nanmedian(values[filled], axis=1)
+    else:
+        # Puntos concentrados en pocos bins: la matriz crecería con el bin más
+        # poblado. Se copian solo los puntos de cada bin (counts.sum() valores),
+        # se ordenan por (bin, flujo) y la mediana sale de las posiciones
+        # centrales. Un solo np.sort sobre bin * span + flujo ordena por ambas
+        # claves (mucho más rápido que lexsort); el error al restar el bin es
+        # del orden de 1e-16 * n_bins * span, muy por debajo de float32
+        bins = np.repeat(np.arange(n_bins), counts)
+        first = np.cumsum(counts) - counts
+        values = flux[np.arange(len(bins)) - np.repeat(first - start, counts)]
+        offset = values.min()
+        span = values.max() - offset + 1.0
+        values = np.sort(bins * span + (values - offset)) - bins * span + offset
+        low = first[filled] + (counts[filled] - 1) // 2
+        high = first[filled] + counts[filled] // 2
+        view[filled] = (values[low] + values[high]) / 2.0
+    if not filled.all():
+        view[~filled] = np.interp(centers[~filled], centers[filled], view[filled])
+    return view
+
+
+def normalize_view(view):
+    """
+    Mediana en 0 y mínimo en -1
+
+    No está verificado que el dataset de entrenamiento use esta escala (ver
+    el docstring del módulo y check_parity).
+    """
+    view = view - np.median(view)
+    depth = np.abs(view.min())
+    return view / depth if depth > 0 else view
+
+
+def build_views(time, flux, period, duration, transit_epoch,
+                n_global=GLOBAL_VIEW_SIZE, n_local=LOCAL_VIEW_SIZE,
+                outlier_sigma=OUTLIER_SIGMA, max_iter=MAX_ITER, k_durations=K_DURATIONS,
+                delta_factor_global=DELTA_FACTOR_GLOBAL, delta_factor_local=DELTA_FACTOR_LOCAL):
+    """
+    Genera las vistas global y local de un candidato
+
+    Args:
+        time: Tiempos de la curva (días, mismo sistema que transit_epoch)
+        flux: Flujo medido en cada tiempo
+        period: Periodo orbital en días
+        duration: Duración del tránsito en horas
+        transit_epoch: Época de referencia del tránsito
+        n_global, n_local: Bins de cada vista
+        outlier_sigma, max_iter: Parámetros de sigma_clip
+        k_durations: Semiancho de la vista local, en duraciones
+        delta_factor_global, delta_factor_local: Ancho de bin respecto a la
+            separación entre centros
+
+    Returns:
+        tuple: (global_view (n_global,), local_view (n_local,)) float32
+
+    Raises:
+        ValueError: Si los datos no permiten generar las vistas
+    """
+    time = np.asarray(time, dtype=np.float64).ravel()
+    flux = np.asarray(flux, dtype=np.float64).ravel()
+    if time.shape != flux.shape:
+        raise ValueError(f"time and flux have different lengths ({len(time)} and {len(flux)})")
+    if not (np.isfinite(period) and period > 0 and np.isfinite(duration) and duration > 0):
+        raise ValueError("period and duration must be positive")
+    if not np.isfinite(transit_epoch):
+        raise ValueError("transit_epoch must be finite")
+
+    keep = np.isfinite(time) & sigma_clip(flux, outlier_sigma, max_iter)
+    if keep.sum() < 2:
+        raise ValueError("not enough valid points")
+    time, flux = time[keep], flux[keep]
+
+    phase = fold(time, period, transit_epoch)
+    order = np.argsort(phase, kind='stable')
+    phase, flux = phase[order], flux[order]
+
+    half_period = period / 2.0
+    global_spacing = period / (n_global - 1)
+    global_view = median_bin(phase, flux, n_global, -half_period, half_period,
+                             delta_factor_global * global_spacing)
+
+    half_width = min(k_durations * duration / 24.0, half_period)
+    local_spacing = 2.0 * half_width / (n_local - 1)
+    local_view = median_bin(phase, flux, n_local, -half_width, half_width,
+                            delta_factor_local * local_spacing)
+
+    return (normalize_view(global_view).astype(np.float32),
+            normalize_view(local_view).astype(np.float32))
+
+
+def build_views_frame(df):
+    """
+    Agrega global_view y local_view a un DataFrame con curvas crudas
+
+    Args:
+        df: DataFrame con RAW_COLUMNS (time y flux son listas o arreglos por fila)
+
+    Returns:
+        tuple: (df con las vistas, errors) donde las filas que fallan quedan
+        con vistas None y errors es un dict {índice: "Row i: ..."}
+
+    Raises:
+        ValueError: Si faltan columnas
+    """
+    missing = [col for col in RAW_COLUMNS if col not in df.columns]
+    if missing:
+        raise ValueError(f"Missing columns for light-curve views: {', '.join(missing)}")
+
+    global_views, local_views, errors = [], [], {}
+    for index, time, flux, period, duration, transit_epoch in zip(
+        df.index, df['time'], df['flux'], df['period'], df['duration'], df['transit_epoch']
+    ):
+        try:
+            global_view, local_view = build_views(time, flux, float(period), float(duration), float(transit_epoch))
+        except (TypeError, ValueError) as e:
+            global_view = local_view = None
+            errors[index] = f"Row {index}: {e}"
+        global_views.append(global_view)
+        local_views.append(local_view)
+
+    df = df.assign(global_view=global_views, local_view=local_views)
+    return df, errors
+
+
+def count_points(df):
+    """
+    Total de puntos (time) de las curvas de un DataFrame con RAW_COLUMNS
+    """
+    if 'time' not in df.columns:
+        return 0
+    return int(sum(np.size(time) for time in df['time'] if time is not None))
+
+
+def check_parity(store, curves, epoch_offset=0.0):
+    """
+    Compara las vistas generadas aquí con las vistas guardadas del entrenamiento
+
+    Args:
+        store: LightCurveStore con las vistas de entrenamiento (catalog.csv
+            con search_id, num_planet, period, duration y transit_epoch)
+        curves: DataFrame con search_id, num_planet, time y flux
+        epoch_offset: Se resta al transit_epoch del catálogo para llevarlo
+            al sistema de time (2454833 para curvas de Kepler en BKJD)
+
+    Returns:
+        pd.DataFrame: Una fila por curva con la correlación y el RMSE de cada
+        vista, o el error si no se pudieron generar
+    """
+    catalog = store.catalog.reset_index(drop=True)
+    positions = {(str(sid), int(num)): i for i, (sid, num) in enumerate(zip(catalog['search_id'], catalog['num_planet']))}
+    results = []
+    for search_id, num_planet, time, flux in zip(curves['search_id'], curves['num_planet'], curves['time'], curves['flux']):
+        row = positions.get((str(search_id), int(num_planet)))
+        result = {"search_id": search_id, "num_planet": num_planet, "error": None}
+        if row is None:
+            results.append({**result, "error": "not in store"})
+            continue
+        candidate = catalog.iloc[row]
+        try:
+            views = build_views(time, flux, float(candidate['period']), float(candidate['duration']),
+                                float(candidate['transit_epoch']) - epoch_offset)
+        except ValueError as e:
+            results.append({**result, "error": str(e)})
+            continue
+        stored = (np.asarray(store.global_views[row], dtype=np.float64), np.asarray(store.local_views[row], dtype=np.float64))
+        for name, generated, reference in zip(('global', 'local'), views, stored):
+            result[f"{name}_corr"] = float(np.corrcoef(generated, reference)[0, 1])
+            result[f"{name}_rmse"] = float(np.sqrt(np.mean((generated - reference) ** 2)))
+        results.append(result)
+    return pd.DataFrame(results)
+
+
+if __name__ == '__main__':
+    from classes.light_curve_store import open_store
+
+    parser = argparse.ArgumentParser(description='Compare server-side views with the stored training views')
+    parser.add_argument('store_path', help='Light-curve store of the training dataset')
+    parser.add_argument('curves_path', help='Raw curves (.parquet or JSON lines) with search_id, num_planet, time, flux')
+    parser.add_argument('--epoch-offset', type=float, default=0.0,
+                        help='Subtracted from the catalog transit_epoch (2454833 for Kepler BKJD times)')
+    parser.add_argument('--min-corr', type=float, default=0.95,
+                        help='Exit with an error if the median correlation of either view is lower')
+    args = parser.parse_args()
+
+    if args.curves_path.endswith('.parquet'):
+        curves = pd.read_parquet(args.curves_path)
+    else:
+        curves = pd.read_json(args.curves_path, lines=True)
+    report = check_parity(open_store(args.store_path), curves, args.epoch_offset)
+    print(report.to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+
+    checked = report[report['error'].isna()]
+    if checked.empty:
+        raise SystemExit("No curve could be compared")
+    medians = {name: float(checked[f"{name}_corr"].median()) for name in ('global', 'local')}
+    print(f"\nMedian correlation: global {medians['global']:.4f}, local {medians['local']:.4f} "
+          f"({len(checked)} of {len(report)} curves)")
+    if min(medians.values()) < args.min_corr:
+        raise SystemExit(f"Views differ from the training views (median correlation below {args.min_corr})")
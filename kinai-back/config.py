@@ -2,10 +2,31 @@
 Configuración para la aplicación Flask
 """
 import os
+import tempfile
 
 class Config:
     """Configuración base"""
     JSON_SORT_KEYS = False
+    # Tamaño de mini-lote para la inferencia del modelo profundo
+    DEEP_BATCH_SIZE = int(os.environ.get('DEEP_BATCH_SIZE', 256))
+    # Filas por bloque al puntuar CSV en streaming (por defecto y máximo por petición)
+    CSV_CHUNK_SIZE = int(os.environ.get('CSV_CHUNK_SIZE', 1000))
+    CSV_MAX_CHUNK_SIZE = int(os.environ.get('CSV_MAX_CHUNK_SIZE', 100000))
+    # Trabajos asíncronos: directorio, workers, cola máxima y retención (segundos)
+    JOBS_DIR = os.environ.get('JOBS_DIR', os.path.join(tempfile.gettempdir(), 'kinai_jobs'))
+    JOB_WORKERS = int(os.environ.get('JOB_WORKERS', 2))
+    JOB_QUEUE_SIZE = int(os.environ.get('JOB_QUEUE_SIZE', 8))
+    JOB_RETENTION = int(os.environ.get('JOB_RETENTION', 86400))
+    # /deep-predict/light-curves: apagado hasta que classes.views.check_parity
+    # pase sobre el conjunto de entrenamiento
+    LIGHT_CURVE_VIEWS_ENABLED = os.environ.get('LIGHT_CURVE_VIEWS_ENABLED', '0') == '1'
+    # Puntos de curva de luz aceptados por petición en /deep-predict/light-curves
+    LIGHT_CURVE_MAX_POINTS = int(os.environ.get('LIGHT_CURVE_MAX_POINTS', 2000000))
+    # Índice precalculado de predicciones del catálogo (classes.catalog_index)
+    CATALOG_INDEX_PATH = os.environ.get(
+        'CATALOG_INDEX_PATH',
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ai_models', 'catalog_index.sqlite')
+    )
 
 class DevelopmentConfig(Config):
     """Configuración para desarrollo"""
@@ -0,0 +1,61 @@
+"""
+Gunicorn configuration for the KINAI Exoplanets API
+
+Usage:
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+With preload_app the application, and the models selected by MODEL_WARMUP,
+are loaded once in the master process. Workers are forked afterwards and
+share those memory pages copy-on-write instead of each loading its own copy.
+"""
+import gc
+import os
+import tempfile
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 8000)}"
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+# The app splits native threads across workers (app.services.parallel_scoring)
+os.environ['WEB_CONCURRENCY'] = str(workers)
+# More than one thread per worker lets DEEP_MICRO_BATCH_SIZE group concurrent requests
+threads = int(os.environ.get('GUNICORN_THREADS', 1))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1') == '1'
+
+# Each worker writes its metrics here and /metrics adds them up
+# (classes.metrics). Snapshots from a previous run are removed at startup.
+metrics_dir = os.environ.setdefault('METRICS_DIR', os.path.join(tempfile.gettempdir(), 'kinai_metrics'))
+os.makedirs(metrics_dir, exist_ok=True)
+for name in os.listdir(metrics_dir):
+    if name.endswith(('.json', '.json.tmp')):
+        os.remove(os.path.join(metrics_dir, name))
+
+# Only the RandomForest is preloaded by default: TensorFlow starts thread pools
+# when a model is loaded and is not safe to use across fork(), so the deep model
+# keeps loading lazily inside each worker.
+if preload_app:
+    os.environ.setdefault('MODEL_WARMUP', 'fast')
+
+
+def when_ready(server):
+    # Move everything loaded so far to the permanent generation, so the garbage
+    # collector does not write to (and un-share) the preloaded model pages
+    if preload_app:
+        gc.freeze()
+        server.log.info("Preloaded app in master (MODEL_WARMUP=%s)", os.environ.get('MODEL_WARMUP'))
+
+
+def post_fork(server, worker):
+    # Each worker gets cores / WEB_CONCURRENCY native threads (BLAS, TensorFlow,
+    # the forest's n_jobs) instead of all of them; explicit FAST_MODEL_N_JOBS
+    # and TF_NUM_*_THREADS settings are kept
+    from app.services.parallel_scoring import limit_threads, threads_per_web_worker
+
+    limit_threads(threads_per_web_worker(), override=False)
+
+
+def worker_exit(server, worker):
+    # Fold the worker's final counts into the retired snapshot and drop its
+    # file, so its gauges stop counting towards /metrics
+    from classes.metrics import registry
+
+    registry.retire()
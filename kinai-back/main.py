@@ -1,31 +1,67 @@
 import os
+from dotenv import load_dotenv
+
+# Load .env before the routes import the predictor, which reads its settings
+# (MODEL_WARMUP, PREDICTION_CACHE_SIZE, ...) from the environment
+load_dotenv()
+
 from flask import Flask
 from flask_cors import CORS
 from app.routes.prediction_routes import prediction_blueprint
+from app.routes.csv_routes import csv_blueprint
+from app.routes.job_routes import job_blueprint
+from app.routes.metrics_routes import metrics_blueprint
+from app.routes.catalog_routes import catalog_blueprint
+from app.services.job_service import JobManager
+from classes.catalog_index import CatalogIndex
 from config import config
-from dotenv import load_dotenv
 
-app = Flask(__name__)
 
-# Configuration
-config_name = os.getenv('FLASK_ENV', 'development')
-app.config.from_object(config[config_name])
+def create_app(config_name=None):
+    """
+    Application factory
 
-# Configure CORS
-load_dotenv()
-origins = os.getenv("ALLOWED_ORIGINS", "")
-origins = origins.split(",")
-origins.append("https://kinai-exoplanets.vercel.app/")
+    Args:
+        config_name: Key of the config dictionary, defaults to FLASK_ENV
+
+    Returns:
+        Flask: Configured application
+    """
+    app = Flask(__name__)
+
+    # Configuration
+    config_name = config_name or os.getenv('FLASK_ENV', 'development')
+    app.config.from_object(config[config_name])
+
+    # Configure CORS
+    origins = os.getenv("ALLOWED_ORIGINS", "")
+    origins = origins.split(",")
+    origins.append("https://kinai-exoplanets.vercel.app/")
+    CORS(app, origins=origins)
+
+    # Register blueprints
+    app.register_blueprint(prediction_blueprint)
+    app.register_blueprint(csv_blueprint)
+    app.register_blueprint(job_blueprint)
+    app.register_blueprint(metrics_blueprint)
+    app.register_blueprint(catalog_blueprint)
+
+    # Shared services, created once per application before any request can race for them
+    app.extensions["catalog_index"] = CatalogIndex(app.config["CATALOG_INDEX_PATH"])
+    app.extensions["job_manager"] = JobManager(
+        jobs_dir=app.config["JOBS_DIR"],
+        max_workers=app.config["JOB_WORKERS"],
+        max_queued=app.config["JOB_QUEUE_SIZE"],
+        retention=app.config["JOB_RETENTION"],
+    )
 
-# Configure CORS
-CORS(app, origins=origins)
+    return app
 
-# Register blueprints
-app.register_blueprint(prediction_blueprint)
 
 if __name__ == "__main__":
+    app = create_app()
     app.run(
         host='0.0.0.0', 
         port=app.config['PORT'], 
         debug=app.config['DEBUG']
-    )
\ No newline at end of file
+    )
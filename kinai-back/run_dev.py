@@ -4,7 +4,7 @@ Development script to run the application in development mode
 """
 import os
 import main
-app = main.app
+app = main.create_app()
 
 if __name__ == "__main__":
     # Configure environment variables for development
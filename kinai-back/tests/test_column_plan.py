@@ -0,0 +1,49 @@
+"""
+Column plans validate the schema against the model's columns (app.services.unified_csv_service)
+"""
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.schemas import DEFAULT_SCHEMA
+from app.services.unified_csv_service import MODEL_COLUMNS, coerce_features, get_column_plan
+
+
+def schema_without(*columns):
+    return [column for column in DEFAULT_SCHEMA if column["id"] not in columns]
+
+
+def identity_mapping(schema):
+    return {column["id"]: column["id"] for column in schema}
+
+
+@pytest.mark.parametrize("model_type", ["fast", "deep"])
+def test_default_schema_covers_both_models(model_type):
+    plan, error = get_column_plan(identity_mapping(DEFAULT_SCHEMA), DEFAULT_SCHEMA, model_type)
+    assert error is None
+    assert set(MODEL_COLUMNS[model_type]) <= set(plan.required_columns)
+
+
+def test_schema_missing_fast_columns_is_rejected():
+    schema = schema_without("period", "duration")
+    _, (body, status) = get_column_plan(identity_mapping(schema), schema, "fast")
+    assert status == 400
+    assert "period" in body["error"] and "duration" in body["error"]
+
+
+def test_schema_without_views_is_fast_only():
+    schema = schema_without("global_view", "local_view")
+    assert get_column_plan(identity_mapping(schema), schema, "fast")[1] is None
+    _, (body, status) = get_column_plan(identity_mapping(schema), schema, "deep")
+    assert status == 400
+    assert "global_view" in body["error"]
+
+
+def test_non_numeric_values_become_failed_rows():
+    csv = "ror,stellar_mass,ss_gravity,period,duration,transit_epoch\n0.1,1,4.4,10,3,100\nabc,1,4.4,10,3,100\n"
+    features_df = pd.read_csv(io.StringIO(csv))
+    inputs, valid_mask = coerce_features(features_df, "fast")
+    np.testing.assert_array_equal(valid_mask, [True, False])
+    assert len(inputs[0]) == 1
@@ -0,0 +1,69 @@
+"""
+Parity of the compiled forest engine (classes.forest_engine) with sklearn
+"""
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.datasets import make_classification
+from sklearn.ensemble import RandomForestClassifier
+
+from classes.features import FAST_COLUMNS
+from classes.forest_engine import CompiledForest, check_parity
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+FAST_MODEL_PATH = os.path.join(BACKEND_DIR, 'ai_models', 'fast_model.pkl')
+DATASET_PATH = os.path.join(
+    BACKEND_DIR, '..', 'kinai-machine-learning', 'data', 'koi_tess_tabular_dataset', 'kepler_tess_dataset.csv'
+)
+
+
+@pytest.fixture(scope='module')
+def synthetic_forest():
+    X, y = make_classification(n_samples=2000, n_features=6, n_informative=4, random_state=0)
+    forest = RandomForestClassifier(n_estimators=60, max_depth=8, random_state=0).fit(X, y)
+    return forest, X
+
+
+def test_synthetic_forest_matches_sklearn(synthetic_forest):
+    forest, X = synthetic_forest
+    rng = np.random.default_rng(1)
+    X_new = rng.normal(scale=2.0, size=(3000, X.shape[1]))
+    for rows in (X, X_new, X_new[:1]):
+        result = check_parity(forest, rows)
+        assert result["label_mismatches"] == 0
+        assert result["max_proba_diff"] < 1e-12
+
+
+def test_values_on_split_thresholds(synthetic_forest):
+    # Rows whose values are exactly the split thresholds exercise the float32 comparison
+    forest, X = synthetic_forest
+    tree = forest.estimators_[0].tree_
+    internal = tree.children_left != -1
+    rows = np.repeat(X[:1], internal.sum(), axis=0)
+    rows[np.arange(len(rows)), tree.feature[internal]] = tree.threshold[internal]
+    result = check_parity(forest, rows)
+    assert result["label_mismatches"] == 0
+    assert result["max_proba_diff"] < 1e-12
+
+
+def test_rejects_wrong_number_of_features(synthetic_forest):
+    forest, X = synthetic_forest
+    compiled = CompiledForest.from_sklearn(forest)
+    assert compiled.n_features_in_ == forest.n_features_in_
+    for width in (X.shape[1] - 1, X.shape[1] + 1):
+        with pytest.raises(ValueError):
+            compiled.predict(np.zeros((2, width)))
+
+
+@pytest.mark.skipif(not (os.path.exists(FAST_MODEL_PATH) and os.path.exists(DATASET_PATH)),
+                    reason='fast model or tabular dataset not available')
+def test_fast_model_matches_sklearn_on_dataset():
+    forest = joblib.load(FAST_MODEL_PATH)
+    X = pd.read_csv(DATASET_PATH)[FAST_COLUMNS].dropna().to_numpy(dtype=np.float64)
+    result = check_parity(forest, X)
+    assert result["rows"] > 0
+    assert result["label_mismatches"] == 0
+    assert result["max_proba_diff"] < 1e-12
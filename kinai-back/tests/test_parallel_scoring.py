@@ -0,0 +1,117 @@
+"""
+CSV and job uploads score their chunks on the process pool (app.services.parallel_scoring)
+"""
+import io
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import quote
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services import parallel_scoring
+from app.services.job_service import JobManager
+from app.services.unified_csv_service import DEFAULT_REQUIRED_COLUMNS
+from main import create_app
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+FAST_MODEL_PATH = os.path.join(BACKEND_DIR, 'ai_models', 'fast_model.pkl')
+
+pytestmark = pytest.mark.skipif(not os.path.exists(FAST_MODEL_PATH), reason='fast model not available')
+
+# More rows than the default CSV_CHUNK_SIZE (1000), fewer than it per chunk
+N_ROWS = 2500
+
+
+class SpyExecutor:
+    """
+    Process pool that counts the blocks submitted to it
+    """
+
+    def __init__(self, executor):
+        self.executor = executor
+        self.submitted = 0
+
+    def submit(self, fn, *args):
+        self.submitted += 1
+        return self.executor.submit(fn, *args)
+
+
+@pytest.fixture(scope='module')
+def pool():
+    executor = ProcessPoolExecutor(
+        max_workers=2,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=parallel_scoring._init_worker,
+        initargs=(1,),
+    )
+    yield executor
+    executor.shutdown(cancel_futures=True)
+
+
+@pytest.fixture
+def spy(pool, monkeypatch):
+    spy = SpyExecutor(pool)
+    monkeypatch.setattr(parallel_scoring, 'SCORING_WORKERS', 2)
+    monkeypatch.setattr(parallel_scoring, 'get_executor', lambda: spy)
+    return spy
+
+
+@pytest.fixture(scope='module')
+def csv_body():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({column: rng.uniform(0.1, 10.0, N_ROWS) for column in DEFAULT_REQUIRED_COLUMNS})
+    df['global_view'] = '[]'
+    df['local_view'] = '[]'
+    # Rows that can't be scored must stay in place as NaN
+    df.loc[::97, 'ror'] = np.nan
+    return df.to_csv(index=False).encode('utf-8')
+
+
+@pytest.fixture
+def client(tmp_path):
+    app = create_app('development')
+    app.extensions["job_manager"] = JobManager(jobs_dir=str(tmp_path))
+    return app.test_client()
+
+
+def csv_url(path):
+    mapping = {column: column for column in DEFAULT_REQUIRED_COLUMNS}
+    return f"{path}?columnMapping={quote(json.dumps(mapping))}"
+
+
+def predictions(body):
+    return pd.read_csv(io.BytesIO(body))['ai_prediction'].to_numpy()
+
+
+def test_csv_upload_uses_the_pool(client, spy, csv_body, monkeypatch):
+    response = client.post(csv_url('/csv/predict'), data=csv_body, content_type='text/csv')
+    assert response.status_code == 200
+    pooled = predictions(response.data)
+    assert spy.submitted == 3
+
+    monkeypatch.setattr(parallel_scoring, 'SCORING_WORKERS', 0)
+    response = client.post(csv_url('/csv/predict'), data=csv_body, content_type='text/csv')
+    assert spy.submitted == 3
+    np.testing.assert_array_equal(pooled, predictions(response.data))
+    assert np.isnan(pooled[::97]).all()
+
+
+def test_job_uses_the_pool(client, spy, csv_body):
+    response = client.post(csv_url('/jobs'), data=csv_body, content_type='text/csv')
+    assert response.status_code == 202
+    job_id = response.get_json()["job_id"]
+
+    deadline = time.time() + 120
+    while time.time() < deadline:
+        job = client.get(f'/jobs/{job_id}').get_json()
+        if job["status"] in ("done", "failed"):
+            break
+        time.sleep(0.1)
+    assert job["status"] == "done", job["error"]
+    assert job["total_rows"] == N_ROWS
+    assert spy.submitted == 3
@@ -0,0 +1,213 @@
+"""
+Compactación del RandomForest del modelo rápido (poda de árboles por OOB)
+
+El costo de inferencia crece con el número de árboles, pero la exactitud se
+estanca mucho antes de 500. Este script:
+
+- Reentrena el bosque maestro (parámetros de RF.ipynb o de un .pkl dado) con
+  la misma partición GroupShuffleSplit de RF.ipynb, así que se conocen las
+  muestras bootstrap de cada árbol.
+- Ordena los árboles por su AUC fuera de bolsa (OOB): cada árbol se evalúa
+  solo en las filas de entrenamiento que no vio.
+- Para cada k calcula el AUC OOB del bosque con los k mejores árboles (cada
+  fila promedia solo los árboles para los que es OOB) y elige el k más
+  pequeño que alcanza el AUC objetivo. La selección no usa el conjunto de
+  prueba; este solo se reporta.
+- Reporta latencia y métricas de prueba por tamaño y exporta el bosque podado
+  como RandomForestClassifier, el mismo contrato de fast_model.pkl (predict,
+  n_jobs, motor 'compiled' de kinai-back).
+
+Uso:
+    python forest_compaction.py kepler_tess_dataset.csv fast_model_small.pkl --max-auc-drop 0.002
+"""
+import argparse
+import copy
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.base import clone
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import accuracy_score, f1_score, roc_auc_score
+from sklearn.model_selection import GroupShuffleSplit
+
+from rf_sweep import BASE_PARAMS, FEATURE_COLS, load_data
+
+# Bosque de RF.ipynb
+TEACHER_PARAMS = {**BASE_PARAMS, "n_estimators": 500, "n_jobs": -1}
+
+REPORT_SIZES = (5, 10, 25, 50, 100, 200, 300, 500)
+
+
+def notebook_split(X, y, groups, test_size=0.2, random_state=42):
+    """
+    (train_idx, test_idx) por search_id, igual que RF.ipynb
+    """
+    gss = GroupShuffleSplit(n_splits=1, test_size=test_size, random_state=random_state)
+    return next(gss.split(X, y, groups=groups))
+
+
+def oob_masks(forest, n_samples):
+    """
+    Matriz (árboles, filas) con True donde la fila quedó fuera de la muestra
+    bootstrap del árbol
+
+    Reproduce el muestreo de sklearn: randint(0, n, n) con el random_state
+    de cada árbol (bootstrap=True, max_samples=None).
+    """
+    if not forest.bootstrap or forest.max_samples is not None:
+        raise ValueError("OOB ranking needs bootstrap=True and max_samples=None")
+    masks = np.ones((len(forest.estimators_), n_samples), dtype=bool)
+    for i, tree in enumerate(forest.estimators_):
+        sampled = np.random.RandomState(tree.random_state).randint(0, n_samples, n_samples)
+        masks[i, sampled] = False
+    return masks
+
+
+def tree_probas(forest, X):
+    """
+    Probabilidad de la clase 1 de cada árbol: matriz (árboles, filas)
+    """
+    positive = list(forest.classes_).index(1)
+    return np.stack([tree.predict_proba(X)[:, positive] for tree in forest.estimators_])
+
+
+def rank_trees(probas, masks, y):
+    """
+    Índices de los árboles de mayor a menor AUC OOB, y esos AUC
+    """
+    scores = np.array([
+        roc_auc_score(y[mask], proba[mask]) if len(np.unique(y[mask])) == 2 else 0.5
+        for proba, mask in zip(probas, masks)
+    ])
+    order = np.argsort(-scores, kind='stable')
+    return order, scores[order]
+
+
+def oob_auc_curve(probas, masks, y, order):
+    """
+    AUC OOB del bosque formado por los k primeros árboles de order, para cada k
+
+    Con sumas acumuladas sobre los árboles ordenados todo k sale de una sola
+    pasada; las filas sin ningún árbol OOB todavía no cuentan.
+    """
+    sums = np.cumsum(np.where(masks[order], probas[order], 0.0), axis=0)
+    counts = np.cumsum(masks[order], axis=0)
+    curve = np.full(len(order), np.nan)
+    for k in range(len(order)):
+        covered = counts[k] > 0
+        if len(np.unique(y[covered])) == 2:
+            curve[k] = roc_auc_score(y[covered], sums[k][covered] / counts[k][covered])
+    return curve
+
+
+def subforest(forest, trees):
+    """
+    Copia del bosque con solo los árboles indicados (mismo tipo y parámetros)
+    """
+    small = copy.copy(forest)
+    small.estimators_ = [forest.estimators_[i] for i in trees]
+    small.n_estimators = len(small.estimators_)
+    return small
+
+
+def measure(model, X_test, y_test, repeats=20):
+    """
+    Métricas de prueba y latencia de predict (1 fila y todo el conjunto) con n_jobs=1
+    """
+    model = copy.copy(model)
+    model.n_jobs = 1
+    probas = model.predict_proba(X_test)
+    proba = probas[:, list(model.classes_).index(1)]
+    yhat = model.classes_.take(np.argmax(probas, axis=1))
+
+    single = X_test.iloc[:1]
+    start = time.perf_counter()
+    for _ in range(repeats):
+        model.predict(single)
+    single_ms = 1000.0 * (time.perf_counter() - start) / repeats
+    start = time.perf_counter()
+    model.predict(X_test)
+    batch_ms = 1000.0 * (time.perf_counter() - start)
+
+    return {
+        "test_auc": roc_auc_score(y_test, proba),
+        "test_f1": f1_score(y_test, yhat, zero_division=0),
+        "test_accuracy": accuracy_score(y_test, yhat),
+        "ms_1_row": single_ms,
+        "ms_test_set": batch_ms,
+    }
+
+
+def compact(X, y, groups, teacher_params=TEACHER_PARAMS, target_auc=None, max_auc_drop=0.002,
+            report_sizes=REPORT_SIZES):
+    """
+    Reentrena el maestro, ordena sus árboles y elige el bosque podado más pequeño
+
+    Args:
+        X, y, groups: Datos (ver rf_sweep.load_data)
+        teacher_params: Parámetros del RandomForestClassifier maestro
+        target_auc: AUC OOB mínimo; por defecto el del maestro menos max_auc_drop
+        max_auc_drop: Caída de AUC OOB aceptada cuando no se da target_auc
+        report_sizes: Tamaños incluidos en el reporte además del elegido
+
+    Returns:
+        tuple: (modelo podado, reporte dict con una fila por tamaño)
+    """
+    train_idx, test_idx = notebook_split(X, y, groups)
+    X_train, y_train = X[train_idx], y[train_idx]
+    # Con nombres de columnas, como fast_model.pkl (feature_names_in_)
+    X_test, y_test = pd.DataFrame(X[test_idx], columns=FEATURE_COLS), y[test_idx]
+
+    teacher = RandomForestClassifier(**teacher_params).fit(pd.DataFrame(X_train, columns=FEATURE_COLS), y_train)
+    masks = oob_masks(teacher, len(X_train))
+    probas = tree_probas(teacher, X_train)
+    order, tree_scores = rank_trees(probas, masks, y_train)
+    curve = oob_auc_curve(probas, masks, y_train, order)
+
+    teacher_oob_auc = float(curve[-1])
+    if target_auc is None:
+        target_auc = teacher_oob_auc - max_auc_drop
+    meets = np.flatnonzero(curve >= target_auc)
+    selected = int(meets[0]) + 1 if len(meets) else len(order)
+
+    sizes = sorted({size for size in report_sizes if size <= len(order)} | {selected, len(order)})
+    rows = []
+    for size in sizes:
+        model = subforest(teacher, order[:size])
+        rows.append({"n_trees": size, "oob_auc": float(curve[size - 1]), **measure(model, X_test, y_test),
+                     "selected": size == selected})
+
+    report = {
+        "teacher_trees": len(order),
+        "teacher_oob_auc": teacher_oob_auc,
+        "target_oob_auc": float(target_auc),
+        "selected_trees": selected,
+        "best_tree_oob_auc": float(tree_scores[0]),
+        "sizes": rows,
+    }
+    return subforest(teacher, order[:selected]), report
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Prune the fast model forest to the smallest size meeting a target AUC')
+    parser.add_argument('csv_path')
+    parser.add_argument('output_path', help='Pruned model (.pkl), same contract as fast_model.pkl')
+    parser.add_argument('--teacher', help='Existing .pkl whose parameters are used for the teacher (refit on the split)')
+    parser.add_argument('--target-auc', type=float, help='Minimum OOB AUC of the pruned forest')
+    parser.add_argument('--max-auc-drop', type=float, default=0.002,
+                        help='Allowed OOB AUC drop versus the teacher when --target-auc is not given')
+    args = parser.parse_args()
+
+    params = TEACHER_PARAMS
+    if args.teacher:
+        params = clone(joblib.load(args.teacher)).get_params()
+
+    X, y, groups = load_data(args.csv_path)
+    model, report = compact(X, y, groups, params, args.target_auc, args.max_auc_drop)
+    joblib.dump(model, args.output_path)
+
+    print(pd.DataFrame(report["sizes"]).to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+    print(f"\nTeacher OOB AUC {report['teacher_oob_auc']:.4f}, target {report['target_oob_auc']:.4f}: "
+          f"kept {report['selected_trees']} of {report['teacher_trees']} trees -> {args.output_path}")
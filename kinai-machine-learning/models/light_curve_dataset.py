@@ -0,0 +1,129 @@
+"""
+Carga de datos de entrenamiento del CNN1D con tf.data
+
+Las vistas se leen del store binario (catalog.csv, global_view.npy,
+local_view.npy; ver data/koi_lightcurves_dataset) abierto con mmap, así que
+nunca se cargan completas en memoria. Los splits de train/val/test son
+arreglos de índices de fila y cada lote se copia del mmap solo cuando el
+pipeline lo pide, en paralelo y con prefetch.
+
+Uso:
+    store = LightCurveDataset(store_dir)
+    train_rows, val_rows, test_rows = split_rows(store.labels, store.rows_with(dispositions=(0, 1)))
+    train_ds = store.dataset(train_rows, batch_size=32, shuffle=True)
+    model.fit(train_ds, validation_data=store.dataset(val_rows), epochs=60)
+"""
+import os
+
+import numpy as np
+import pandas as pd
+import tensorflow as tf
+from sklearn.model_selection import train_test_split
+
+SCALAR_COLUMNS = ["ror", "stellar_mass", "ss_gravity"]
+LABEL_COLUMN = "disposition"
+
+
+class LightCurveDataset:
+    """
+    Store binario de curvas de luz abierto con mmap
+    """
+
+    def __init__(self, store_dir):
+        self.catalog = pd.read_csv(os.path.join(store_dir, "catalog.csv"))
+        self.global_views = np.load(os.path.join(store_dir, "global_view.npy"), mmap_mode="r")
+        self.local_views = np.load(os.path.join(store_dir, "local_view.npy"), mmap_mode="r")
+        if not len(self.catalog) == len(self.global_views) == len(self.local_views):
+            raise ValueError(f"Store '{store_dir}' has misaligned files")
+
+        # Columnas pequeñas: se cargan completas
+        self.scalars = self.catalog[SCALAR_COLUMNS].to_numpy(dtype=np.float32)
+        self.labels = self.catalog[LABEL_COLUMN].to_numpy()
+
+    def __len__(self):
+        return len(self.catalog)
+
+    def rows_with(self, dispositions=(0, 1)):
+        """
+        Índices de las filas con alguna de las dispositions indicadas
+        """
+        return np.flatnonzero(np.isin(self.labels, dispositions))
+
+    def load_rows(self, rows):
+        """
+        Copia del mmap las filas indicadas: (global, local, scalars, labels) en float32
+        """
+        rows = np.asarray(rows)
+        # Leer en orden de fila recorre el archivo secuencialmente
+        order = np.argsort(rows, kind="stable")
+        sorted_rows = rows[order]
+        inverse = np.empty_like(order)
+        inverse[order] = np.arange(len(order))
+
+        global_views = np.asarray(self.global_views[sorted_rows], dtype=np.float32)[inverse]
+        local_views = np.asarray(self.local_views[sorted_rows], dtype=np.float32)[inverse]
+        return (
+            global_views[..., np.newaxis],
+            local_views[..., np.newaxis],
+            self.scalars[rows],
+            self.labels[rows].astype(np.float32),
+        )
+
+    def dataset(self, rows, batch_size=32, shuffle=False, seed=42,
+                num_parallel_calls=tf.data.AUTOTUNE, prefetch=tf.data.AUTOTUNE):
+        """
+        tf.data.Dataset de lotes ({"global_view", "local_view", "scalar_features"}, y)
+
+        El pipeline baraja y agrupa solo los índices; cada lote se lee del
+        mmap en un map paralelo, así que la memoria usada depende del tamaño
+        de lote y del prefetch, no del tamaño del dataset.
+
+        Args:
+            rows: Índices de fila (por ejemplo, de split_rows)
+            batch_size: Filas por lote
+            shuffle: Barajar los índices en cada época
+            seed: Semilla del barajado
+            num_parallel_calls: Lotes leídos en paralelo
+            prefetch: Lotes preparados por adelantado
+
+        Returns:
+            tf.data.Dataset
+        """
+        n_global = self.global_views.shape[1]
+        n_local = self.local_views.shape[1]
+
+        def load(batch_rows):
+            global_views, local_views, scalars, labels = tf.numpy_function(
+                self.load_rows, [batch_rows], (tf.float32, tf.float32, tf.float32, tf.float32)
+            )
+            global_views.set_shape([None, n_global, 1])
+            local_views.set_shape([None, n_local, 1])
+            scalars.set_shape([None, len(SCALAR_COLUMNS)])
+            labels.set_shape([None])
+            inputs = {"global_view": global_views, "local_view": local_views, "scalar_features": scalars}
+            return inputs, labels
+
+        ds = tf.data.Dataset.from_tensor_slices(np.asarray(rows, dtype=np.int64))
+        if shuffle:
+            ds = ds.shuffle(len(rows), seed=seed, reshuffle_each_iteration=True)
+        ds = ds.batch(batch_size).map(load, num_parallel_calls=num_parallel_calls)
+        return ds.prefetch(prefetch)
+
+
+def split_rows(labels, rows, test_size=0.15, val_size=0.1765, random_state=42):
+    """
+    Split estratificado train/val/test de índices de fila, sin copiar datos
+
+    Con los mismos parámetros da la misma partición que train_test_split
+    sobre los arreglos completos.
+
+    Returns:
+        tuple: (train_rows, val_rows, test_rows)
+    """
+    rows = np.asarray(rows)
+    y = labels[rows]
+    train_rows, test_rows = train_test_split(rows, test_size=test_size, random_state=random_state, stratify=y)
+    train_rows, val_rows = train_test_split(
+        train_rows, test_size=val_size, random_state=random_state, stratify=labels[train_rows]
+    )
+    return train_rows, val_rows, test_rows
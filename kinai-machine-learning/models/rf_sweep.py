@@ -0,0 +1,263 @@
+"""
+Barrido de hiperparámetros del RandomForest (paralelo e incremental)
+
+- Las particiones GroupShuffleSplit se calculan una vez y se guardan.
+- Cada tarea (configuración, partición) entrena un bosque con n_jobs=1 y lo
+  hace crecer con warm_start por la lista de n_estimators, evaluando en cada
+  tamaño; las tareas corren en paralelo con joblib, un núcleo cada una.
+- Las métricas se calculan con una sola llamada a predict_proba por conjunto.
+- Cada resultado se agrega a results.jsonl en cuanto termina; al volver a
+  correr se omiten las tareas ya hechas con los mismos datos (huella de X, y,
+  grupos), así que un barrido interrumpido continúa y uno con datos nuevos
+  se recalcula.
+
+Uso:
+    python rf_sweep.py kepler_tess_dataset.csv rf_sweep/ --depths 1-20 --n-estimators 100 250 500 --splits 5
+"""
+import argparse
+import hashlib
+import itertools
+import json
+import os
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import (
+    accuracy_score, f1_score, log_loss, precision_score, recall_score, roc_auc_score
+)
+from sklearn.model_selection import GroupShuffleSplit
+
+FEATURE_COLS = ['ror', 'stellar_mass', 'ss_gravity', 'period', 'duration', 'transit_epoch']
+
+# Parámetros fijos del modelo de RF.ipynb; el barrido puede cambiar cualquiera
+BASE_PARAMS = {
+    "max_depth": 6,
+    "min_samples_split": 5,
+    "min_samples_leaf": 1,
+    "max_features": "sqrt",
+    "random_state": 42,
+}
+
+RESULTS_FILE = 'results.jsonl'
+SPLITS_FILE = 'splits.npz'
+
+
+def load_data(csv_path):
+    """
+    X, y y grupos (search_id) de las filas con disposition 0 o 1
+    """
+    df = pd.read_csv(csv_path)
+    df = df[df['disposition'].isin([0, 1])]
+    return df[FEATURE_COLS].to_numpy(dtype=np.float64), df['disposition'].to_numpy(dtype=int), df['search_id'].to_numpy()
+
+
+def data_fingerprint(X, y, groups):
+    digest = hashlib.blake2b(digest_size=12)
+    digest.update(np.ascontiguousarray(X).tobytes())
+    digest.update(np.ascontiguousarray(y).tobytes())
+    digest.update('\n'.join(map(str, groups)).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def get_splits(out_dir, fingerprint, X, y, groups, n_splits=5, test_size=0.2, random_state=42):
+    """
+    Particiones (train_idx, test_idx) por search_id, guardadas en out_dir
+
+    Se recalculan solo si cambian los datos o los parámetros.
+    """
+    path = os.path.join(out_dir, SPLITS_FILE)
+    key = f"{fingerprint}:{n_splits}:{test_size}:{random_state}"
+    if os.path.exists(path):
+        with np.load(path) as cached:
+            if str(cached['key']) == key:
+                return [(cached[f'train_{i}'], cached[f'test_{i}']) for i in range(n_splits)]
+
+    gss = GroupShuffleSplit(n_splits=n_splits, test_size=test_size, random_state=random_state)
+    splits = list(gss.split(X, y, groups=groups))
+    arrays = {'key': np.array(key)}
+    for i, (train_idx, test_idx) in enumerate(splits):
+        arrays[f'train_{i}'] = train_idx
+        arrays[f'test_{i}'] = test_idx
+    np.savez(path + '.tmp.npz', **arrays)
+    os.replace(path + '.tmp.npz', path)
+    return splits
+
+
+def config_key(params):
+    return json.dumps(params, sort_keys=True)
+
+
+def evaluate(model, X, y):
+    """
+    Métricas a partir de una sola llamada a predict_proba
+    """
+    proba = model.predict_proba(X)
+    p = proba[:, list(model.classes_).index(1)]
+    yhat = model.classes_.take(np.argmax(proba, axis=1))
+    return {
+        "accuracy": accuracy_score(y, yhat),
+        "precision": precision_score(y, yhat, zero_division=0),
+        "recall": recall_score(y, yhat, zero_division=0),
+        "f1": f1_score(y, yhat, zero_division=0),
+        "roc_auc": roc_auc_score(y, p) if len(np.unique(y)) == 2 else None,
+        "log_loss": log_loss(y, np.c_[1 - p, p], labels=[0, 1]),
+    }
+
+
+def run_task(params, n_estimators_list, X, y, train_idx, test_idx):
+    """
+    Entrena un bosque y lo hace crecer por n_estimators_list (ascendente)
+
+    Con warm_start y el mismo random_state, el bosque de n árboles obtenido
+    al crecer es idéntico al entrenado desde cero con n árboles.
+
+    Returns:
+        list: Un dict de métricas de train y test por cada n_estimators
+    """
+    X_train, y_train = X[train_idx], y[train_idx]
+    X_test, y_test = X[test_idx], y[test_idx]
+
+    model = RandomForestClassifier(**params, n_jobs=1, warm_start=True)
+    stages = []
+    for n_estimators in n_estimators_list:
+        model.set_params(n_estimators=n_estimators)
+        model.fit(X_train, y_train)
+        stages.append({
+            "n_estimators": n_estimators,
+            "train": evaluate(model, X_train, y_train),
+            "test": evaluate(model, X_test, y_test),
+        })
+    return stages
+
+
+def _run_keyed_task(key, split, *args):
+    return key, split, run_task(*args)
+
+
+def load_results(out_dir):
+    path = os.path.join(out_dir, RESULTS_FILE)
+    if not os.path.exists(path):
+        return []
+    records = []
+    with open(path) as results_file:
+        for line in results_file:
+            # Una línea cortada por una interrupción se descarta
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return records
+
+
+def run_sweep(X, y, groups, out_dir, grid, n_estimators_list=(500,), n_splits=5, n_jobs=-1):
+    """
+    Ejecuta las tareas pendientes del barrido
+
+    Args:
+        X, y, groups: Datos (ver load_data)
+        out_dir: Directorio de resultados
+        grid: Dict {parámetro: lista de valores} sobre BASE_PARAMS
+        n_estimators_list: Tamaños de bosque evaluados en cada tarea
+        n_splits: Particiones GroupShuffleSplit
+        n_jobs: Procesos en paralelo (-1 = todos los núcleos)
+
+    Returns:
+        pd.DataFrame: Todos los resultados de estos datos (ver results_frame)
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    fingerprint = data_fingerprint(X, y, groups)
+    splits = get_splits(out_dir, fingerprint, X, y, groups, n_splits=n_splits)
+    n_estimators_list = sorted(n_estimators_list)
+
+    done = {
+        (r["config"], r["split"], r["n_estimators"])
+        for r in load_results(out_dir) if r["data"] == fingerprint
+    }
+
+    names = sorted(grid)
+    tasks = []
+    for values in itertools.product(*(grid[name] for name in names)):
+        params = {**BASE_PARAMS, **dict(zip(names, values))}
+        key = config_key(params)
+        for split in range(n_splits):
+            if all((key, split, n) in done for n in n_estimators_list):
+                continue
+            tasks.append((params, key, split))
+
+    print(f"{len(tasks)} tasks to run, {len(done)} results already saved")
+    results_path = os.path.join(out_dir, RESULTS_FILE)
+    parallel = Parallel(n_jobs=n_jobs, return_as='generator_unordered')
+    jobs = (
+        delayed(_run_keyed_task)(key, split, params, n_estimators_list, X, y, *splits[split])
+        for params, key, split in tasks
+    )
+    with open(results_path, 'a+') as results_file:
+        if results_file.tell() > 0:
+            results_file.seek(results_file.tell() - 1)
+            if results_file.read(1) != '\n':
+                results_file.write('\n')
+        for finished, (key, split, stages) in enumerate(parallel(jobs), start=1):
+            for stage in stages:
+                record = {"data": fingerprint, "config": key, "split": split, **stage}
+                results_file.write(json.dumps(record) + '\n')
+            results_file.flush()
+            print(f"{finished:04d}/{len(tasks)} : split {split} {key}")
+
+    return results_frame(out_dir, fingerprint)
+
+
+def results_frame(out_dir, fingerprint=None):
+    """
+    Resultados guardados como DataFrame: una fila por (config, split,
+    n_estimators) con los parámetros y las métricas train_* / test_*
+    """
+    rows = []
+    for record in load_results(out_dir):
+        if fingerprint and record["data"] != fingerprint:
+            continue
+        row = {**json.loads(record["config"]), "config": record["config"], "split": record["split"],
+               "n_estimators": record["n_estimators"]}
+        row.update({f"train_{name}": value for name, value in record["train"].items()})
+        row.update({f"test_{name}": value for name, value in record["test"].items()})
+        rows.append(row)
+    # Si una tarea se repitió, vale su último resultado
+    return pd.DataFrame(rows).drop_duplicates(['config', 'split', 'n_estimators'], keep='last') \
+        if rows else pd.DataFrame(rows)
+
+
+def summarize(results, by=('max_depth', 'n_estimators')):
+    """
+    Media de las métricas sobre las particiones
+    """
+    metrics = [column for column in results.columns if column.startswith(('train_', 'test_'))]
+    return results.groupby(list(by))[metrics].mean().reset_index()
+
+
+def parse_range(text):
+    """
+    "1-20" -> [1, ..., 20]; "3,6,9" -> [3, 6, 9]
+    """
+    if '-' in text:
+        start, stop = text.split('-')
+        return list(range(int(start), int(stop) + 1))
+    return [int(value) for value in text.split(',')]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Parallel, resumable RandomForest hyperparameter sweep')
+    parser.add_argument('csv_path')
+    parser.add_argument('out_dir')
+    parser.add_argument('--depths', default='1-20', help='max_depth values, e.g. 1-20 or 4,6,8')
+    parser.add_argument('--min-samples-split', default='5')
+    parser.add_argument('--n-estimators', type=int, nargs='+', default=[500])
+    parser.add_argument('--splits', type=int, default=5)
+    parser.add_argument('--jobs', type=int, default=-1)
+    args = parser.parse_args()
+
+    X, y, groups = load_data(args.csv_path)
+    grid = {"max_depth": parse_range(args.depths), "min_samples_split": parse_range(args.min_samples_split)}
+    results = run_sweep(X, y, groups, args.out_dir, grid, args.n_estimators, args.splits, args.jobs)
+    by = ['max_depth', 'min_samples_split', 'n_estimators']
+    print(summarize(results, by)[by + ['train_accuracy', 'test_accuracy', 'test_roc_auc']].to_string(index=False))
@@ -0,0 +1,237 @@
+"""
+Pipeline de preprocesamiento de curvas de luz (vistas global y local)
+
+Versión por script de LightCurves_Preprocessing.ipynb:
+
+1. Índice KIC -> archivos FITS, construido una sola vez con os.listdir.
+2. Los candidatos se agrupan por estrella, así que la LightCurveCollection de
+   cada estrella se lee una sola vez para todos sus planetas.
+3. Las estrellas se procesan en un pool de procesos y cada una escribe su
+   resultado en parts/<kic>.npz en cuanto termina.
+4. Al final las partes se unen en un store binario (catalog.csv,
+   global_view.npy, local_view.npy; ver data/koi_lightcurves_dataset).
+
+Una ejecución interrumpida se reanuda con el mismo comando: las estrellas que
+ya tienen su archivo en parts/ no se vuelven a procesar.
+
+Uso:
+    python preprocess_pipeline.py D:/ligthcurve/curvas preprocessed_data/kepler_tess_dataset.csv light_curves_store/
+"""
+import argparse
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+GLOBAL_VIEW_SIZE = 1001
+LOCAL_VIEW_SIZE = 101
+
+# Parámetros usados para generar el dataset publicado
+PREPROCESS_PARAMS = {
+    "outlier_sigma": 2.0,
+    "max_iter": 3,
+    "n_global": GLOBAL_VIEW_SIZE,
+    "n_local": LOCAL_VIEW_SIZE,
+    "k_durations": 4.0,
+    "delta_factor_global": 1.0,
+    "delta_factor_local": 1.6,
+    "bic_grid_days": None,
+}
+
+# BJD -> BKJD (tiempo de Kepler)
+BKJD_OFFSET = 2454833
+
+INDEX_FILE = 'file_index.json'
+PARTS_DIR = 'parts'
+CATALOG_FILE = 'catalog.csv'
+GLOBAL_VIEW_FILE = 'global_view.npy'
+LOCAL_VIEW_FILE = 'local_view.npy'
+
+FITS_NAME = re.compile(r'kplr(\d{9})-')
+
+
+def build_file_index(base_dir):
+    """
+    Agrupa los archivos FITS de base_dir por número KIC
+
+    Returns:
+        dict: {kic (int): [nombres de archivo ordenados]}
+    """
+    index = {}
+    for name in sorted(os.listdir(base_dir)):
+        match = FITS_NAME.match(name)
+        if match:
+            index.setdefault(int(match.group(1)), []).append(name)
+    return index
+
+
+def load_file_index(base_dir, out_dir, rebuild=False):
+    """
+    Lee el índice guardado en out_dir o lo construye y lo guarda
+    """
+    index_path = os.path.join(out_dir, INDEX_FILE)
+    if os.path.exists(index_path) and not rebuild:
+        with open(index_path) as index_file:
+            return {int(kic): names for kic, names in json.load(index_file).items()}
+
+    index = build_file_index(base_dir)
+    with open(index_path + '.tmp', 'w') as index_file:
+        json.dump(index, index_file)
+    os.replace(index_path + '.tmp', index_path)
+    return index
+
+
+def kic_number(search_id):
+    """
+    Número KIC de un search_id ("KIC 10797460"), o None si es de otro catálogo (TIC)
+    """
+    search_id = str(search_id)
+    return int(search_id[4:]) if search_id.startswith("KIC ") else None
+
+
+def select_candidates(df, index, keep_unconfirmed=False):
+    """
+    Filas con archivos FITS disponibles (y, por defecto, sin disposition 2)
+    """
+    df = df.drop(columns=['Unnamed: 0'], errors='ignore')
+    mask = df["search_id"].map(kic_number).isin(index)
+    if not keep_unconfirmed:
+        mask &= df["disposition"] != 2
+    return df[mask]
+
+
+def part_path(out_dir, kic):
+    return os.path.join(out_dir, PARTS_DIR, f"{kic:09d}.npz")
+
+
+def process_star(base_dir, file_names, planets, out_path):
+    """
+    Genera las vistas de todos los planetas de una estrella
+
+    Args:
+        base_dir: Directorio con los FITS
+        file_names: Archivos FITS de la estrella
+        planets: Lista de (fila, period, duration, transit_epoch)
+        out_path: Archivo .npz de salida
+
+    Returns:
+        tuple: (filas procesadas, filas fallidas)
+    """
+    import lightkurve as lk
+    from preprocess_light_curves import LightCurvePreprocess
+
+    lcc = lk.LightCurveCollection([])
+    for name in file_names:
+        try:
+            lcc.append(lk.read(os.path.join(base_dir, name)))
+        except Exception:
+            pass
+
+    lkp = LightCurvePreprocess()
+    rows, global_views, local_views, failed = [], [], [], []
+    for row, period, duration, transit_epoch in planets:
+        try:
+            g_y, l_y = lkp.preprocess_signal(lcc, period, duration, transit_epoch - BKJD_OFFSET, **PREPROCESS_PARAMS)
+            global_views.append(np.asarray(g_y, dtype=np.float32))
+            local_views.append(np.asarray(l_y, dtype=np.float32))
+            rows.append(row)
+        except Exception:
+            failed.append(row)
+
+    # Escribir a un temporal y renombrar: un .npz existente siempre está completo
+    tmp_path = out_path + '.tmp.npz'
+    np.savez(
+        tmp_path,
+        rows=np.asarray(rows, dtype=np.int64),
+        failed=np.asarray(failed, dtype=np.int64),
+        global_view=np.asarray(global_views, dtype=np.float32).reshape(-1, GLOBAL_VIEW_SIZE),
+        local_view=np.asarray(local_views, dtype=np.float32).reshape(-1, LOCAL_VIEW_SIZE),
+    )
+    os.replace(tmp_path, out_path)
+    return len(rows), len(failed)
+
+
+def run_pipeline(base_dir, candidates, out_dir, workers=None):
+    """
+    Procesa en paralelo las estrellas que aún no tienen parte en out_dir
+
+    Args:
+        base_dir: Directorio con los FITS
+        candidates: DataFrame de select_candidates (su índice identifica la fila)
+        out_dir: Directorio de salida
+        workers: Procesos del pool (por defecto, todos los núcleos)
+
+    Returns:
+        dict: Estrellas procesadas, omitidas (ya hechas) y filas fallidas
+    """
+    os.makedirs(os.path.join(out_dir, PARTS_DIR), exist_ok=True)
+    index = load_file_index(base_dir, out_dir)
+
+    tasks = []
+    skipped = 0
+    for search_id, planets in candidates.groupby("search_id", sort=True):
+        kic = kic_number(search_id)
+        out_path = part_path(out_dir, kic)
+        if os.path.exists(out_path):
+            skipped += 1
+            continue
+        rows = list(zip(planets.index, planets["period"], planets["duration"], planets["transit_epoch"]))
+        tasks.append((base_dir, index[kic], rows, out_path))
+
+    print(f"{len(tasks)} stars to process, {skipped} already done")
+    done = failed = 0
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(process_star, *task): task[3] for task in tasks}
+        for future in as_completed(futures):
+            _, n_failed = future.result()
+            done += 1
+            failed += n_failed
+            print(f"{done:05d}/{len(tasks)} : {os.path.basename(futures[future])}")
+
+    return {"processed": done, "skipped": skipped, "failed_rows": failed}
+
+
+def merge_parts(candidates, out_dir):
+    """
+    Une las partes en un store binario, en el orden de candidates
+
+    Returns:
+        int: Filas escritas (las fallidas se omiten)
+    """
+    global_by_row, local_by_row = {}, {}
+    for search_id in candidates["search_id"].unique():
+        out_path = part_path(out_dir, kic_number(search_id))
+        if not os.path.exists(out_path):
+            continue
+        with np.load(out_path) as part:
+            for row, global_view, local_view in zip(part["rows"], part["global_view"], part["local_view"]):
+                global_by_row[row] = global_view
+                local_by_row[row] = local_view
+
+    catalog = candidates[candidates.index.isin(global_by_row.keys())]
+    np.save(os.path.join(out_dir, GLOBAL_VIEW_FILE),
+            np.asarray([global_by_row[row] for row in catalog.index], dtype=np.float32).reshape(-1, GLOBAL_VIEW_SIZE))
+    np.save(os.path.join(out_dir, LOCAL_VIEW_FILE),
+            np.asarray([local_by_row[row] for row in catalog.index], dtype=np.float32).reshape(-1, LOCAL_VIEW_SIZE))
+    catalog.to_csv(os.path.join(out_dir, CATALOG_FILE), index=False)
+    return len(catalog)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Build global/local light-curve views for the KOI catalog')
+    parser.add_argument('fits_dir', help='Directory with the Kepler FITS files')
+    parser.add_argument('catalog_csv', help='Tabular dataset (kepler_tess_dataset.csv)')
+    parser.add_argument('out_dir', help='Output directory (parts/ and the binary store)')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--keep-unconfirmed', action='store_true', help='Also process disposition 2 candidates')
+    parser.add_argument('--rebuild-index', action='store_true', help='Rescan fits_dir (after downloading more files)')
+    args = parser.parse_args()
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    index = load_file_index(args.fits_dir, args.out_dir, rebuild=args.rebuild_index)
+    candidates = select_candidates(pd.read_csv(args.catalog_csv), index, args.keep_unconfirmed)
+    print(run_pipeline(args.fits_dir, candidates, args.out_dir, args.workers))
+    print(f"Wrote {merge_parts(candidates, args.out_dir)} light curves to {args.out_dir}")